@@ -41,6 +41,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "simulator.middleware.MetricsMiddleware",  # pierwszy – mierzy całe żądanie
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -127,14 +128,62 @@ MEDIA_ROOT = BASE_DIR / 'media'
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# Cache
+# Alias "calculations" trzyma wyniki kalkulatora (simulator.utils.result_cache):
+# LocMemCache usuwa najdawniej używane wpisy po przekroczeniu MAX_ENTRIES.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "calculations": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "calculations",
+        "TIMEOUT": 60 * 60,
+        "OPTIONS": {
+            "MAX_ENTRIES": 5000,
+            "CULL_FREQUENCY": 50,  # przy przepełnieniu usuń 1/50 najstarszych wpisów
+        },
+    },
+}
+CALCULATION_CACHE_ALIAS = "calculations"
+
+# Metryki (simulator.utils.instrumentation): czasy etapów kalkulatora, czasy i liczba
+# zapytań per widok; /metrics w formacie Prometheus.
+# Z ustawionym METRICS_TOKEN /metrics wymaga nagłówka "Authorization: Bearer <token>"
+# (niezależnie od adresu). Bez tokenu wpuszcza tylko METRICS_ALLOWED_IPS – to wystarcza
+# wyłącznie wtedy, gdy serwer słucha na wewnętrznym interfejsie bez reverse proxy na tym
+# samym hoście: za lokalnym proxy każde żądanie ma REMOTE_ADDR 127.0.0.1.
+METRICS_ENABLED = True
+METRICS_ALLOWED_IPS = ["127.0.0.1", "::1"]
+METRICS_TOKEN = None
+
+# Widoki async (API kalkulatora i doradcy) liczą w ograniczonej puli wątków
+# (simulator.utils.calc_executor); ponad CALC_EXECUTOR_MAX_PENDING zleceń – 503.
+CALC_EXECUTOR_WORKERS = 4
+CALC_EXECUTOR_MAX_PENDING = 64
+
+# Zadania w tle (simulator.utils.jobs): rozgrzana pula procesów bez brokera,
+# najwyżej JOBS_MAX_PENDING zadań w toku, wyniki trzymane JOBS_RESULT_TTL s.
+JOBS_WORKERS = 2
+JOBS_MAX_PENDING = 32
+JOBS_RESULT_TTL = 600
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'handlers': {
+        # wątek żądania tylko wrzuca rekord do kolejki; zapis (JSON lines, porcjami)
+        # robi QueueListener w tle – patrz simulator/log_pipeline.py. Plik może być
+        # wspólny dla wielu procesów; rotację wg rozmiaru robi ten proces, który
+        # przekroczył max_bytes (pod blokadą django.log.lock).
         'file': {
+            '()': 'simulator.log_pipeline.queue_handler',
             'level': 'INFO',
-            'class': 'logging.FileHandler',
             'filename': BASE_DIR / 'django.log',
+            'max_bytes': 10 * 1024 * 1024,
+            'backup_count': 5,
+            'flush_records': 256,
+            'flush_interval': 1.0,
         },
     },
     'loggers': {
@@ -156,5 +205,7 @@ SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
 X_FRAME_OPTIONS = 'DENY'
 
-SESSION_SAVE_EVERY_REQUEST = True  # Dodaj tymczasowo do testowania
-SESSION_ENGINE = 'django.contrib.sessions.backends.db'  # lub 'cached_db'
+# Sesja zapisywana tylko po zmianie danych (widoki ustawiają request.session.modified);
+# cached_db czyta z cache, a do bazy pisze wyłącznie przy zapisie sesji.
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
@@ -5,6 +5,7 @@ from .models import UserProfile, ContractType, WorkPeriod, RetirementCalculation
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ['user', 'age', 'gender', 'salary_gross', 'work_start_year', 'planned_retirement_year']
+    list_select_related = ['user']
     list_filter = ['gender', 'created_at']
     search_fields = ['user__username', 'user__email']
     readonly_fields = ['created_at', 'updated_at']
@@ -19,6 +20,7 @@ class ContractTypeAdmin(admin.ModelAdmin):
 @admin.register(WorkPeriod)
 class WorkPeriodAdmin(admin.ModelAdmin):
     list_display = ['user_profile', 'contract_type', 'start_year', 'end_year', 'salary_gross_monthly']
+    list_select_related = ['user_profile__user', 'contract_type']
     list_filter = ['contract_type', 'start_year']
     search_fields = ['user_profile__user__username']
 
@@ -26,6 +28,7 @@ class WorkPeriodAdmin(admin.ModelAdmin):
 @admin.register(RetirementCalculation)
 class RetirementCalculationAdmin(admin.ModelAdmin):
     list_display = ['user_profile', 'calculated_pension', 'total_contributions', 'calculation_date']
+    list_select_related = ['user_profile__user']
     list_filter = ['calculation_date']
     search_fields = ['user_profile__user__username']
     readonly_fields = ['calculation_date']
\ No newline at end of file
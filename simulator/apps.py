@@ -7,5 +7,14 @@ class SimulatorConfig(AppConfig):
     verbose_name = 'Symulator Emerytalny'
 
     def ready(self):
-        # Import sygnałów jeśli są potrzebne
-        pass
\ No newline at end of file
+        from django.conf import settings
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_migrate
+
+        from simulator import middleware, signals
+        from simulator.utils import instrumentation
+
+        post_migrate.connect(signals.seed_contract_types, sender=self)
+        if getattr(settings, 'METRICS_ENABLED', True):
+            instrumentation.install(instrumentation.METRICS)
+            connection_created.connect(middleware.install_query_counter)
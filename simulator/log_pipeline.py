@@ -0,0 +1,259 @@
+"""
+Nieblokujące logowanie: QueueHandler na wątku żądania, zapis w tle.
+
+Wątek żądania tylko formatuje treść komunikatu i wrzuca rekord do kolejki
+(przy pełnej kolejce rekord jest odrzucany i liczony – żądanie nigdy nie
+czeka na dysk). QueueListener w osobnym wątku zapisuje rekordy jako linie
+JSON przez BatchingRotatingFileHandler: bez flush po każdym rekordzie,
+tylko co 'flush_records' rekordów, po 'flush_interval' sekundach albo od
+razu dla WARNING i wyżej; plik rotowany po przekroczeniu 'max_bytes'.
+
+Do jednego pliku może pisać wiele procesów (workery serwera, komendy
+manage.py). Każda porcja jest zapisywana pod blokadą pliku '<log>.lock'
+(flock): pod blokadą handler sprawdza, czy plik nie został już zrotowany
+przez inny proces (zmiana i-węzła – wtedy otwiera nowy), dopisuje porcję
+jednym write() i – jeżeli plik przekroczył max_bytes – sam go rotuje
+(django.log -> django.log.1 ...). Rotuje więc zawsze dokładnie jeden proces,
+a pozostałe przechodzą na nowy plik przy następnej porcji. Bez fcntl
+(Windows) blokady nie ma – wtedy do pliku może pisać tylko jeden proces.
+
+Wątki zapisu (QueueListener i okresowy flush) startują przy pierwszym
+rekordzie, a nie w dictConfig – komendy manage.py, które nic nie logują,
+nie uruchamiają żadnego wątku. Po fork() proces potomny dostaje własną
+kolejkę i uruchamia własne wątki przy pierwszym rekordzie (os.register_at_fork).
+
+Użycie w settings.LOGGING (dictConfig):
+
+    'handlers': {'file': {'()': 'simulator.log_pipeline.queue_handler', 'filename': ..., ...}}
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# handlery do przestawienia w procesie potomnym po fork()
+_fork_handlers = weakref.WeakSet()
+
+
+def _reset_after_fork():
+    for handler in list(_fork_handlers):
+        handler._after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class JsonFormatter(logging.Formatter):
+    """Jedna linia JSON na rekord: czas UTC, poziom, logger, komunikat (+ wyjątek)."""
+
+    def format(self, record):
+        data = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'thread': record.threadName,
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exc'] = record.exc_text
+        if record.stack_info:
+            data['stack'] = self.formatStack(record.stack_info)
+        status = getattr(record, 'status_code', None)
+        if status is not None:
+            data['status'] = status
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class BatchingRotatingFileHandler(WatchedFileHandler):
+    """Zapis porcjami zamiast write+flush po każdym rekordzie, z rotacją wg rozmiaru bezpieczną dla wielu procesów."""
+
+    def __init__(self, filename, max_bytes=10 * 1024 * 1024, backup_count=5, flush_records=256,
+                 flush_interval=1.0, flush_level=logging.WARNING, encoding='utf-8'):
+        super().__init__(filename, encoding=encoding, delay=True)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+        self.flush_level = flush_level
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._lock_file = None
+        # bez ruchu w logach resztka bufora i tak trafia na dysk po flush_interval;
+        # wątek startuje przy pierwszym rekordzie
+        self._stop_flusher = threading.Event()
+        self._flusher = None
+        _fork_handlers.add(self)
+
+    def emit(self, record):
+        try:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_periodically, name='log-flusher', daemon=True)
+                self._flusher.start()
+            line = self.format(record) + self.terminator
+            self.acquire()
+            try:
+                self._buffer.append(line)
+                pending = len(self._buffer)
+            finally:
+                self.release()
+            if (pending >= self.flush_records or record.levelno >= self.flush_level
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    @contextmanager
+    def _file_lock(self):
+        """Blokada między procesami na czas zapisu porcji i ewentualnej rotacji."""
+        if fcntl is None:
+            yield
+            return
+        if self._lock_file is None:
+            self._lock_file = open(self.baseFilename + '.lock', 'a')
+        fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self._buffer:
+                with self._file_lock():
+                    # plik mógł zostać zrotowany przez inny proces – wtedy otwieramy nowy
+                    self.reopenIfNeeded()
+                    if self.stream is None:
+                        self.stream = self._open()
+                        self._statstream()
+                    # cała porcja jednym write() na pliku O_APPEND
+                    self.stream.write(''.join(self._buffer))
+                    self.stream.flush()
+                    self._buffer.clear()
+                    if self.max_bytes and self.backup_count and os.fstat(self.stream.fileno()).st_size >= self.max_bytes:
+                        self._rotate()
+            self._last_flush = time.monotonic()
+        finally:
+            self.release()
+
+    def _rotate(self):
+        """django.log -> .1 -> .2 ... (najstarszy znika); wywoływane pod blokadą pliku."""
+        self.stream.close()
+        self.stream = None
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f'{self.baseFilename}.{i}'
+            if os.path.exists(src):
+                os.replace(src, f'{self.baseFilename}.{i + 1}')
+        os.replace(self.baseFilename, f'{self.baseFilename}.1')
+        self.stream = self._open()
+        self._statstream()
+
+    def _flush_periodically(self):
+        while not self._stop_flusher.wait(self.flush_interval):
+            if self._buffer:
+                self.flush()
+
+    def _after_fork(self):
+        # bufor należy do rodzica (zapisze go sam); deskryptor blokady jest współdzielony
+        # z rodzicem, a flock działa na opis pliku – potomek otwiera własny
+        self._buffer = []
+        self._lock_file = None
+        self._stop_flusher = threading.Event()
+        self._flusher = None
+
+    def close(self):
+        self._stop_flusher.set()
+        self.flush()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+        super().close()
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler, który przy pełnej kolejce odrzuca rekord zamiast blokować żądanie."""
+
+    def __init__(self, q, listener=None):
+        super().__init__(q)
+        self.dropped = 0
+        self.listener = listener
+        self._started = False
+        self._start_lock = threading.Lock()
+        _fork_handlers.add(self)
+
+    def prepare(self, record):
+        # treść i wyjątek jako tekst już tutaj (argumenty mogą się zmienić po powrocie),
+        # ale bez doklejania wyjątku do komunikatu – JsonFormatter zapisze go osobno
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        if not self._started:
+            self._start()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self):
+        with self._start_lock:
+            if not self._started and self.listener is not None:
+                self.listener.start()
+                atexit.register(self.stop)
+            self._started = True
+
+    def _after_fork(self):
+        # wątek listenera nie przechodzi do potomka: nowa kolejka (rekordy rodzica zapisze rodzic)
+        # i start przy pierwszym rekordzie potomka
+        self._start_lock = threading.Lock()
+        self._started = False
+        self.queue = queue.Queue(maxsize=self.queue.maxsize)
+        if self.listener is not None:
+            self.listener.queue = self.queue
+            self.listener._thread = None
+
+    def stop(self):
+        """Zatrzymuje listener (zapisuje rekordy z kolejki) i zamyka pliki docelowe."""
+        with self._start_lock:
+            if self._started and self.listener is not None and self.listener._thread is not None:
+                self.listener.stop()
+        if self.listener is not None:
+            for target in self.listener.handlers:
+                target.close()
+
+
+def queue_handler(filename, max_bytes=10 * 1024 * 1024, backup_count=5, flush_records=256, flush_interval=1.0,
+                  queue_size=10000):
+    """
+    Fabryka dla dictConfig: DroppingQueueHandler + QueueListener z
+    BatchingRotatingFileHandler i JsonFormatter. Listener startuje przy pierwszym
+    rekordzie i jest zatrzymywany przy wyjściu.
+    """
+    file_handler = BatchingRotatingFileHandler(filename, max_bytes=max_bytes, backup_count=backup_count,
+                                               flush_records=flush_records, flush_interval=flush_interval)
+    file_handler.setFormatter(JsonFormatter())
+
+    q = queue.Queue(maxsize=queue_size)
+    return DroppingQueueHandler(q, QueueListener(q, file_handler, respect_handler_level=True))
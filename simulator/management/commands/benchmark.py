@@ -0,0 +1,488 @@
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.conf import settings
+from django.test import AsyncClient, Client, override_settings
+
+from simulator import log_pipeline
+from simulator.utils import jobs
+from simulator.models import ContractType, RetirementCalculation, UserProfile, WorkPeriod
+from simulator.utils.pension_calculator import (
+    PARAMS_ARTIFACT_PATH,
+    PARAMS_XLSX_PATH,
+    PensionCalculator,
+    PeriodInput,
+    get_param_set,
+    load_params_from_excel,
+)
+from simulator.utils import params_artifact, vectorized
+from simulator.views import INTENTS, _match_intent, build_periods
+
+CONTRACTS = ['EMPLOYMENT', 'B2B', 'BUSINESS', 'MANDATE', 'TASK']
+
+# typowe wiadomości do doradcy – także takie, które nie pasują do żadnej intencji
+CHAT_CORPUS = [
+    'Cześć!', 'Dzień dobry, mam pytanie', 'siema', 'Jak możesz mi pomóc?', 'Co potrafisz?', 'pomóż mi proszę',
+    'Chcę więcej na emeryturze', 'Jak mieć wyższą emeryturę?', 'Chciałbym zwiększyć emeryturę o 1000 zł',
+    'chcę wyższej emerytury niż mama', 'Jak oszczędzać na starość?', 'Czy IKE ma sens?',
+    'czy warto wpłacać do PPK', 'Dodatkowe sposoby oszczędzania poza ZUS', 'oszczędzanie co miesiąc 200 zł',
+    'Czy warto coś zmienić w moim planie?', 'Chcę zmienić plan pracy', 'co zmienić, żeby było lepiej',
+    'Ile wynosi minimalna emerytura?', 'Kiedy mogę przejść na emeryturę?', 'Pracuję na umowie zlecenie od 2015',
+    'Mam 35 lat i zarabiam 7000 brutto, co dalej?', 'A jak liczona jest waloryzacja składek w ZUS?',
+    'Prowadzę działalność gospodarczą i płacę mały ZUS', 'dzięki', 'ok',
+]
+
+
+def _percentile(sorted_values, q):
+    """Percentyl z interpolacją liniową (q w zakresie 0–100)."""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * q / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def _periods(count, first_year, horizon, rng):
+    """'count' okresów rozłożonych równo na 'horizon' lat od 'first_year'."""
+    periods = []
+    span = max(1, horizon // count)
+    for i in range(count):
+        start = first_year + (i * horizon) // count
+        periods.append(PeriodInput(
+            start_year=start,
+            end_year=min(first_year + horizon - 1, start + span - 1),
+            salary_gross_monthly=Decimal(rng.randint(4000, 20000)),
+            contract_name=CONTRACTS[i % len(CONTRACTS)],
+        ))
+    return periods
+
+
+class Command(BaseCommand):
+    help = 'Benchmarki silnika emerytalnego i widoków Django – wynik w JSON (percentyle w ms)'
+
+    GROUPS = ['calc', 'params', 'batch', 'web', 'intents', 'sessions', 'logging', 'asgi', 'jobs', 'db']
+    DEFAULT_GROUPS = ['calc', 'params', 'batch', 'web', 'intents', 'sessions', 'logging', 'asgi']
+
+    # porównanie: dawna konfiguracja sesji vs bieżące ustawienia
+    SESSION_MODES = {
+        'db+save_every_request': {'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+                                  'SESSION_SAVE_EVERY_REQUEST': True},
+        'settings': {},
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=50, help='Liczba pomiarów na przypadek')
+        parser.add_argument('--warmup', type=int, default=3, help='Przebiegi rozgrzewające (nie liczone)')
+        parser.add_argument('--only', nargs='*', choices=self.GROUPS, help='Uruchom tylko wybrane grupy')
+        parser.add_argument('--output', help='Zapisz JSON do pliku zamiast na stdout')
+        parser.add_argument('--seed', type=int, default=2025)
+        parser.add_argument('--db-periods', type=int, default=100000,
+                            help='Liczba okresów pracy wstawianych w grupie db (np. 1000000)')
+
+    def handle(self, *args, **options):
+        self.repeat = options['repeat']
+        self.warmup = options['warmup']
+        self.rng = random.Random(options['seed'])
+        self.db_periods = options['db_periods']
+        if self.repeat < 1:
+            raise CommandError('--repeat musi być >= 1')
+
+        self.results = []
+        for group in options['only'] or self.DEFAULT_GROUPS:
+            getattr(self, f'bench_{group}')()
+
+        report = {
+            'meta': {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'params_version': get_param_set().version,
+                'repeat': self.repeat,
+                'seed': options['seed'],
+            },
+            'results': self.results,
+        }
+        out = json.dumps(report, indent=2, ensure_ascii=False)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                f.write(out)
+            self.stdout.write(self.style.SUCCESS(f'Zapisano {len(self.results)} wyników do {options["output"]}'))
+        else:
+            self.stdout.write(out)
+
+    # --- pomiar ---
+
+    def measure(self, group, name, fn, repeat=None, warmup=None, **extra):
+        repeat = repeat or self.repeat
+        for _ in range(self.warmup if warmup is None else warmup):
+            fn()
+        samples = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            samples.append((time.perf_counter() - t0) * 1000.0)
+        return self.record(group, name, samples, **extra)
+
+    def record(self, group, name, samples, **extra):
+        """Dopisuje wiersz wyniku z gotowych próbek (ms)."""
+        samples = sorted(samples)
+        row = {
+            'group': group,
+            'name': name,
+            'n': len(samples),
+            'mean_ms': round(sum(samples) / len(samples), 4),
+            'min_ms': round(samples[0], 4),
+            'p50_ms': round(_percentile(samples, 50), 4),
+            'p90_ms': round(_percentile(samples, 90), 4),
+            'p99_ms': round(_percentile(samples, 99), 4),
+            'max_ms': round(samples[-1], 4),
+            **extra,
+        }
+        self.results.append(row)
+        self.stderr.write(f'{group}/{name}: p50={row["p50_ms"]} ms p99={row["p99_ms"]} ms')
+        return row
+
+    # --- grupy ---
+
+    def bench_calc(self):
+        calc = PensionCalculator()
+        engines = ['decimal'] + (['numpy'] if vectorized.available() else [])
+        for horizon in (10, 30, 60):
+            for count in (1, 10, 100):
+                periods = _periods(count, 2000, horizon, self.rng)
+                for engine in engines:
+                    self.measure(
+                        'calc', f'calculate[{engine}] periods={count} horizon={horizon}',
+                        lambda: calc.calculate('M', 2000 + horizon, 1975, periods, engine=engine),
+                        periods=count, horizon=horizon, engine=engine,
+                    )
+
+    def bench_params(self):
+        # zimny start: parsowanie arkusza od zera; ciepły: odczyt z rejestru procesu
+        if load_params_from_excel(PARAMS_XLSX_PATH):
+            self.measure('params', 'load_params_from_excel cold',
+                         lambda: load_params_from_excel(PARAMS_XLSX_PATH),
+                         repeat=min(self.repeat, 10), warmup=0)
+        else:
+            self.stderr.write('params: brak arkusza lub pandas – pomijam zimne wczytanie')
+        if os.path.exists(PARAMS_ARTIFACT_PATH):
+            self.measure('params', 'read_artifact cold', lambda: params_artifact.read_artifact(PARAMS_ARTIFACT_PATH))
+        else:
+            self.stderr.write('params: brak artefaktu (manage.py compile_params) – pomijam jego odczyt')
+        self.measure('params', 'get_param_set reload', lambda: get_param_set(reload=True),
+                     source=os.path.basename(get_param_set(reload=True).source))
+        self.measure('params', 'get_param_set warm', get_param_set)
+        self.measure('params', 'PensionCalculator() warm', PensionCalculator)
+
+    def bench_batch(self):
+        if not vectorized.available():
+            self.stderr.write('batch: brak numpy – pomijam')
+            return
+        calc = PensionCalculator()
+        for size in (1000, 10000):
+            profiles = []
+            for _ in range(size):
+                birth = self.rng.randint(1960, 2000)
+                first = birth + self.rng.randint(18, 30)
+                profiles.append(('M' if self.rng.random() < 0.5 else 'K', birth, birth + 65,
+                                 _periods(self.rng.randint(1, 6), first, 65 - (first - birth), self.rng)))
+            batch = vectorized.ProfileBatch.from_profiles(profiles)
+            row = self.measure('batch', f'calculate_batch profiles={size}', lambda: calc.calculate_batch(batch),
+                               repeat=min(self.repeat, 10), warmup=1, profiles=size)
+            row['profiles_per_second'] = round(size / (row['p50_ms'] / 1000.0), 1)
+
+    def bench_web(self):
+        client = Client()
+        chat = json.dumps({'message': 'Chcę więcej na emeryturze'})
+        profile = json.dumps({'age': 35, 'gender': 'K', 'retirement_year': 2055})
+        # wszystko w transakcji wycofywanej na końcu – benchmark nie zostawia śladów w bazie
+        with transaction.atomic():
+            self.measure('web', 'GET dashboard', lambda: client.get('/dashboard/'))
+            self.measure('web', 'POST advisor_chat_api',
+                         lambda: client.post('/api/doradca/', chat, content_type='application/json'))
+            self.measure('web', 'POST update_profile',
+                         lambda: client.post('/update-profile/', profile, content_type='application/json'))
+            transaction.set_rollback(True)
+
+    def bench_intents(self):
+        """Rozpoznawanie intencji na korpusie wiadomości: pętla re.search vs jedno skompilowane wyrażenie."""
+        def match_loop(text):
+            t = text.lower()
+            for key, spec in INTENTS.items():
+                for pat in spec.get('patterns', []):
+                    if re.search(pat, t):
+                        return key
+            return None
+
+        n = len(CHAT_CORPUS)
+        for name, matcher in (('re.search loop', match_loop), ('compiled _match_intent', _match_intent)):
+            row = self.measure('intents', f'{name} corpus={n}', lambda: [matcher(m) for m in CHAT_CORPUS],
+                               messages=n)
+            row['messages_per_second'] = round(n / (row['p50_ms'] / 1000.0), 1)
+
+        client = Client()
+        bodies = [json.dumps({'message': m}) for m in CHAT_CORPUS]
+
+        def post_corpus():
+            for body in bodies:
+                client.post('/api/doradca/', body, content_type='application/json')
+
+        row = self.measure('intents', f'POST advisor_chat_api corpus={n}', post_corpus,
+                           repeat=min(self.repeat, 20), messages=n)
+        row['requests_per_second'] = round(n / (row['p50_ms'] / 1000.0), 1)
+
+    def bench_logging(self):
+        """Koszt logger.info na wątku żądania: synchroniczny FileHandler vs kolejka (log_pipeline)."""
+        calls = 1000
+        with tempfile.TemporaryDirectory() as tmp:
+            handlers = {
+                'FileHandler': lambda: logging.FileHandler(os.path.join(tmp, 'plain.log'), encoding='utf-8'),
+                'QueueHandler+JSON': lambda: log_pipeline.queue_handler(os.path.join(tmp, 'queue.log')),
+            }
+            for name, make in handlers.items():
+                handler = make()
+                logger = logging.getLogger(f'simulator.benchmark.{name}')
+                logger.propagate = False
+                logger.setLevel(logging.INFO)
+                logger.addHandler(handler)
+                for threads in (1, 4):
+                    samples = []
+                    lock = threading.Lock()
+
+                    def worker():
+                        local = []
+                        for i in range(calls):
+                            t0 = time.perf_counter()
+                            logger.info('GET /dashboard/ profil=%s czas=%.3f ms', i, 1.5)
+                            local.append((time.perf_counter() - t0) * 1000.0)
+                        with lock:
+                            samples.extend(local)
+
+                    pool = [threading.Thread(target=worker) for _ in range(threads)]
+                    t0 = time.perf_counter()
+                    for t in pool:
+                        t.start()
+                    for t in pool:
+                        t.join()
+                    elapsed = time.perf_counter() - t0
+                    self.record('logging', f'logger.info [{name}] threads={threads}', samples, handler=name,
+                                threads=threads, calls_per_second=round(len(samples) / elapsed, 1),
+                                dropped=getattr(handler, 'dropped', 0))
+                logger.removeHandler(handler)
+                if hasattr(handler, 'listener'):
+                    handler.stop()
+                handler.close()
+
+    def bench_sessions(self):
+        """
+        Równoległe wejścia na strony bez zmian w sesji (klient z istniejącą sesją);
+        liczymy zapisy do django_session na żądanie i przepustowość.
+        """
+        profile = json.dumps({'age': 35, 'gender': 'K', 'retirement_year': 2055})
+        pages = ['/', '/home/']
+        for mode, overrides in self.SESSION_MODES.items():
+            with override_settings(**overrides):
+                for threads in (1, 4):
+                    samples, keys = [], []
+                    counters = {'writes': 0, 'errors': 0}
+                    lock = threading.Lock()
+
+                    def count_writes(execute, sql, params, many, context):
+                        if 'django_session' in sql and sql.lstrip().upper().startswith(('INSERT', 'UPDATE')):
+                            with lock:
+                                counters['writes'] += 1
+                        return execute(sql, params, many, context)
+
+                    def worker():
+                        client = Client()
+                        client.post('/update-profile/', profile, content_type='application/json')
+                        local = []
+                        with connection.execute_wrapper(count_writes):
+                            for i in range(self.repeat):
+                                t0 = time.perf_counter()
+                                try:
+                                    client.get(pages[i % len(pages)])
+                                except Exception:
+                                    with lock:
+                                        counters['errors'] += 1
+                                local.append((time.perf_counter() - t0) * 1000.0)
+                        with lock:
+                            samples.extend(local)
+                            keys.append(client.session.session_key)
+                        connection.close()
+
+                    t0 = time.perf_counter()
+                    pool = [threading.Thread(target=worker) for _ in range(threads)]
+                    for t in pool:
+                        t.start()
+                    for t in pool:
+                        t.join()
+                    elapsed = time.perf_counter() - t0
+                    Session.objects.filter(session_key__in=keys).delete()
+
+                    self.record('sessions', f'GET pages [{mode}] threads={threads}', samples,
+                                mode=mode, threads=threads,
+                                requests_per_second=round(len(samples) / elapsed, 1),
+                                session_writes_per_request=round(counters['writes'] / len(samples), 3),
+                                errors=counters['errors'])
+
+    def bench_asgi(self):
+        """
+        Endpointy JSON przy równoległych klientach: WSGI (Client, wątek na klienta) vs ASGI
+        (AsyncClient, wszyscy klienci w jednej pętli zdarzeń, obliczenia w calc_executor).
+        """
+        activities = [
+            {'type': 'work', 'startAge': 25, 'endAge': 40, 'contractType': 'Umowa o pracę', 'salary': 8000},
+            {'type': 'work', 'startAge': 41, 'endAge': 64, 'contractType': 'Umowa zlecenie', 'salary': 9000},
+        ]
+        endpoints = {
+            'POST advisor_chat_api': ('/api/doradca/', {'message': 'Chcę więcej na emeryturze'}),
+            'POST update_profile': ('/update-profile/', {'age': 35, 'gender': 'K', 'retirement_year': 2055}),
+            'POST recalculate_api': ('/api/emerytura/przelicz/', {'activities': activities, 'retirement_age': 65}),
+        }
+        for name, (url, body) in endpoints.items():
+            body = json.dumps(body)
+            for clients in (1, 16):
+                samples, keys = [], []
+                counters = {'errors': 0}
+                lock = threading.Lock()
+
+                def collect(client, local, errors):
+                    with lock:
+                        samples.extend(local)
+                        counters['errors'] += errors
+                        cookie = client.cookies.get(settings.SESSION_COOKIE_NAME)
+                        if cookie:
+                            keys.append(cookie.value)
+
+                def worker():
+                    client, local, errors = Client(), [], 0
+                    for _ in range(self.repeat):
+                        t0 = time.perf_counter()
+                        if client.post(url, body, content_type='application/json').status_code != 200:
+                            errors += 1
+                        local.append((time.perf_counter() - t0) * 1000.0)
+                    collect(client, local, errors)
+                    connection.close()
+
+                pool = [threading.Thread(target=worker) for _ in range(clients)]
+                t0 = time.perf_counter()
+                for t in pool:
+                    t.start()
+                for t in pool:
+                    t.join()
+                self.record('asgi', f'{name} [wsgi] clients={clients}', samples, server='wsgi', clients=clients,
+                            requests_per_second=round(len(samples) / (time.perf_counter() - t0), 1),
+                            errors=counters['errors'])
+
+                samples.clear()
+                counters['errors'] = 0
+
+                async def async_worker():
+                    client, local, errors = AsyncClient(), [], 0
+                    for _ in range(self.repeat):
+                        t0 = time.perf_counter()
+                        if (await client.post(url, body, content_type='application/json')).status_code != 200:
+                            errors += 1
+                        local.append((time.perf_counter() - t0) * 1000.0)
+                    collect(client, local, errors)
+
+                async def run_clients():
+                    await asyncio.gather(*(async_worker() for _ in range(clients)))
+
+                t0 = time.perf_counter()
+                asyncio.run(run_clients())
+                self.record('asgi', f'{name} [asgi] clients={clients}', samples, server='asgi', clients=clients,
+                            requests_per_second=round(len(samples) / (time.perf_counter() - t0), 1),
+                            errors=counters['errors'])
+                Session.objects.filter(session_key__in=keys).delete()
+
+    def bench_jobs(self):
+        """
+        Zadania Monte Carlo w tle (utils.jobs): czas przyjęcia zlecenia na wątku żądania
+        i czas do wyniku dla paczki zadań vs liczenie tych samych zadań po kolei w procesie.
+        """
+        calc = PensionCalculator()
+        periods = _periods(8, 2000, 40, self.rng)
+        spec = {'gender': 'M', 'retirement_year': 2055, 'birth_year': 1990, 'n_paths': 5000, 'seed': 1,
+                'periods': [(p.start_year, p.end_year, str(p.salary_gross_monthly), p.contract_name)
+                            for p in periods]}
+        batch = 8
+
+        t0 = time.perf_counter()
+        service = jobs.JobService(max_pending=batch)
+        service.warm()
+        self.record('jobs', 'start + warm pool', [(time.perf_counter() - t0) * 1000.0], workers=service.workers)
+        try:
+            inline = []
+            for i in range(batch):
+                t0 = time.perf_counter()
+                calc.monte_carlo('M', 2055, 1990, periods, n_paths=spec['n_paths'], seed=i)
+                inline.append((time.perf_counter() - t0) * 1000.0)
+            self.record('jobs', f'monte_carlo inline x{batch}', inline, total_ms=round(sum(inline), 3))
+
+            submits, submitted = [], []
+            t_batch = time.perf_counter()
+            for i in range(batch):
+                t0 = time.perf_counter()
+                submitted.append(service.submit('monte_carlo', {**spec, 'seed': i}))
+                submits.append((time.perf_counter() - t0) * 1000.0)
+            rejected = 0
+            try:
+                service.submit('monte_carlo', spec)
+            except jobs.JobQueueFull:
+                rejected = 1
+            for job in submitted:
+                job.future.result()
+            total = (time.perf_counter() - t_batch) * 1000.0
+            self.record('jobs', f'submit monte_carlo x{batch}', submits, total_ms=round(total, 3),
+                        workers=service.workers, rejected_over_limit=rejected)
+        finally:
+            service.shutdown()
+
+    def bench_db(self):
+        """Zapytania o okresy i najnowsze obliczenie na zasilonej tabeli (transakcja wycofywana)."""
+        per_profile = 10
+        profiles_count = max(1, self.db_periods // per_profile)
+        with transaction.atomic():
+            contract, _ = ContractType.objects.get_or_create(
+                name='EMPLOYMENT', defaults={'display_name': 'Umowa o pracę', 'zus_percentage': 19.52})
+            users = User.objects.bulk_create(
+                [User(username=f'bench-{i}') for i in range(profiles_count)], batch_size=5000)
+            profiles = UserProfile.objects.bulk_create(
+                [UserProfile(user=u, age=40, gender='M', salary_gross=6000, work_start_year=2005,
+                             planned_retirement_year=2050) for u in users], batch_size=5000)
+            WorkPeriod.objects.bulk_create(
+                (WorkPeriod(user_profile=p, contract_type=contract, start_year=2005 + 2 * k,
+                            end_year=2006 + 2 * k, salary_gross_monthly=6000)
+                 for p in profiles for k in range(per_profile)),
+                batch_size=5000)
+            RetirementCalculation.objects.bulk_create(
+                (RetirementCalculation(user_profile=p, calculated_pension=3000, total_contributions=600000,
+                                       life_expectancy_months=170) for p in profiles for _ in range(3)),
+                batch_size=5000)
+
+            sample = [self.rng.choice(profiles) for _ in range(self.repeat)]
+            it = iter(sample * 2)
+            self.measure('db', f'build_periods periods={self.db_periods}', lambda: build_periods(next(it)),
+                         warmup=0, periods=self.db_periods)
+            it = iter(sample * 2)
+            self.measure('db', f'latest RetirementCalculation periods={self.db_periods}',
+                         lambda: RetirementCalculation.objects.filter(user_profile=next(it)).first(),
+                         warmup=0, periods=self.db_periods)
+            transaction.set_rollback(True)
@@ -0,0 +1,54 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from simulator.utils import params_artifact
+from simulator.utils.pension_calculator import (
+    PARAMS_EMBEDDED,
+    PARAMS_XLSX_PATH,
+    load_params_from_excel,
+    params_version,
+)
+
+
+class Command(BaseCommand):
+    help = ('Kompiluje arkusz parametrów rocznych do binarnego artefaktu (obok arkusza, rozszerzenie .params) – '
+            'get_param_set wczytuje go bez pandas; uruchamiać przy budowaniu/wdrożeniu i po każdej zmianie arkusza')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--source', default=PARAMS_XLSX_PATH, help='Arkusz parametrów (xlsx)')
+        parser.add_argument('--output', help='Plik artefaktu (domyślnie obok arkusza, rozszerzenie .params)')
+        parser.add_argument('--embedded', action='store_true',
+                            help='Skompiluj wbudowane PARAMS_EMBEDDED zamiast arkusza (np. gdy arkusza nie ma)')
+
+    def handle(self, *args, **options):
+        source = os.path.abspath(options['source'])
+        output = options['output'] or params_artifact.artifact_path(source)
+
+        t0 = time.perf_counter()
+        if options['embedded']:
+            params, digest = dict(PARAMS_EMBEDDED), None
+        else:
+            if not os.path.exists(source):
+                raise CommandError(f'Brak arkusza {source} (użyj --embedded, by skompilować wbudowane parametry)')
+            params = load_params_from_excel(source)
+            if not params:
+                raise CommandError(f'Nie wczytano żadnego roku z {source} (brak pandas/openpyxl albo zmieniony arkusz)')
+            digest = params_artifact.file_digest(source)
+        parse_ms = (time.perf_counter() - t0) * 1000.0
+
+        version = params_version(params)
+        size = params_artifact.write_artifact(output, params, version, digest)
+
+        # kontrola: odczyt artefaktu daje dokładnie te same liczby i wersję
+        t0 = time.perf_counter()
+        loaded, loaded_version, _ = params_artifact.read_artifact(output)
+        read_us = (time.perf_counter() - t0) * 1e6
+        if loaded != params or loaded_version != version:
+            raise CommandError(f'Artefakt {output} nie odtwarza parametrów źródłowych')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Zapisano {output}: {len(params)} lat ({min(params)}–{max(params)}), wersja {version}, {size} B; '
+            f'źródło {parse_ms:.1f} ms, odczyt artefaktu {read_us:.0f} µs'
+        ))
@@ -0,0 +1,68 @@
+import os
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from simulator.models import UserProfile, WorkPeriod
+from simulator.utils.scenario_io import (
+    FORMATS,
+    PERIOD_COLUMNS,
+    PERIODS_FILE,
+    PROFILE_COLUMNS,
+    PROFILES_FILE,
+    ScenarioFormatError,
+    scenario_path,
+    write_rows,
+)
+
+
+def _chunks(rows, columns, size):
+    """Krotki z values_list(...).iterator() -> porcje słowników po 'size'."""
+    rows = iter(rows)
+    while True:
+        chunk = [dict(zip(columns, row)) for row in islice(rows, size)]
+        if not chunk:
+            return
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = 'Eksportuje profile i okresy pracy do katalogu (CSV lub Parquet) – strumieniowo, porcjami'
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Katalog docelowy (zostanie utworzony)')
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--chunk-size', type=int, default=5000,
+                            help='Wielkość porcji odczytu z bazy i zapisu do pliku')
+
+    def handle(self, *args, **options):
+        directory, fmt, size = options['directory'], options['format'], options['chunk_size']
+        if size < 1:
+            raise CommandError('--chunk-size musi być >= 1')
+        os.makedirs(directory, exist_ok=True)
+
+        profiles = (UserProfile.objects.order_by('id')
+                    .values_list('user__username', 'age', 'gender', 'salary_gross',
+                                 'work_start_year', 'planned_retirement_year')
+                    .iterator(chunk_size=size))
+        # kolejność zgodna z indeksem (user_profile, start_year)
+        periods = (WorkPeriod.objects.order_by('user_profile_id', 'start_year')
+                   .values_list('user_profile__user__username', 'contract_type__name', 'start_year',
+                                'end_year', 'salary_gross_monthly')
+                   .iterator(chunk_size=size))
+
+        t0 = time.perf_counter()
+        try:
+            n_profiles = write_rows(scenario_path(directory, PROFILES_FILE, fmt), fmt, PROFILE_COLUMNS,
+                                    _chunks(profiles, PROFILE_COLUMNS, size))
+            n_periods = write_rows(scenario_path(directory, PERIODS_FILE, fmt), fmt, PERIOD_COLUMNS,
+                                   _chunks(periods, PERIOD_COLUMNS, size))
+        except ScenarioFormatError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - t0
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Wyeksportowano {n_profiles} profili i {n_periods} okresów pracy do {directory} '
+            f'({fmt}, {elapsed:.1f} s)'
+        ))
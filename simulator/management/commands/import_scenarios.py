@@ -0,0 +1,134 @@
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from simulator.models import ContractType, UserProfile, WorkPeriod
+from simulator.utils.scenario_io import (
+    FORMATS,
+    PERIOD_COLUMNS,
+    PERIODS_FILE,
+    PROFILE_COLUMNS,
+    PROFILES_FILE,
+    ScenarioFormatError,
+    read_rows,
+    scenario_path,
+)
+
+
+class Command(BaseCommand):
+    help = ('Importuje profile i okresy pracy z katalogu (CSV lub Parquet) przez bulk_create w porcjach. '
+            'Oba pliki są sprawdzane przed zapisem czegokolwiek. Istniejący użytkownicy są pomijani; okresy '
+            'trafiają do profili (po username), które przed importem okresów nie miały żadnego okresu – '
+            'także tych z przerwanego wcześniejszego importu.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('directory', help='Katalog z plikami profiles.* i work_periods.*')
+        parser.add_argument('--format', choices=FORMATS, default='csv')
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='Liczba wierszy czytanych i zapisywanych w jednej transakcji')
+
+    def handle(self, *args, **options):
+        directory, fmt, size = options['directory'], options['format'], options['batch_size']
+        if size < 1:
+            raise CommandError('--batch-size musi być >= 1')
+
+        contracts = dict(ContractType.objects.values_list('name', 'id'))
+        if not contracts:
+            raise CommandError('Brak typów umów – uruchom najpierw: python manage.py setup_contract_types')
+
+        profiles_path = scenario_path(directory, PROFILES_FILE, fmt)
+        periods_path = scenario_path(directory, PERIODS_FILE, fmt)
+        t0 = time.perf_counter()
+        try:
+            # błąd w którymkolwiek pliku przerywa import, zanim cokolwiek trafi do bazy
+            self.validate(profiles_path, periods_path, fmt, size, contracts)
+            created, skipped = self.import_profiles(profiles_path, fmt, size)
+            periods, orphaned = self.import_periods(periods_path, fmt, size, contracts, timezone.now())
+        except ScenarioFormatError as e:
+            raise CommandError(str(e))
+        elapsed = time.perf_counter() - t0
+
+        if skipped:
+            self.stdout.write(self.style.WARNING(f'Pominięto {skipped} profili istniejących użytkowników'))
+        if orphaned:
+            self.stdout.write(self.style.WARNING(
+                f'Pominięto {orphaned} okresów (profil nieistniejący lub z okresami sprzed importu)'))
+        rate = (created + periods) / elapsed if elapsed > 0 else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f'Zaimportowano {created} profili i {periods} okresów pracy w {elapsed:.1f} s ({rate:.0f} wierszy/s)'
+        ))
+
+    def validate(self, profiles_path, periods_path, fmt, size, contracts):
+        """Pełny przebieg po obu plikach bez zapisu – typy, płeć, unikalne username, umowy i lata okresów."""
+        usernames = set()
+        try:
+            for chunk in read_rows(profiles_path, fmt, PROFILE_COLUMNS, size):
+                for row in chunk:
+                    if row['gender'] not in ('M', 'K'):
+                        raise CommandError(f'Nieprawidłowa płeć {row["gender"]!r} dla {row["username"]}')
+                    # duplikat w pliku wywróciłby bulk_create (IntegrityError) po zapisaniu wcześniejszych porcji
+                    if row['username'] in usernames:
+                        raise CommandError(f'Powtórzony username {row["username"]!r} w {profiles_path}')
+                    usernames.add(row['username'])
+            for chunk in read_rows(periods_path, fmt, PERIOD_COLUMNS, size):
+                for row in chunk:
+                    if row['contract_type'] not in contracts:
+                        raise CommandError(f'Nieznany typ umowy {row["contract_type"]!r} dla {row["username"]}')
+                    if row['start_year'] > row['end_year']:
+                        raise CommandError(f'Okres {row["start_year"]}-{row["end_year"]} dla {row["username"]}: '
+                                           f'rok rozpoczęcia po roku zakończenia')
+        except (ValueError, ArithmeticError) as e:
+            # int()/Decimal() z niepoprawnego napisu w CSV
+            raise CommandError(f'Niepoprawna wartość liczbowa: {e}')
+
+    def import_profiles(self, path, fmt, size):
+        created = skipped = 0
+        # jedno hasło nieużywalne dla całego importu – make_password dla każdego wiersza kosztuje
+        password = make_password(None)
+        for chunk in read_rows(path, fmt, PROFILE_COLUMNS, size):
+            with transaction.atomic():
+                usernames = [row['username'] for row in chunk]
+                existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+                rows = [row for row in chunk if row['username'] not in existing]
+                skipped += len(chunk) - len(rows)
+                if not rows:
+                    continue
+                User.objects.bulk_create([User(username=row['username'], password=password) for row in rows])
+                # id nowych użytkowników pobieramy zapytaniem – nie każda baza zwraca je z bulk_create
+                user_ids = dict(User.objects.filter(username__in=[row['username'] for row in rows])
+                                .values_list('username', 'id'))
+                UserProfile.objects.bulk_create([
+                    UserProfile(user_id=user_ids[row['username']],
+                                **{col: row[col] for col in PROFILE_COLUMNS if col != 'username'})
+                    for row in rows
+                ])
+                created += len(rows)
+        return created, skipped
+
+    def import_periods(self, path, fmt, size, contracts, started):
+        imported = orphaned = 0
+        for chunk in read_rows(path, fmt, PERIOD_COLUMNS, size):
+            with transaction.atomic():
+                # profile po username, niezależnie od tego, który import je utworzył – pomijamy tylko te,
+                # które miały okresy przed tym importem (okresy z wcześniejszych porcji tego importu się nie liczą)
+                profile_ids = dict(
+                    UserProfile.objects
+                    .filter(user__username__in={row['username'] for row in chunk})
+                    .exclude(work_periods__created_at__lt=started)
+                    .values_list('user__username', 'id')
+                )
+                periods = [
+                    WorkPeriod(user_profile_id=profile_ids[row['username']],
+                               contract_type_id=contracts[row['contract_type']],
+                               start_year=row['start_year'], end_year=row['end_year'],
+                               salary_gross_monthly=row['salary_gross_monthly'])
+                    for row in chunk if row['username'] in profile_ids
+                ]
+                WorkPeriod.objects.bulk_create(periods)
+                imported += len(periods)
+                orphaned += len(chunk) - len(periods)
+        return imported, orphaned
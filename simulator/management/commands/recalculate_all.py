@@ -0,0 +1,176 @@
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+from itertools import groupby
+from multiprocessing import get_context
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from simulator.models import RetirementCalculation, UserProfile, WorkPeriod
+from simulator.utils.jobs import calculate_shard, init_worker
+from simulator.utils.pension_calculator import ENGINES, get_param_set
+
+DEFAULT_CHECKPOINT = 'recalculate_all.checkpoint.json'
+
+
+class Command(BaseCommand):
+    help = ('Przelicza emerytury wszystkich profili (np. po zmianie arkusza parametrów) w puli procesów; '
+            'zapis przez bulk_create, postęp w pliku punktu kontrolnego – przerwane przeliczenie można wznowić; '
+            'profile bez okresów pracy są pomijane')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Liczba procesów roboczych (1 = bez puli, w bieżącym procesie)')
+        parser.add_argument('--shard-size', type=int, default=500, help='Liczba profili w jednej porcji')
+        parser.add_argument('--engine', choices=ENGINES, default='decimal')
+        parser.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT,
+                            help='Plik punktu kontrolnego (ostatni zapisany profil + wersja parametrów)')
+        parser.add_argument('--restart', action='store_true', help='Ignoruj punkt kontrolny i licz od początku')
+        parser.add_argument('--replace', action='store_true',
+                            help='Usuń dotychczasowe obliczenia przeliczanych profili zamiast dopisywać historię')
+
+    def handle(self, *args, **options):
+        workers, shard_size, engine = options['workers'], options['shard_size'], options['engine']
+        if workers < 1 or shard_size < 1:
+            raise CommandError('--workers i --shard-size muszą być >= 1')
+        self.engine = engine
+        self.replace = options['replace']
+        self.checkpoint_path = options['checkpoint']
+
+        version = get_param_set(reload=True).version
+        state = {'params_version': version, 'last_profile_id': 0, 'processed': 0, 'failed': 0, 'skipped': 0,
+                 'started_at': timezone.now().isoformat()}
+        saved = None if options['restart'] else self.load_checkpoint()
+        if saved and saved.get('params_version') == version:
+            state.update(saved)
+            self.stdout.write(f'Wznawiam od profilu id > {state["last_profile_id"]} '
+                              f'({state["processed"]} już przeliczonych)')
+        elif saved:
+            self.stdout.write(self.style.WARNING('Punkt kontrolny dotyczy innej wersji parametrów – liczę od początku'))
+        self.started_at = datetime.fromisoformat(state['started_at'])
+
+        remaining = UserProfile.objects.filter(id__gt=state['last_profile_id']).count()
+        self.stdout.write(f'Parametry {version}, profili do przeliczenia: {remaining}, '
+                          f'procesy: {workers}, porcja: {shard_size}, silnik: {engine}')
+
+        t0 = time.perf_counter()
+        done = 0
+        shards = self.iter_shards(state['last_profile_id'], shard_size)
+        for last_id, results in self.run(shards, workers):
+            failed, skipped = self.write(results)
+            done += len(results)
+            state['last_profile_id'] = last_id
+            state['processed'] += len(results) - failed - skipped
+            state['failed'] += failed
+            state['skipped'] += skipped
+            self.save_checkpoint(state)
+
+            elapsed = time.perf_counter() - t0
+            rate = done / elapsed if elapsed > 0 else 0.0
+            eta = (remaining - done) / rate if rate > 0 else 0.0
+            self.stdout.write(f'{done}/{remaining} profili, {rate:.0f} profili/s, pozostało ~{eta:.0f} s')
+
+        elapsed = time.perf_counter() - t0
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        self.stdout.write(self.style.SUCCESS(
+            f'Przeliczono {state["processed"]} profili (błędy: {state["failed"]}, bez okresów pracy: '
+            f'{state["skipped"]}) w {elapsed:.1f} s '
+            f'({done / elapsed if elapsed > 0 else 0.0:.0f} profili/s)'
+        ))
+
+    # --- odczyt ---
+
+    def iter_shards(self, after_id, shard_size):
+        """Porcje [(profile_id, płeć, rok emerytury, rok urodzenia, okresy), ...] – dwa zapytania na porcję."""
+        current_year = date.today().year
+        while True:
+            profiles = list(
+                UserProfile.objects.filter(id__gt=after_id).order_by('id')
+                .values_list('id', 'gender', 'planned_retirement_year', 'age')[:shard_size]
+            )
+            if not profiles:
+                return
+            ids = [p[0] for p in profiles]
+            periods = (
+                WorkPeriod.objects.filter(user_profile_id__in=ids).order_by('user_profile_id', 'start_year')
+                .values_list('user_profile_id', 'start_year', 'end_year', 'salary_gross_monthly',
+                             'contract_type__name')
+            )
+            by_profile = {pid: [(s, e, str(sal), c) for _, s, e, sal, c in rows]
+                          for pid, rows in groupby(periods, key=lambda row: row[0])}
+            yield [(pid, gender, retirement_year, current_year - age, by_profile.get(pid, []))
+                   for pid, gender, retirement_year, age in profiles]
+            after_id = ids[-1]
+
+    def run(self, shards, workers):
+        """(id ostatniego profilu porcji, wyniki) w kolejności porcji – punkt kontrolny rośnie bez dziur."""
+        if workers == 1:
+            init_worker()
+            for rows in shards:
+                yield rows[-1][0], self.checked(calculate_shard((rows, self.engine)))
+            return
+
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"),
+                                 initializer=init_worker) as pool:
+            pending = deque()
+            for rows in shards:
+                pending.append((rows[-1][0], pool.submit(calculate_shard, (rows, self.engine))))
+                # ograniczone okno porcji w locie – pamięć nie rośnie z liczbą profili
+                if len(pending) >= workers * 2:
+                    last_id, future = pending.popleft()
+                    yield last_id, self.checked(future.result())
+            while pending:
+                last_id, future = pending.popleft()
+                yield last_id, self.checked(future.result())
+
+    def checked(self, shard_result):
+        worker_version, results = shard_result
+        if worker_version != get_param_set().version:
+            raise CommandError('Proces roboczy wczytał inną wersję parametrów – arkusz zmienił się w trakcie')
+        return results
+
+    # --- zapis ---
+
+    def write(self, results):
+        """Zapis porcji; zwraca (błędy, pominięte). Powtórzony zapis tej samej porcji nie dubluje wierszy."""
+        failed = [(pid, error) for pid, result, error in results if error is not None]
+        for pid, error in failed:
+            self.stderr.write(f'Profil {pid}: {error}')
+        skipped = sum(1 for _, result, error in results if result is None and error is None)
+        with transaction.atomic():
+            ok = [(pid, result) for pid, result, _ in results if result is not None]
+            ids = [pid for pid, _ in ok]
+            if self.replace:
+                RetirementCalculation.objects.filter(user_profile_id__in=ids).delete()
+            else:
+                # porcja mogła zostać zapisana przed przerwaniem, ale bez punktu kontrolnego –
+                # po wznowieniu usuwamy jej wiersze z tego przeliczenia, zanim zapiszemy je ponownie
+                RetirementCalculation.objects.filter(user_profile_id__in=ids,
+                                                     calculation_date__gte=self.started_at).delete()
+            RetirementCalculation.objects.bulk_create(
+                [RetirementCalculation.from_result(UserProfile(pk=pid), result) for pid, result in ok],
+                batch_size=1000,
+            )
+        return len(failed), skipped
+
+    def load_checkpoint(self):
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError:
+            raise CommandError(f'Uszkodzony plik punktu kontrolnego: {self.checkpoint_path} (użyj --restart)')
+
+    def save_checkpoint(self, state):
+        # zapis atomowy – przerwanie w trakcie nie zostawi połowy pliku
+        tmp = f'{self.checkpoint_path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp, self.checkpoint_path)
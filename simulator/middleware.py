@@ -0,0 +1,80 @@
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from simulator.utils.instrumentation import METRICS
+
+# licznik zapytań bieżącego żądania; sync_to_async kopiuje kontekst do wątku z ORM,
+# więc ta sama lista jest widoczna także tam
+_query_count = ContextVar('metrics_query_count', default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    counter = _query_count.get()
+    if counter is not None:
+        counter[0] += 1
+    return execute(sql, params, many, context)
+
+
+def install_query_counter(sender, connection, **kwargs):
+    """connection_created: licznik zakładany raz na połączenie – żądania nie muszą go dokładać i zdejmować."""
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_query)
+
+
+class MetricsMiddleware:
+    """
+    Czas obsługi i liczba zapytań SQL per widok: do rejestru METRICS (endpoint /metrics)
+    oraz w nagłówkach odpowiedzi Server-Timing / X-DB-Queries.
+    Działa w obu trybach (WSGI i ASGI), żeby widoki async nie przechodziły przez wątek;
+    zapytania liczy count_query zakładany na każde połączenie (simulator.apps).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'METRICS_ENABLED', True)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        counter = [0]
+        token = _query_count.set(counter)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _query_count.reset(token)
+        elapsed = time.perf_counter() - started
+        return self.observe(request, response, elapsed, counter[0])
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        counter = [0]
+        token = _query_count.set(counter)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _query_count.reset(token)
+        elapsed = time.perf_counter() - started
+        return self.observe(request, response, elapsed, counter[0])
+
+    def observe(self, request, response, elapsed, queries):
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        METRICS.observe_request(view, request.method, response.status_code, elapsed, queries)
+        response['Server-Timing'] = f'app;dur={elapsed * 1000:.1f}, db;desc="queries={queries}"'
+        response['X-DB-Queries'] = str(queries)
+        return response
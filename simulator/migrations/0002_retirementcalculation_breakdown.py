@@ -0,0 +1,19 @@
+# Generated by Django 5.1.4 on 2026-10-18 09:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("simulator", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="retirementcalculation",
+            name="breakdown",
+            field=models.BinaryField(
+                blank=True, default=b"", verbose_name="Składki po latach (spakowane)"
+            ),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.4 on 2026-10-18 05:45
+
+from django.db import migrations, models
+
+
+def swap_reversed_periods(apps, schema_editor):
+    # dotąd nic nie pilnowało start_year <= end_year – odwrócone okresy (wpisane „od końca”)
+    # zamieniamy miejscami, inaczej dodanie ograniczenia (na SQLite przebudowa tabeli) się nie uda
+    WorkPeriod = apps.get_model('simulator', 'WorkPeriod')
+    reversed_periods = list(WorkPeriod.objects.filter(start_year__gt=models.F('end_year')))
+    for period in reversed_periods:
+        period.start_year, period.end_year = period.end_year, period.start_year
+    WorkPeriod.objects.bulk_update(reversed_periods, ['start_year', 'end_year'])
+    if reversed_periods:
+        print(f"\n  Zamieniono rok początku i końca w {len(reversed_periods)} okresach pracy (start_year > end_year)")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('simulator', '0002_retirementcalculation_breakdown'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='retirementcalculation',
+            index=models.Index(fields=['user_profile', '-calculation_date'], name='retcalc_profile_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='workperiod',
+            index=models.Index(fields=['user_profile', 'start_year'], name='workperiod_profile_start_idx'),
+        ),
+        migrations.RunPython(swap_reversed_periods, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='workperiod',
+            constraint=models.CheckConstraint(condition=models.Q(('start_year__lte', models.F('end_year'))), name='workperiod_start_lte_end'),
+        ),
+    ]
@@ -1,7 +1,9 @@
 from django.db import models
 from django.contrib.auth.models import User
 from datetime import date
+from decimal import Decimal
 import calendar
+import struct
 
 
 class UserProfile(models.Model):
@@ -90,6 +92,56 @@ class WorkPeriod(models.Model):
         verbose_name = "Okres pracy"
         verbose_name_plural = "Okresy pracy"
         ordering = ['start_year']
+        indexes = [
+            # build_periods: okresy profilu posortowane po roku rozpoczęcia
+            models.Index(fields=['user_profile', 'start_year'], name='workperiod_profile_start_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(condition=models.Q(start_year__lte=models.F('end_year')),
+                                   name='workperiod_start_lte_end'),
+        ]
+
+
+# Rozbicie składek po latach zapisywane binarnie:
+# nagłówek <BHH (wersja, pierwszy rok, liczba lat), potem dla każdego kolejnego
+# roku <qq – składka na konto i subkonto w groszach.
+BREAKDOWN_FORMAT_VERSION = 1
+_BREAKDOWN_HEADER = struct.Struct("<BHH")
+_BREAKDOWN_ROW = struct.Struct("<qq")
+
+
+def pack_breakdown(breakdown):
+    """[(rok, konto_add, sub_add), ...] z kolejnych lat -> bytes."""
+    if not breakdown:
+        return b""
+    first_year = breakdown[0][0]
+    out = bytearray(_BREAKDOWN_HEADER.pack(BREAKDOWN_FORMAT_VERSION, first_year, len(breakdown)))
+    for offset, (year, konto, sub) in enumerate(breakdown):
+        if year != first_year + offset:
+            raise ValueError("Rozbicie składek musi obejmować kolejne lata")
+        out += _BREAKDOWN_ROW.pack(int(Decimal(konto) * 100), int(Decimal(sub) * 100))
+    return bytes(out)
+
+
+def unpack_breakdown(data):
+    """bytes -> [(rok, konto_add, sub_add), ...] z kwotami jako Decimal."""
+    if not data:
+        return []
+    data = bytes(data)
+    version, first_year, count = _BREAKDOWN_HEADER.unpack_from(data)
+    if version != BREAKDOWN_FORMAT_VERSION:
+        raise ValueError(f"Nieobsługiwana wersja rozbicia składek: {version}")
+    rows = _BREAKDOWN_ROW.iter_unpack(data[_BREAKDOWN_HEADER.size:_BREAKDOWN_HEADER.size + count * _BREAKDOWN_ROW.size])
+    return [
+        (first_year + i, Decimal(konto).scaleb(-2), Decimal(sub).scaleb(-2))
+        for i, (konto, sub) in enumerate(rows)
+    ]
+
+
+class RetirementCalculationQuerySet(models.QuerySet):
+    def history_for(self, user_profile):
+        """Cała historia obliczeń użytkownika (z rozbiciem po latach) – jedno zapytanie."""
+        return self.filter(user_profile=user_profile).select_related('user_profile__user')
 
 
 class RetirementCalculation(models.Model):
@@ -98,12 +150,35 @@ class RetirementCalculation(models.Model):
     calculated_pension = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Obliczona emerytura")
     total_contributions = models.DecimalField(max_digits=12, decimal_places=2, verbose_name="Suma składek")
     life_expectancy_months = models.IntegerField(verbose_name="Dalsze trwanie życia w miesiącach")
+    breakdown = models.BinaryField(default=b"", blank=True, verbose_name="Składki po latach (spakowane)")
     calculation_date = models.DateTimeField(auto_now_add=True)
 
+    objects = RetirementCalculationQuerySet.as_manager()
+
     def __str__(self):
         return f"Obliczenie emerytury dla {self.user_profile.user.username}: {self.calculated_pension} zł"
 
+    @classmethod
+    def from_result(cls, user_profile, result):
+        """Niezapisany obiekt z wyniku PensionCalculator.calculate – np. do bulk_create."""
+        return cls(
+            user_profile=user_profile,
+            calculated_pension=result["monthly_pension"],
+            total_contributions=result["total_contributions_valorized"],
+            life_expectancy_months=result["life_expectancy_months"],
+            breakdown=pack_breakdown(result.get("contributions_breakdown")),
+        )
+
+    @property
+    def contributions_breakdown(self):
+        """Rozbicie składek po latach w formacie contributions_breakdown kalkulatora."""
+        return unpack_breakdown(self.breakdown)
+
     class Meta:
         verbose_name = "Obliczenie emerytury"
         verbose_name_plural = "Obliczenia emerytur"
-        ordering = ['-calculation_date']
\ No newline at end of file
+        ordering = ['-calculation_date']
+        indexes = [
+            # najnowsze obliczenie / historia profilu
+            models.Index(fields=['user_profile', '-calculation_date'], name='retcalc_profile_date_idx'),
+        ]
\ No newline at end of file
@@ -0,0 +1,20 @@
+from django.db import connections
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from simulator.models import ContractType
+from simulator.utils import contract_catalog
+
+
+@receiver(post_save, sender=ContractType)
+@receiver(post_delete, sender=ContractType)
+def invalidate_contract_catalog(sender, **kwargs):
+    """Zmiana typu umowy (np. w adminie) – katalog w pamięci do ponownego wczytania."""
+    contract_catalog.invalidate()
+
+
+def seed_contract_types(sender, using='default', **kwargs):
+    """post_migrate: domyślne typy umów zakładane przy migracji, a nie w widokach."""
+    # po cofnięciu migracji tabeli może już nie być
+    if ContractType._meta.db_table in connections[using].introspection.table_names():
+        contract_catalog.ensure_defaults(using=using)
@@ -46,7 +46,8 @@ class DynamicTimeline {
                 birthYear: djangoData.birth_year || 1995,
                 legalRetirementAge: djangoData.legal_retirement_age || 52,
                 plannedRetirementAge: djangoData.planned_retirement_age || 72,
-                activities: djangoData.activities || []
+                activities: djangoData.activities || [],
+                recalculateUrl: djangoData.recalculate_url || null
             };
         } catch (error) {
             console.error('Błąd parsowania danych z Django:', error);
@@ -558,6 +559,17 @@ class DynamicTimeline {
         table.appendChild(bar);
     }
 
+    drawVerticalLines() {
+        // wywoływane z formularza profilu na dashboardzie – przenieś nowe dane do appData
+        if (this.currentAge !== undefined) this.appData.currentAge = this.currentAge;
+        if (this.gender !== undefined) this.appData.gender = this.gender;
+        if (this.legalRetirementAge !== undefined) {
+            this.appData.legalRetirementAge = this.legalRetirementAge;
+            this.appData.plannedRetirementAge = this.legalRetirementAge;
+        }
+        this.renderVerticalLines();
+    }
+
     /**
      * POPRAWIONA METODA - Generuje pionowe linie z etykietami wyśrodkowanymi bezpośrednio pod nimi
      */
@@ -659,6 +671,49 @@ class DynamicTimeline {
             contributions: totalContributions,
             retirementAge: this.appData.plannedRetirementAge
         });
+
+        // szybki szacunek od razu, dokładny wynik z serwera po chwili
+        this.recalculatePension();
+    }
+
+    recalculatePension() {
+        if (!this.appData.recalculateUrl) return;
+
+        // debounce – seria edycji wysyła jedno żądanie
+        clearTimeout(this.recalculateTimer);
+        this.recalculateTimer = setTimeout(() => this.fetchPension(), 250);
+    }
+
+    fetchPension() {
+        const csrf = document.cookie.split('; ').find(c => c.startsWith('csrftoken='));
+        const requestId = (this.recalculateRequestId || 0) + 1;
+        this.recalculateRequestId = requestId;
+
+        fetch(this.appData.recalculateUrl, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': csrf ? csrf.split('=')[1] : ''
+            },
+            body: JSON.stringify({
+                gender: this.appData.gender,
+                birth_year: this.appData.birthYear,
+                retirement_age: this.appData.plannedRetirementAge,
+                activities: this.appData.activities
+            })
+        })
+        .then(response => response.ok ? response.json() : null)
+        .then(data => {
+            // odpowiedź na starsze żądanie nie nadpisuje nowszej
+            if (!data || requestId !== this.recalculateRequestId) return;
+            this.updateUI({
+                pension: data.monthly_pension,
+                workYears: data.total_work_years,
+                contributions: data.total_contributions_valorized,
+                retirementAge: data.retirement_age
+            });
+        })
+        .catch(error => console.error('Błąd przeliczania emerytury:', error));
     }
 
     updateUI(data) {
@@ -700,5 +755,5 @@ class DynamicTimeline {
 }
 
 document.addEventListener('DOMContentLoaded', () => {
-    new DynamicTimeline();
+    window.timelineManager = new DynamicTimeline();
 });
@@ -0,0 +1,575 @@
+import asyncio
+import glob
+import io
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from asgiref.sync import async_to_sync
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from simulator import log_pipeline, views
+from simulator.admin import WorkPeriodAdmin
+from simulator.models import (ContractType, RetirementCalculation, UserProfile, WorkPeriod, pack_breakdown,
+                              unpack_breakdown)
+from simulator.utils import (calc_executor, contract_catalog, instrumentation, jobs, params_artifact, result_cache,
+                              vectorized)
+from simulator.utils.calc_executor import ExecutorBusy
+from simulator.utils.incremental import recalculate
+from simulator.utils.pension_calculator import (PARAMS_EMBEDDED, PensionCalculator, PeriodInput, get_param_set,
+                                               params_version)
+from simulator.utils.scenario_io import PERIOD_COLUMNS, PERIODS_FILE, PROFILE_COLUMNS, PROFILES_FILE, write_rows
+from simulator.views import MAX_AGE, MIN_BIRTH_YEAR, build_periods
+
+CONTRACTS = ('EMPLOYMENT', 'MANDATE', 'TASK', 'BUSINESS', 'B2B')
+
+
+def random_period(rng, birth_year, retirement_year):
+    start = rng.randint(birth_year + 16, retirement_year - 1)
+    return PeriodInput(start, rng.randint(start, retirement_year + 2), Decimal(rng.randint(0, 5000000)) / 100,
+                       rng.choice(CONTRACTS), rng.choice((None, start)))
+
+
+def random_profile(rng):
+    birth_year = rng.randint(1950, 2005)
+    retirement_year = birth_year + rng.randint(55, 70)
+    periods = [random_period(rng, birth_year, retirement_year) for _ in range(rng.randint(1, 6))]
+    return rng.choice('MK'), retirement_year, birth_year, periods
+
+
+@skipUnless(vectorized.available(), 'wymaga numpy')
+class NumpyEngineTests(SimpleTestCase):
+    def test_within_tolerance_of_decimal_engine(self):
+        calc = PensionCalculator()
+        rng = random.Random(2025)
+        for _ in range(500):
+            gender, retirement_year, birth_year, periods = random_profile(rng)
+            reference = calc.calculate(gender, retirement_year, birth_year, periods)
+            result = calc.calculate(gender, retirement_year, birth_year, periods, engine='numpy')
+            for key, value in reference.items():
+                if isinstance(value, Decimal):
+                    self.assertLessEqual(abs(value - result[key]), vectorized.NUMPY_TOLERANCE, key)
+                else:
+                    self.assertEqual(value, result[key], key)
+
+
+@skipUnless(vectorized.available(), 'wymaga numpy')
+class CalculateBatchTests(SimpleTestCase):
+    def test_batch_matches_per_profile_calculate(self):
+        calc = PensionCalculator()
+        rng = random.Random(3)
+        profiles = [random_profile(rng) for _ in range(300)]
+        batch = vectorized.ProfileBatch.from_profiles(
+            (gender, birth_year, retirement_year, periods) for gender, retirement_year, birth_year, periods in profiles)
+        result = calc.calculate_batch(batch)
+        self.assertGreater(result['profiles_per_second'], 0)
+        for i, (gender, retirement_year, birth_year, periods) in enumerate(profiles):
+            reference = calc.calculate(gender, retirement_year, birth_year, periods)
+            with self.subTest(profile=i):
+                for key in ('monthly_pension', 'total_contributions_valorized'):
+                    self.assertLessEqual(abs(float(reference[key]) - float(result[key][i])),
+                                         float(vectorized.NUMPY_TOLERANCE), key)
+                self.assertEqual(reference['retirement_age'], int(result['retirement_age'][i]))
+
+
+@skipUnless(vectorized.available(), 'wymaga numpy')
+class ValorizationTableTests(SimpleTestCase):
+    def test_capital_at_matches_calculate_for_careers_before_1970(self):
+        calc = PensionCalculator()
+        for birth_year, start, retirement_year in ((1950, 1966, 2035), (1935, 1952, 2031), (1955, 1969, 2025),
+                                                   (2040, 2060, 2110)):
+            periods = [PeriodInput(start, retirement_year - 1, Decimal('5000'), 'EMPLOYMENT', start),
+                       PeriodInput(start + 1, 2024, Decimal('3000.37'), 'B2B', start + 1)]
+            result = calc.calculate('M', retirement_year, birth_year, periods)
+            with self.subTest(start=start):
+                capital = calc.capital_at(result['contributions_breakdown'], retirement_year)
+                self.assertLessEqual(abs(capital - result['total_contributions_valorized']),
+                                     vectorized.NUMPY_TOLERANCE)
+
+    def test_value_at_outside_the_table(self):
+        table = vectorized.ValorizationTable(PensionCalculator(), first_year=1960)
+        self.assertEqual(table.value_at(1.0, 0.0, 1961, 1962), 1.0)   # przed parametrami wskaźniki 1.0
+        self.assertEqual(table.value_at(1.0, 1.0, 2101, 2105), 2.0)   # po końcu tablicy – bez waloryzacji
+        self.assertEqual(table.value_at(1.0, 1.0, 2020, 2020), 0.0)   # składka jeszcze niezamknięta
+        with self.assertRaises(ValueError):
+            table.value_at(1.0, 0.0, 1950, 2000)
+
+
+class ParamsArtifactTests(SimpleTestCase):
+    def test_compiled_artifact_round_trip_and_loading(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, 'Parametry.xlsx')
+            artifact = params_artifact.artifact_path(source)
+            call_command('compile_params', '--embedded', '--source', source, stdout=io.StringIO())
+
+            params, version, digest = params_artifact.read_artifact(artifact)
+            self.assertEqual(params, PARAMS_EMBEDDED)
+            self.assertEqual(version, params_version(PARAMS_EMBEDDED))
+            self.assertIsNone(digest)
+
+            # arkusza nie ma – rejestr czyta artefakt
+            param_set = get_param_set(source, reload=True)
+            self.assertEqual(param_set.source, artifact)
+            self.assertEqual(param_set.version, version)
+
+            with open(artifact, 'r+b') as f:
+                f.seek(-3, os.SEEK_END)
+                f.write(b'\xff\xff\xff')
+            with self.assertRaises(params_artifact.ParamsArtifactError):
+                params_artifact.read_artifact(artifact)
+            # uszkodzony artefakt – wbudowane parametry zamiast błędu
+            self.assertEqual(get_param_set(source, reload=True).source, 'embedded')
+
+
+class IncrementalTests(SimpleTestCase):
+    def test_equals_full_calculation_after_random_edits(self):
+        """Kolejne edycje osi czasu (z punktem kontrolnym poprzedniej) dają to samo co calculate() od zera."""
+        calc = PensionCalculator()
+        rng = random.Random(7)
+        gender, retirement_year, birth_year, periods = random_profile(rng)
+        checkpoint = None
+        for _ in range(500):
+            edit = rng.randrange(5)
+            if edit == 0 or len(periods) == 1:
+                periods.append(random_period(rng, birth_year, retirement_year))
+            elif edit == 1:
+                periods.pop(rng.randrange(len(periods)))
+            elif edit == 2:
+                i = rng.randrange(len(periods))
+                periods[i] = PeriodInput(periods[i].start_year, periods[i].end_year,
+                                         Decimal(rng.randint(0, 5000000)) / 100, periods[i].contract_name,
+                                         periods[i].ref_year)
+            elif edit == 3:
+                i = rng.randrange(len(periods))
+                periods[i] = random_period(rng, birth_year, retirement_year)
+            else:
+                retirement_year = min(max(retirement_year + rng.randint(-3, 3), birth_year + 50), birth_year + 75)
+            result, checkpoint, _ = recalculate(calc, gender, retirement_year, birth_year, periods, checkpoint)
+            self.assertEqual(result, calc.calculate(gender, retirement_year, birth_year, periods))
+
+
+@skipUnless(vectorized.available(), 'wymaga numpy')
+class MonteCarloTests(SimpleTestCase):
+    def test_p50_close_to_deterministic(self):
+        """Pasma są wyśrodkowane na tabeli parametrów: P5 < prognoza deterministyczna < P95, P50 blisko niej."""
+        calc = PensionCalculator()
+        cases = [
+            ('M', 2055, 1990, [PeriodInput(2015, 2054, Decimal('9000'), 'EMPLOYMENT', 2015)]),
+            ('K', 2031, 1971, [PeriodInput(2000, 2030, Decimal('7000'), 'EMPLOYMENT', 2000)]),
+        ]
+        for gender, retirement_year, birth_year, periods in cases:
+            deterministic = calc.calculate(gender, retirement_year, birth_year, periods)['monthly_pension']
+            bands = calc.monte_carlo(gender, retirement_year, birth_year, periods, n_paths=4000, seed=1)
+            bands = bands['monthly_pension']
+            self.assertLess(bands['P5'], deterministic)
+            self.assertGreater(bands['P95'], deterministic)
+            self.assertLess(abs(bands['P50'] - deterministic) / deterministic, Decimal('0.01'))
+
+
+class CalculatorApiValidationTests(TestCase):
+    URLS = ('/api/emerytura/przelicz/', '/api/emerytura/wiek/')
+
+    def post(self, url, body):
+        return self.client.post(url, json.dumps(body), content_type='application/json')
+
+    def test_bad_input_is_400(self):
+        bad = [
+            [1, 2],
+            {'activities': 'abc'},
+            {'activities': [1, 2]},
+            {'activities': [{'startAge': 25, 'endAge': 40, 'salary': 'abc'}]},
+            {'activities': [{'startAge': 25, 'endAge': 40, 'salary': 'Infinity'}]},
+            {'activities': [{'startAge': 'x', 'endAge': 40, 'salary': 5000}]},
+            {'birth_year': 'abc'},
+        ]
+        for url in self.URLS:
+            for body in bad:
+                with self.subTest(url=url, body=body):
+                    self.assertEqual(self.post(url, body).status_code, 400)
+
+    def test_ages_and_birth_year_are_clamped(self):
+        body = {'birth_year': -5, 'retirement_age': 10 ** 9,
+                'activities': [{'startAge': 25, 'endAge': 3000000, 'salary': 5000}]}
+        response = self.post('/api/emerytura/przelicz/', body)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['retirement_age'], MAX_AGE)
+        self.assertEqual(self.post('/api/emerytura/wiek/', body).json()['birth_year'], MIN_BIRTH_YEAR)
+
+    def test_repeated_timeline_is_served_from_cache(self):
+        body = {'birth_year': 1980, 'activities': [{'startAge': 22, 'endAge': 60, 'salary': 6500}]}
+        first = self.post('/api/emerytura/przelicz/', body).json()
+        hits = result_cache.stats()['hits']
+        second = self.post('/api/emerytura/przelicz/', body).json()
+        self.assertEqual(result_cache.stats()['hits'], hits + 1)
+        self.assertIsNone(second['recomputed_from'])
+        self.assertEqual(second['monthly_pension'], first['monthly_pension'])
+
+
+class JobSubmitValidationTests(TestCase):
+    def test_bad_cohort_is_400(self):
+        work = [{'startAge': 25, 'endAge': 60, 'salary': 5000}]
+        bad = [
+            [1],
+            {'kind': 'cohort', 'profiles': [1]},
+            {'kind': 'cohort', 'profiles': [{'gender': 'M', 'birth_year': 1980, 'activities': []}]},
+            {'kind': 'cohort', 'profiles': [{'gender': 5, 'birth_year': 1980, 'activities': work}]},
+            {'kind': 'monte_carlo', 'activities': []},
+            {'kind': 'monte_carlo', 'activities': work, 'seed': -1},
+            {'kind': 'monte_carlo', 'activities': work, 'n_paths': 'abc'},
+            {'kind': 'monte_carlo', 'activities': work, 'seed': 'abc'},
+        ]
+        for body in bad:
+            with self.subTest(body=body):
+                response = self.client.post('/api/zadania/', json.dumps(body), content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+
+    def test_non_finite_wait_is_400(self):
+        service = mock.Mock()
+        service.get.return_value = mock.Mock()
+        with mock.patch.object(jobs, '_service', service):
+            for wait in ('nan', 'inf', 'abc'):
+                with self.subTest(wait=wait):
+                    response = self.client.get(f'/api/zadania/abc/?wait={wait}')
+                    self.assertEqual(response.status_code, 400)
+
+    def test_failed_warm_shuts_the_pool_down(self):
+        with mock.patch.object(jobs, '_service', None), \
+                mock.patch.object(jobs.JobService, '_new_pool') as new_pool, \
+                mock.patch.object(jobs.JobService, 'warm', side_effect=RuntimeError('start')):
+            with self.assertRaises(RuntimeError):
+                jobs.get_service()
+            new_pool.return_value.shutdown.assert_called_once()
+            self.assertFalse(jobs.started())
+
+
+class BuildPeriodsTests(TestCase):
+    def test_one_query_regardless_of_period_count(self):
+        contract = ContractType.objects.get_or_create(
+            name='EMPLOYMENT', defaults={'display_name': 'Umowa o pracę', 'zus_percentage': '19.52'})[0]
+        for count in (1, 30):
+            user = User.objects.create(username=f'okresy-{count}')
+            profile = UserProfile.objects.create(user=user, age=40, gender='M', salary_gross=Decimal('7000'),
+                                                 work_start_year=2000, planned_retirement_year=2050)
+            WorkPeriod.objects.bulk_create([
+                WorkPeriod(user_profile=profile, start_year=2000 + i, end_year=2000 + i,
+                           salary_gross_monthly=Decimal('7000'), contract_type=contract)
+                for i in range(count)
+            ])
+            with self.subTest(periods=count), self.assertNumQueries(1):
+                periods = build_periods(profile)
+            self.assertEqual(len(periods), count)
+            self.assertEqual(periods[0].contract_name, 'EMPLOYMENT')
+
+
+    def test_admin_list_renders_periods_in_one_query(self):
+        contract = ContractType.objects.get(name='EMPLOYMENT')
+        for i in range(5):
+            profile = UserProfile.objects.create(user=User.objects.create(username=f'admin-{i}'), age=40, gender='K',
+                                                 salary_gross=Decimal('6000'), work_start_year=2000,
+                                                 planned_retirement_year=2050)
+            WorkPeriod.objects.create(user_profile=profile, start_year=2000, end_year=2010,
+                                      salary_gross_monthly=Decimal('6000'), contract_type=contract)
+        # __str__ (kolumna user_profile w liście) sięga do użytkownika i typu umowy
+        queryset = WorkPeriod.objects.select_related(*WorkPeriodAdmin.list_select_related)
+        with self.assertNumQueries(1):
+            self.assertEqual(len([str(period) for period in queryset]), 5)
+
+class WorkPeriodConstraintTests(TestCase):
+    def test_start_after_end_is_rejected(self):
+        profile = UserProfile.objects.create(user=User.objects.create(username='okres-odwrocony'), age=40,
+                                             gender='M', salary_gross=Decimal('7000'), work_start_year=2000,
+                                             planned_retirement_year=2050)
+        contract = ContractType.objects.get(name='EMPLOYMENT')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            WorkPeriod.objects.create(user_profile=profile, contract_type=contract, start_year=2010, end_year=2005,
+                                      salary_gross_monthly=Decimal('5000'))
+        WorkPeriod.objects.create(user_profile=profile, contract_type=contract, start_year=2010, end_year=2010,
+                                  salary_gross_monthly=Decimal('5000'))
+
+
+class ImportScenariosTests(TestCase):
+    def write(self, directory, profiles, periods):
+        write_rows(os.path.join(directory, f'{PROFILES_FILE}.csv'), 'csv', PROFILE_COLUMNS, [profiles])
+        write_rows(os.path.join(directory, f'{PERIODS_FILE}.csv'), 'csv', PERIOD_COLUMNS, [periods])
+
+    def profile(self, username):
+        return {'username': username, 'age': 40, 'gender': 'K', 'salary_gross': '6000',
+                'work_start_year': 2005, 'planned_retirement_year': 2045}
+
+    def period(self, username, contract='EMPLOYMENT'):
+        return {'username': username, 'contract_type': contract, 'start_year': 2005, 'end_year': 2044,
+                'salary_gross_monthly': '6000'}
+
+    def test_bad_periods_file_writes_nothing_and_rerun_attaches_periods(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.write(directory, [self.profile('imp-a')], [self.period('imp-a', contract='NIEZNANA')])
+            with self.assertRaises(CommandError):
+                call_command('import_scenarios', directory, stdout=io.StringIO())
+            self.assertFalse(UserProfile.objects.filter(user__username='imp-a').exists())
+
+            # profil z wcześniejszego, przerwanego importu (bez okresów) dostaje okresy przy ponownym imporcie;
+            # profil, który miał już okresy, nie dostaje duplikatów
+            self.write(directory, [self.profile('imp-a')], [self.period('imp-a')])
+            call_command('import_scenarios', directory, stdout=io.StringIO())
+            call_command('import_scenarios', directory, stdout=io.StringIO())
+            self.assertEqual(WorkPeriod.objects.filter(user_profile__user__username='imp-a').count(), 1)
+
+            WorkPeriod.objects.all().delete()
+            call_command('import_scenarios', directory, stdout=io.StringIO())
+            self.assertEqual(WorkPeriod.objects.filter(user_profile__user__username='imp-a').count(), 1)
+
+    def test_duplicate_username_is_rejected_before_any_write(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.write(directory, [self.profile('imp-b'), self.profile('imp-c'), self.profile('imp-b')],
+                       [self.period('imp-b')])
+            with self.assertRaisesMessage(CommandError, 'imp-b'):
+                call_command('import_scenarios', directory, '--batch-size', '1', stdout=io.StringIO())
+        self.assertFalse(User.objects.filter(username__in=['imp-b', 'imp-c']).exists())
+
+
+class RecalculateAllTests(TestCase):
+    def test_resumed_shard_is_not_duplicated_and_empty_profiles_are_skipped(self):
+        contract = ContractType.objects.get(name='EMPLOYMENT')
+        profiles = []
+        for username in ('przelicz-a', 'przelicz-b'):
+            profiles.append(UserProfile.objects.create(
+                user=User.objects.create(username=username), age=40, gender='M', salary_gross=Decimal('7000'),
+                work_start_year=2005, planned_retirement_year=2050))
+        WorkPeriod.objects.create(user_profile=profiles[0], start_year=2005, end_year=2049,
+                                  salary_gross_monthly=Decimal('7000'), contract_type=contract)
+
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = os.path.join(directory, 'checkpoint.json')
+            started_at = timezone.now().isoformat()
+            out = io.StringIO()
+            call_command('recalculate_all', workers=1, checkpoint=checkpoint, stdout=out, stderr=out)
+            self.assertIn('bez okresów pracy: 1', out.getvalue())
+            self.assertNotIn('min()', out.getvalue())
+
+            # przerwanie po zapisie porcji, przed punktem kontrolnym: wznowienie liczy ją ponownie
+            with open(checkpoint, 'w', encoding='utf-8') as f:
+                json.dump({'params_version': PensionCalculator().params_version, 'last_profile_id': 0,
+                           'processed': 0, 'failed': 0, 'skipped': 0, 'started_at': started_at}, f)
+            call_command('recalculate_all', workers=1, checkpoint=checkpoint, stdout=io.StringIO())
+
+        self.assertEqual(RetirementCalculation.objects.filter(user_profile=profiles[0]).count(), 1)
+        self.assertFalse(RetirementCalculation.objects.filter(user_profile=profiles[1]).exists())
+
+    def test_process_pool_matches_in_process_run(self):
+        contract = ContractType.objects.get(name='EMPLOYMENT')
+        profile = UserProfile.objects.create(
+            user=User.objects.create(username='przelicz-pula'), age=35, gender='K', salary_gross=Decimal('6500'),
+            work_start_year=2010, planned_retirement_year=2055)
+        WorkPeriod.objects.create(user_profile=profile, start_year=2010, end_year=2054,
+                                  salary_gross_monthly=Decimal('6500'), contract_type=contract)
+
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = os.path.join(directory, 'checkpoint.json')
+            # procesy 'spawn' importują od zera moduł funkcji porcji (jobs) – bez modeli Django
+            call_command('recalculate_all', workers=2, checkpoint=checkpoint, stdout=io.StringIO())
+            call_command('recalculate_all', workers=1, checkpoint=checkpoint, stdout=io.StringIO())
+        pooled, local = RetirementCalculation.objects.filter(user_profile=profile).order_by('id')
+        self.assertEqual(pooled.calculated_pension, local.calculated_pension)
+
+
+class InstrumentationTests(SimpleTestCase):
+    def test_calculator_hooks_feed_the_registry(self):
+        registry = instrumentation.MetricsRegistry()
+        calc = PensionCalculator(hooks=registry)
+        periods = [PeriodInput(2005, 2029, Decimal('7000'), 'EMPLOYMENT', 2005),
+                   PeriodInput(2030, 2044, Decimal('9000'), 'B2B', 2030)]
+        calc.calculate('K', 2045, 1980, periods)
+
+        snapshot = registry.snapshot()
+        self.assertEqual(snapshot['counters']['calculations'], 1)
+        self.assertEqual(snapshot['counters']['periods'], 2)
+        for stage in ('period_index', 'contributions', 'life_expectancy', 'calculate'):
+            self.assertEqual(snapshot['stages'][stage][1], 1, stage)
+
+        registry.observe_request('simulator:dashboard', 'GET', 200, 0.02, 3)
+        text = registry.render_prometheus()
+        self.assertIn('pension_events_total{event="calculations"} 1\n', text)
+        self.assertIn('http_request_duration_seconds_bucket{view="simulator:dashboard",method="GET",status="200",'
+                      'le="0.025"} 1\n', text)
+        self.assertIn('http_request_db_queries_total{view="simulator:dashboard",method="GET",status="200"} 3\n',
+                      text)
+
+
+class MetricsAccessTests(SimpleTestCase):
+    def test_allowed_ips_without_token(self):
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='127.0.0.1').status_code, 200)
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.1.2.3').status_code, 403)
+
+    @override_settings(METRICS_TOKEN='sekret')
+    def test_token_required_even_from_localhost(self):
+        # za lokalnym reverse proxy każde żądanie przychodzi z 127.0.0.1
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='127.0.0.1').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer zly').status_code, 403)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer sekret').status_code, 200)
+
+
+class MetricsMiddlewareTests(TestCase):
+    async def test_async_view_queries_are_counted(self):
+        response = await self.async_client.get('/metrics', REMOTE_ADDR='127.0.0.1')
+        self.assertEqual(response['X-DB-Queries'], '0')
+        # widok async: sesja czytana i zapisywana w wątku sync_to_async
+        response = await self.async_client.post('/update-profile/', json.dumps({'age': 40, 'gender': 'K'}),
+                                                content_type='application/json')
+        self.assertTrue(response.json()['success'])
+        self.assertGreater(int(response['X-DB-Queries']), 0)
+
+
+class CalcExecutorTests(SimpleTestCase):
+    @override_settings(CALC_EXECUTOR_MAX_PENDING=1)
+    def test_cancelled_request_keeps_slot_until_work_ends(self):
+        started, release = threading.Event(), threading.Event()
+
+        def work():
+            started.set()
+            release.wait(5)
+
+        async def cancel_waiting():
+            task = asyncio.ensure_future(calc_executor.run(work))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            # wątek dalej liczy – limit nadal zajęty
+            self.assertEqual(calc_executor.pending(), 1)
+            with self.assertRaises(ExecutorBusy):
+                await calc_executor.run(work)
+
+        try:
+            async_to_sync(cancel_waiting)()
+        finally:
+            release.set()
+        calc_executor._get_executor().submit(lambda: None).result(5)
+        self.assertEqual(calc_executor.pending(), 0)
+
+
+class AdvisorWhatIfTests(SimpleTestCase):
+    def test_slow_baseline_falls_back_to_general_tips(self):
+        release = threading.Event()
+        inputs = ('K', 2050, 1985, [PeriodInput(2008, 2049, Decimal('6000'), 'EMPLOYMENT', 2008)], None)
+
+        async def advisor_inputs(request, user):
+            return inputs
+
+        try:
+            with mock.patch.object(views, '_advisor_inputs', advisor_inputs), \
+                    mock.patch.object(views.what_if, 'run', lambda *args, **kwargs: release.wait(5)), \
+                    mock.patch.object(views, 'ADVISOR_WHAT_IF_TIMEOUT_S', 0.05):
+                self.assertIsNone(async_to_sync(views._advisor_what_if)(None, None))
+        finally:
+            release.set()
+
+
+class LogPipelineTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, 'test.log')
+
+    def logger(self, handler):
+        logger = logging.getLogger(f'simulator.tests.{self.id()}')
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+        return logger
+
+    def messages(self):
+        lines = []
+        for path in glob.glob(self.path + '*'):
+            if not path.endswith('.lock'):
+                with open(path, encoding='utf-8') as f:
+                    lines.extend(json.loads(line)['message'] for line in f)
+        return lines
+
+    def test_no_threads_before_first_record(self):
+        handler = log_pipeline.queue_handler(self.path)
+        self.assertIsNone(handler.listener._thread)
+        self.logger(handler).info('pierwszy')
+        self.assertIsNotNone(handler.listener._thread)
+        handler.stop()
+        self.assertEqual(self.messages(), ['pierwszy'])
+
+    def test_size_based_rotation(self):
+        handler = log_pipeline.queue_handler(self.path, max_bytes=20000, backup_count=50, flush_records=10)
+        logger = self.logger(handler)
+        for i in range(1000):
+            logger.info('rekord %d %s', i, 'x' * 100)
+        handler.stop()
+        self.assertEqual(sorted(self.messages()), sorted(f'rekord {i} {"x" * 100}' for i in range(1000)))
+        self.assertGreater(len(glob.glob(self.path + '.*')), 5)
+
+    @skipUnless(hasattr(os, 'fork'), 'wymaga fork()')
+    def test_forked_child_writes_its_records(self):
+        handler = log_pipeline.queue_handler(self.path)
+        logger = self.logger(handler)
+        logger.info('rodzic przed fork')
+        pid = os.fork()
+        if pid == 0:
+            try:
+                logger.info('potomek')
+                handler.stop()
+            finally:
+                os._exit(0)
+        os.waitpid(pid, 0)
+        handler.stop()
+        self.assertEqual(sorted(self.messages()), ['potomek', 'rodzic przed fork'])
+
+
+class BreakdownStorageTests(TestCase):
+    def test_round_trip_and_history(self):
+        periods = [PeriodInput(1955, 2040, Decimal('99999999.99'), 'EMPLOYMENT', 1955),
+                   PeriodInput(1960, 1975, Decimal('1234.56'), 'BUSINESS', 1960)]
+        result = PensionCalculator().calculate('K', 2041, 1938, periods)
+        breakdown = result['contributions_breakdown']
+        self.assertEqual(breakdown[0][0], 1955)
+        self.assertEqual(unpack_breakdown(pack_breakdown(breakdown)), breakdown)
+
+        profile = UserProfile.objects.create(user=User.objects.create(username='historia'), age=40, gender='K',
+                                             salary_gross=Decimal('7000'), work_start_year=1955,
+                                             planned_retirement_year=2041)
+        small = PensionCalculator().calculate('K', 2041, 1938, periods[1:])
+        RetirementCalculation.from_result(profile, small).save()
+        with self.assertNumQueries(1):
+            history = list(RetirementCalculation.objects.history_for(profile))
+            self.assertEqual(history[0].user_profile.user.username, 'historia')
+        self.assertEqual(history[0].contributions_breakdown, small['contributions_breakdown'])
+
+
+class ContractCatalogTests(TestCase):
+    def test_dashboard_makes_no_queries_once_the_catalog_is_loaded(self):
+        contract_catalog.invalidate()
+        self.client.get('/dashboard/')
+        with self.assertNumQueries(0):
+            response = self.client.get('/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({c.name for c in response.context['contract_types']},
+                         {data['name'] for data in contract_catalog.DEFAULT_CONTRACT_TYPES})
+
+    def test_catalog_rates_match_the_calculator(self):
+        """zus_percentage z katalogu (B2B: 9,76%) daje te same składki roczne co kalkulator."""
+        profile = UserProfile.objects.create(user=User.objects.create(username='stawki'), age=40, gender='M',
+                                             salary_gross=Decimal('7000'), work_start_year=2020,
+                                             planned_retirement_year=2050)
+        calc = PensionCalculator()
+        for name in ('EMPLOYMENT', 'B2B'):
+            period = WorkPeriod(user_profile=profile, contract_type=ContractType.objects.get(name=name),
+                                start_year=2020, end_year=2020, salary_gross_monthly=Decimal('8000'))
+            _, konto, sub = calc.calculate('M', 2021, 1980, [PeriodInput(2020, 2020, Decimal('8000'), name, 2020)])[
+                'contributions_breakdown'][0]
+            with self.subTest(contract=name):
+                self.assertAlmostEqual(period.annual_zus_contribution, float(konto + sub), places=2)
@@ -12,4 +12,9 @@ urlpatterns = [
     path('update-profile/', views.update_profile, name='update_profile'),
     path("doradca/", AdvisorChatView.as_view(), name="advisor_chat"),
     path("api/doradca/", advisor_chat_api, name="advisor_chat_api"),
+    path("api/emerytura/przelicz/", views.recalculate_api, name="recalculate_api"),
+    path("api/emerytura/wiek/", views.retirement_sweep_api, name="retirement_sweep_api"),
+    path("api/zadania/", views.job_submit_api, name="job_submit_api"),
+    path("api/zadania/<str:job_id>/", views.job_status_api, name="job_status_api"),
+    path("metrics", views.metrics, name="metrics"),
 ]
\ No newline at end of file
@@ -0,0 +1,76 @@
+"""
+Ograniczona pula wątków na obliczenia kalkulatora w widokach asynchronicznych.
+
+Widoki async (ASGI) nie mogą liczyć emerytury w pętli zdarzeń – jedno
+obliczenie zatrzymałoby wszystkie pozostałe żądania procesu. Obliczenie
+trafia więc do wspólnej puli CALC_EXECUTOR_WORKERS wątków, a pętla w tym
+czasie obsługuje kolejne żądania (czat, profil). Liczba zleceń w puli
+(liczonych i czekających) jest ograniczona przez CALC_EXECUTOR_MAX_PENDING –
+ponad limit run() od razu rzuca ExecutorBusy (widok odpowiada 503),
+zamiast kolejkować bez końca.
+"""
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import asyncio
+import threading
+
+from django.conf import settings
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_PENDING = 64
+
+
+class ExecutorBusy(Exception):
+    """Pula obliczeń jest pełna – żądanie należy ponowić później."""
+
+
+_lock = threading.Lock()
+_executor: Optional[ThreadPoolExecutor] = None
+_pending = 0
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, "CALC_EXECUTOR_WORKERS", DEFAULT_WORKERS),
+                    thread_name_prefix="calc",
+                )
+    return _executor
+
+
+def pending() -> int:
+    """Liczba zleceń w puli (liczonych i czekających)."""
+    return _pending
+
+
+def _release(_future) -> None:
+    global _pending
+    with _lock:
+        _pending -= 1
+
+
+async def run(fn, *args, **kwargs):
+    """
+    Wykonuje fn(*args, **kwargs) w puli obliczeń i czeka na wynik bez blokowania pętli.
+
+    Miejsce w puli zwalnia dopiero zakończenie zlecenia w wątku – anulowanie
+    czekającego żądania (rozłączony klient) nie skraca obliczenia, więc nie
+    może też zwolnić limitu.
+    """
+    global _pending
+    with _lock:
+        if _pending >= getattr(settings, "CALC_EXECUTOR_MAX_PENDING", DEFAULT_MAX_PENDING):
+            raise ExecutorBusy()
+        _pending += 1
+    try:
+        future = _get_executor().submit(fn, *args, **kwargs)
+    except BaseException:
+        _release(None)
+        raise
+    future.add_done_callback(_release)
+    return await asyncio.wrap_future(future)
@@ -0,0 +1,69 @@
+"""
+Katalog typów umów trzymany w pamięci procesu.
+
+Typów umów jest kilka i zmieniają się tylko w adminie, więc zamiast pytać
+bazę przy każdym żądaniu czytamy je raz i trzymamy do unieważnienia:
+sygnały post_save/post_delete (simulator.signals) czyszczą katalog w
+procesie, który zapisał zmianę, a CATALOG_TTL ogranicza nieaktualność w
+pozostałych procesach. Domyślne typy zakładane są przy migrate
+(post_migrate) i komendą setup_contract_types – nie w widokach.
+"""
+from __future__ import annotations
+from typing import Optional, Tuple
+
+import threading
+import time
+
+# jedyne źródło domyślnych typów umów (stawki zgodne z kalkulatorem: B2B – łącznie 9,76%)
+DEFAULT_CONTRACT_TYPES = (
+    {'name': 'EMPLOYMENT', 'display_name': 'Umowa o pracę', 'zus_percentage': '19.52'},
+    {'name': 'MANDATE', 'display_name': 'Umowa zlecenie', 'zus_percentage': '19.52'},
+    {'name': 'TASK', 'display_name': 'Umowa o dzieło', 'zus_percentage': '0.00'},
+    {'name': 'BUSINESS', 'display_name': 'Własna działalność gospodarcza', 'zus_percentage': '19.52'},
+    {'name': 'B2B', 'display_name': 'Umowa B2B', 'zus_percentage': '9.76'},
+)
+
+CATALOG_TTL = 300.0  # s
+
+_lock = threading.Lock()
+_catalog: Optional[Tuple] = None
+_loaded_at = 0.0
+
+
+def ensure_defaults(using: str = 'default') -> list:
+    """Zakłada brakujące domyślne typy umów; zwraca listę utworzonych."""
+    from simulator.models import ContractType
+
+    created = []
+    for data in DEFAULT_CONTRACT_TYPES:
+        obj, was_created = ContractType.objects.using(using).get_or_create(
+            name=data['name'],
+            defaults={'display_name': data['display_name'], 'zus_percentage': data['zus_percentage']},
+        )
+        if was_created:
+            created.append(obj)
+    if created:
+        invalidate()
+    return created
+
+
+def contract_types() -> Tuple:
+    """Wszystkie typy umów (krotka instancji ContractType) – z pamięci, baza tylko przy pustym/starym katalogu."""
+    global _catalog, _loaded_at
+    catalog = _catalog
+    if catalog is not None and time.monotonic() - _loaded_at < CATALOG_TTL:
+        return catalog
+
+    from simulator.models import ContractType
+
+    with _lock:
+        if _catalog is None or time.monotonic() - _loaded_at >= CATALOG_TTL:
+            _catalog = tuple(ContractType.objects.order_by('id'))
+            _loaded_at = time.monotonic()
+        return _catalog
+
+
+def invalidate() -> None:
+    global _catalog
+    with _lock:
+        _catalog = None
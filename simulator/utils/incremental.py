@@ -0,0 +1,95 @@
+"""
+Przyrostowe przeliczanie osi czasu.
+
+Użytkownik edytuje na dashboardzie zwykle jeden okres naraz. Zamiast liczyć
+całą karierę od nowa, trzymamy punkt kontrolny: stan sald na koniec każdego
+roku (YearState) dla ostatnio policzonych okresów. Po zmianie liczymy tylko
+od pierwszego roku, którego zmiana dotyczy – startując z zapamiętanego
+salda otwarcia – a wcześniejsze lata bierzemy z punktu kontrolnego.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+import time
+
+from simulator.utils.pension_calculator import (
+    PensionCalculator,
+    PeriodIndex,
+    PeriodInput,
+    YearState,
+    normalize_periods,
+)
+
+
+@dataclass
+class Checkpoint:
+    """Stany roczne dla danego zestawu okresów; states[i] = koniec roku first_year + i."""
+    params_version: str
+    periods: Tuple[Tuple, ...]
+    first_year: int
+    states: List[YearState]
+
+    @property
+    def end_year(self) -> int:
+        """Pierwszy rok, którego punkt kontrolny już nie obejmuje."""
+        return self.first_year + len(self.states)
+
+
+def _dirty_year(old: Tuple[Tuple, ...], new: Tuple[Tuple, ...]) -> Optional[int]:
+    """Najwcześniejszy rok dotknięty zmianą okresów (None = bez zmian)."""
+    old_left = list(old)
+    changed = []
+    for p in new:
+        if p in old_left:
+            old_left.remove(p)
+        else:
+            changed.append(p)
+    changed.extend(old_left)
+    return min((p[0] for p in changed), default=None)
+
+
+def recalculate(calc: PensionCalculator, gender: str, planned_retirement_year: int, birth_year: int,
+                periods: List[PeriodInput],
+                checkpoint: Optional[Checkpoint] = None) -> Tuple[Dict, Checkpoint, Optional[int]]:
+    """
+    Wynik jak calculate() + nowy punkt kontrolny + rok, od którego faktycznie liczono
+    (None = nic nie trzeba było liczyć).
+    """
+    gender = (gender or "M").upper()
+    hooks = calc.hooks
+    if hooks.enabled:
+        started = time.perf_counter()
+        hooks.count("calculations")
+        hooks.count("periods", len(periods))
+    key = normalize_periods(periods)
+    # okresy w postaci kanonicznej – ta sama kolejność i zapis co w kluczu
+    periods = [PeriodInput(s, e, Decimal(sal), c, ref) for s, e, c, sal, ref in key]
+    first_year = min((p.start_year for p in periods), default=planned_retirement_year)
+
+    states: List[YearState] = []
+    resume_from = first_year
+    if (checkpoint is not None and checkpoint.params_version == calc.params_version
+            and checkpoint.first_year == first_year):
+        dirty = _dirty_year(checkpoint.periods, key)
+        # lata przed zmianą i w zasięgu punktu kontrolnego są nadal ważne
+        resume_from = min(dirty if dirty is not None else checkpoint.end_year, checkpoint.end_year)
+        states = checkpoint.states[:max(0, resume_from - first_year)]
+        resume_from = first_year + len(states)
+
+    index = PeriodIndex(periods)
+    recomputed_from = None
+    if resume_from < planned_retirement_year:
+        recomputed_from = resume_from
+        states.extend(calc.iter_years(index, resume_from, planned_retirement_year,
+                                      state=states[-1] if states else None))
+
+    used = states[:max(0, planned_retirement_year - first_year)]
+    result = calc._result(gender, planned_retirement_year, birth_year, used[-1] if used else None)
+    result["contributions_breakdown"] = [(s.year, s.konto_add, s.sub_add) for s in used]
+    result["overlapping_years"] = index.overlapping_years(planned_retirement_year)
+
+    if hooks.enabled:
+        hooks.stage("calculate", time.perf_counter() - started)
+    return result, Checkpoint(calc.params_version, key, first_year, states), recomputed_from
@@ -0,0 +1,164 @@
+"""
+Punkty pomiarowe kalkulatora i prosty rejestr metryk w formacie Prometheus.
+
+Kalkulator (i rejestr parametrów, cache wyników) zgłasza zdarzenia do
+„haków” – obiektu z metodami stage(nazwa, sekundy) i count(nazwa, n):
+
+  * etapy:    params_load, period_index, valorization, reverse_index,
+              contributions, life_expectancy, calculate,
+  * liczniki: calculations, periods, years, cache_hits, cache_misses.
+
+Domyślnie zainstalowane są haki puste (enabled = False) – wtedy kalkulator
+nie mierzy czasu wcale. install() podłącza np. MetricsRegistry, który
+zbiera sumy i liczniki per proces i renderuje je jako tekst Prometheus
+(endpoint /metrics, patrz simulator.middleware).
+"""
+from __future__ import annotations
+from bisect import bisect_left
+from typing import Dict, Iterable, Tuple
+
+import threading
+
+
+class CalculatorHooks:
+    """Haki bez działania – bazowa klasa i domyślna instalacja."""
+    enabled = False
+
+    def stage(self, name: str, seconds: float) -> None:
+        pass
+
+    def count(self, name: str, value: int = 1) -> None:
+        pass
+
+
+_NO_HOOKS = CalculatorHooks()
+_installed: CalculatorHooks = _NO_HOOKS
+
+
+def install(hooks: CalculatorHooks) -> None:
+    """Podłącza haki dla nowo tworzonych kalkulatorów (i rejestru parametrów)."""
+    global _installed
+    _installed = hooks
+
+
+def uninstall() -> None:
+    install(_NO_HOOKS)
+
+
+def current() -> CalculatorHooks:
+    return _installed
+
+
+# --------------------------
+# REJESTR METRYK
+# --------------------------
+
+# granice kubełków histogramu czasu żądań (s)
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(pairs: Iterable[Tuple[str, str]]) -> str:
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+    return "{" + body + "}" if body else ""
+
+
+def _num(x: float) -> str:
+    return repr(float(x)) if isinstance(x, float) else str(x)
+
+
+class MetricsRegistry(CalculatorHooks):
+    """Etapy i liczniki kalkulatora + czasy/zapytania żądań – bezpieczne wątkowo, per proces."""
+    enabled = True
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages: Dict[str, list] = {}       # etap -> [suma s, liczba]
+        self._counters: Dict[str, int] = {}
+        self._requests: Dict[Tuple, list] = {}   # (widok, metoda, status) -> [kubełki..., suma s, liczba, zapytania]
+
+    def stage(self, name: str, seconds: float) -> None:
+        with self._lock:
+            entry = self._stages.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def count(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def observe_request(self, view: str, method: str, status: int, seconds: float, queries: int) -> None:
+        key = (view, method, str(status))
+        n = len(REQUEST_BUCKETS)
+        with self._lock:
+            entry = self._requests.get(key)
+            if entry is None:
+                entry = self._requests[key] = [0] * n + [0.0, 0, 0]
+            pos = bisect_left(REQUEST_BUCKETS, seconds)
+            if pos < n:
+                entry[pos] += 1
+            entry[n] += seconds
+            entry[n + 1] += 1
+            entry[n + 2] += queries
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+            self._counters.clear()
+            self._requests.clear()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "stages": {k: tuple(v) for k, v in self._stages.items()},
+                "counters": dict(self._counters),
+                "requests": {k: list(v) for k, v in self._requests.items()},
+            }
+
+    def render_prometheus(self) -> str:
+        snap = self.snapshot()
+        lines = [
+            "# HELP pension_stage_seconds Czas etapów kalkulatora emerytalnego.",
+            "# TYPE pension_stage_seconds summary",
+        ]
+        for stage, (total, count) in sorted(snap["stages"].items()):
+            lines.append(f"pension_stage_seconds_sum{_labels([('stage', stage)])} {_num(total)}")
+            lines.append(f"pension_stage_seconds_count{_labels([('stage', stage)])} {count}")
+
+        lines += [
+            "# HELP pension_events_total Liczniki kalkulatora (obliczenia, lata, okresy, cache).",
+            "# TYPE pension_events_total counter",
+        ]
+        for event, value in sorted(snap["counters"].items()):
+            lines.append(f"pension_events_total{_labels([('event', event)])} {value}")
+
+        n = len(REQUEST_BUCKETS)
+        lines += [
+            "# HELP http_request_duration_seconds Czas obsługi żądania per widok.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (view, method, status), entry in sorted(snap["requests"].items()):
+            base = [("view", view), ("method", method), ("status", status)]
+            cumulative = 0
+            for bound, hits in zip(REQUEST_BUCKETS, entry[:n]):
+                cumulative += hits
+                lines.append(f"http_request_duration_seconds_bucket{_labels(base + [('le', _num(bound))])} "
+                             f"{cumulative}")
+            lines.append(f"http_request_duration_seconds_bucket{_labels(base + [('le', '+Inf')])} {entry[n + 1]}")
+            lines.append(f"http_request_duration_seconds_sum{_labels(base)} {_num(entry[n])}")
+            lines.append(f"http_request_duration_seconds_count{_labels(base)} {entry[n + 1]}")
+
+        lines += [
+            "# HELP http_request_db_queries_total Zapytania SQL wykonane w żądaniach per widok.",
+            "# TYPE http_request_db_queries_total counter",
+        ]
+        for (view, method, status), entry in sorted(snap["requests"].items()):
+            base = [("view", view), ("method", method), ("status", status)]
+            lines.append(f"http_request_db_queries_total{_labels(base)} {entry[n + 2]}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
@@ -0,0 +1,252 @@
+"""
+Zadania obliczeniowe w tle – bez zewnętrznego brokera.
+
+Cięższe obliczenia (projekcja Monte Carlo, przeliczenie kohorty profili)
+nie są liczone w procesie webowym: submit() wrzuca je do ograniczonej puli
+procesów i od razu zwraca zadanie z identyfikatorem, a klient odpytuje
+o wynik (get()). Całość żyje w procesie serwera:
+
+  * pula JOBS_WORKERS procesów uruchamiana przy pierwszym użyciu i od razu
+    rozgrzewana – każdy proces wczytuje parametry i kompiluje tabelę lat
+    w inicjalizatorze, więc pierwsze zadanie nie płaci za start,
+  * backpressure: najwyżej JOBS_MAX_PENDING zadań w toku (w kolejce i
+    liczonych) – ponad limit submit() rzuca JobQueueFull,
+  * wyniki trzymane w pamięci JOBS_RESULT_TTL sekund od zakończenia,
+    potem znikają (get() zwraca None).
+
+Procesy startują metodą 'spawn' – proces serwera ma już własne wątki
+(pula calc_executor, logowanie), a fork kopiowałby ich zablokowane locki.
+Zadania są widoczne tylko w procesie, który je przyjął: przy kilku
+procesach serwera odpytywanie musi trafiać do tego samego (sticky sessions).
+"""
+from __future__ import annotations
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from decimal import Decimal
+from multiprocessing import get_context
+from typing import Dict, Optional
+
+import atexit
+import os
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+from simulator.utils.pension_calculator import PensionCalculator, PeriodInput
+from simulator.utils.result_cache import cached_calculate
+
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_PENDING = 32
+DEFAULT_RESULT_TTL = 600.0  # s
+
+MAX_PATHS = 20000      # ścieżek Monte Carlo w jednym zadaniu
+MAX_COHORT = 5000      # profili w jednym zadaniu kohorty
+
+
+class JobQueueFull(Exception):
+    """Za dużo zadań w toku – zadanie odrzucone, należy ponowić później."""
+
+
+# --------------------------
+# PROCES ROBOCZY
+# --------------------------
+
+# kalkulator procesu roboczego – parametry wczytywane raz, w inicjalizatorze puli
+_calc = None
+
+
+def init_worker():
+    global _calc
+    _calc = PensionCalculator()
+
+
+def _warm():
+    return os.getpid(), _calc.params_version
+
+
+def _periods(rows):
+    return [PeriodInput(s, e, Decimal(sal), c, s) for s, e, sal, c in rows]
+
+
+def _plain(value):
+    """Wynik kalkulatora bez Decimal/krotek – gotowy do JsonResponse i tani w przesyle między procesami."""
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    return value
+
+
+def _run_monte_carlo(spec):
+    return _plain(_calc.monte_carlo(spec["gender"], spec["retirement_year"], spec["birth_year"],
+                                    _periods(spec["periods"]), n_paths=spec["n_paths"], seed=spec["seed"]))
+
+
+def _run_cohort(spec):
+    out = []
+    for gender, retirement_year, birth_year, periods in spec["profiles"]:
+        try:
+            result = cached_calculate(_calc, gender, retirement_year, birth_year, _periods(periods))
+            out.append({"monthly_pension": float(result["monthly_pension"]),
+                        "total_contributions_valorized": float(result["total_contributions_valorized"]),
+                        "retirement_age": result["retirement_age"]})
+        except Exception as e:
+            out.append({"error": f"{type(e).__name__}: {e}"})
+    return out
+
+
+JOB_KINDS = {
+    "monte_carlo": _run_monte_carlo,
+    "cohort": _run_cohort,
+}
+
+
+def calculate_shard(args):
+    """
+    Porcja polecenia recalculate_all (bez Django – same krotki na wejściu i wyjściu).
+    Zwraca (wersja parametrów, [(profile_id, wynik albo None, błąd albo None), ...]);
+    profil bez okresów pracy ma wynik i błąd None – jest pomijany, nie liczony jako błąd.
+    """
+    rows, engine = args
+    out = []
+    for profile_id, gender, retirement_year, birth_year, periods in rows:
+        if not periods:
+            out.append((profile_id, None, None))
+            continue
+        try:
+            out.append((profile_id, _calc.calculate(gender, retirement_year, birth_year, _periods(periods),
+                                                    engine=engine), None))
+        except Exception as e:
+            out.append((profile_id, None, f"{type(e).__name__}: {e}"))
+    return _calc.params_version, out
+
+
+def _run_job(kind, spec):
+    return {"params_version": _calc.params_version, "result": JOB_KINDS[kind](spec)}
+
+
+# --------------------------
+# USŁUGA ZADAŃ
+# --------------------------
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    future: Future
+    submitted_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    @property
+    def status(self) -> str:
+        if self.future.done():
+            return "failed" if self.future.cancelled() or self.future.exception() else "done"
+        return "running" if self.future.running() else "queued"
+
+    def to_json(self) -> Dict:
+        data = {"job_id": self.id, "kind": self.kind, "status": self.status}
+        end = self.finished_at or time.time()
+        data["elapsed_ms"] = round((end - self.submitted_at) * 1000.0, 3)
+        if data["status"] == "done":
+            data.update(self.future.result())
+        elif data["status"] == "failed":
+            error = None if self.future.cancelled() else self.future.exception()
+            data["error"] = f"{type(error).__name__}: {error}" if error else "Zadanie anulowane"
+        return data
+
+
+class JobService:
+    """Ograniczona pula procesów + rejestr zadań z TTL wyników."""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS, max_pending: int = DEFAULT_MAX_PENDING,
+                 result_ttl: float = DEFAULT_RESULT_TTL):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+        self._pool = self._new_pool()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(max_workers=self.workers, mp_context=get_context("spawn"),
+                                   initializer=init_worker)
+
+    def warm(self) -> list:
+        """Uruchamia wszystkie procesy robocze (każdy wczytuje parametry); zwraca ich PID-y."""
+        # każde zlecenie bez wolnego procesu startuje nowy – aż do 'workers'
+        futures = [self._pool.submit(_warm) for _ in range(self.workers)]
+        return sorted({f.result()[0] for f in futures})
+
+    def submit(self, kind: str, spec: Dict) -> Job:
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Nieznany rodzaj zadania: {kind}")
+        with self._lock:
+            self._purge()
+            if self.pending() >= self.max_pending:
+                raise JobQueueFull()
+            submitted_at = time.time()
+            try:
+                future = self._pool.submit(_run_job, kind, spec)
+            except BrokenProcessPool:
+                # proces roboczy padł (np. OOM) – nowa pula, stare zadania kończą się błędem
+                self._pool = self._new_pool()
+                future = self._pool.submit(_run_job, kind, spec)
+            job = Job(uuid.uuid4().hex, kind, future, submitted_at)
+            self._jobs[job.id] = job
+        future.add_done_callback(lambda _: setattr(job, "finished_at", time.time()))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._purge()
+            return self._jobs.get(job_id)
+
+    def pending(self) -> int:
+        """Zadania w toku (w kolejce i liczone)."""
+        return sum(1 for job in self._jobs.values() if not job.future.done())
+
+    def _purge(self) -> None:
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at is not None and now - job.finished_at > self.result_ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+_service: Optional[JobService] = None
+_service_lock = threading.Lock()
+
+
+def get_service() -> JobService:
+    """Usługa zadań procesu – tworzona i rozgrzewana przy pierwszym wywołaniu."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                service = JobService(
+                    workers=getattr(settings, "JOBS_WORKERS", DEFAULT_WORKERS),
+                    max_pending=getattr(settings, "JOBS_MAX_PENDING", DEFAULT_MAX_PENDING),
+                    result_ttl=getattr(settings, "JOBS_RESULT_TTL", DEFAULT_RESULT_TTL),
+                )
+                try:
+                    service.warm()
+                except BaseException:
+                    # nieudany start (np. błąd w inicjalizatorze) – bez zamknięcia każde kolejne
+                    # żądanie zostawiałoby po sobie kolejną, do połowy uruchomioną pulę
+                    service.shutdown()
+                    raise
+                atexit.register(service.shutdown)
+                _service = service
+    return _service
+
+
+def started() -> bool:
+    return _service is not None
@@ -0,0 +1,136 @@
+"""
+Stochastyczna projekcja emerytury (Monte Carlo).
+
+Tablica parametrów daje jedną, deterministyczną ścieżkę płac i wskaźników
+waloryzacji. Tu losujemy N ścieżek wokół niej:
+
+  * wzrost przeciętnej płacy:  g_t = g_tabela_t + N(0, wage_sigma)  (poziom płacy to iloczyn wzrostów),
+  * wskaźniki konto/subkonto:  idx_t = 1 + (idx_tabela_t - 1) * exp(N(0, index_sigma)) – losowana
+    jest nadwyżka ponad 1.0, więc mediana ścieżek to wartość z tabeli, a wskaźnik nie
+    przechodzi na drugą stronę 1.0 (rok bez waloryzacji w tabeli zostaje bez waloryzacji).
+
+Losowane są tylko lata przyszłe, które tabela parametrów obejmuje: lata do
+bieżącego włącznie są historią, a lata po ostatnim roku tabeli to już
+ekstrapolacja (year_table) – szum wokół niej udawałby wiedzę, której nie
+mamy. P50 pozostaje więc blisko prognozy deterministycznej. Ścieżki liczone są
+wektorowo (lata × ścieżki) tym samym akumulatorem co silnik "numpy", w
+porcjach po CHUNK_PATHS. Każda porcja ma własne ziarno z SeedSequence, więc
+wynik zależy tylko od 'seed' i 'n_paths' – nie od liczby procesów.
+"""
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+from simulator.utils.pension_calculator import PeriodInput, _q2
+from simulator.utils.vectorized import _BUS_BASE_FACTOR, accumulate, period_arrays, round2, year_arrays
+
+CHUNK_PATHS = 2000
+
+
+def _simulate_chunk(args) -> "np.ndarray":
+    """
+    Symuluje jedną porcję ścieżek i zwraca kapitał końcowy (konto + subkonto) dla każdej.
+    Funkcja modułowa na czystych tablicach – nadaje się do ProcessPoolExecutor.
+    """
+    (seed_seq, n, years, avg, idx_k, idx_s, first_random, last_random,
+     start, end, salary, ref_pos, rate_k, rate_s, business, wage_sigma, index_sigma) = args
+    rng = np.random.default_rng(seed_seq)
+    n_years = len(years)
+    random_rows = (years >= first_random) & (years <= last_random)
+
+    # poziom płacy: iloczyn (1 + wzrost z tabeli + szum) od pierwszego roku
+    growth = np.ones(n_years, dtype=np.float64)
+    growth[1:] = avg[1:] / avg[:-1]
+    growth_paths = np.repeat(growth[:, None], n, axis=1)
+    growth_paths[random_rows] += rng.normal(0.0, wage_sigma, size=(int(random_rows.sum()), n))
+    avg_paths = avg[0] * np.cumprod(np.maximum(growth_paths, 0.0), axis=0)
+
+    def _indices(base):
+        paths = np.repeat(base[:, None], n, axis=1)
+        shock = np.exp(rng.normal(0.0, index_sigma, size=(int(random_rows.sum()), n)))
+        paths[random_rows] = 1.0 + (paths[random_rows] - 1.0) * shock
+        return paths
+
+    idx_k_paths = _indices(idx_k)
+    idx_s_paths = _indices(idx_s)
+
+    add_k = np.zeros((n_years, n), dtype=np.float64)
+    add_s = np.zeros((n_years, n), dtype=np.float64)
+    for i in range(len(start)):
+        active = ((years >= start[i]) & (years <= end[i]))[:, None]
+        if business[i]:
+            base = avg_paths * float(_BUS_BASE_FACTOR)
+        else:
+            base = round2(salary[i] * avg_paths / avg_paths[ref_pos[i]])
+        base = base * 12.0
+        add_k += np.where(active, round2(base * rate_k[i]), 0.0)
+        add_s += np.where(active, round2(base * rate_s[i]), 0.0)
+
+    bal_k, bal_s = accumulate(add_k, add_s, idx_k_paths, idx_s_paths)
+    return round2(bal_k) + round2(bal_s)
+
+
+def simulate(calc, gender: str, planned_retirement_year: int, birth_year: int, periods: List[PeriodInput],
+             n_paths: int = 5000, seed: Optional[int] = None, workers: int = 1,
+             wage_sigma: float = 0.02, index_sigma: float = 0.25,
+             percentiles: Sequence[int] = (5, 50, 95)) -> Dict:
+    """
+    Pasma percentyli miesięcznej emerytury i kapitału z 'n_paths' losowych ścieżek.
+    workers > 1 – porcje liczone równolegle w procesach (ten sam wynik co workers=1).
+    """
+    gender = (gender or "M").upper()
+    min_year = min([p.start_year for p in periods] + [p.ref_year or p.start_year for p in periods])
+    years = np.arange(min_year, max(min_year, planned_retirement_year), dtype=np.int64)
+    avg, idx_k, idx_s = year_arrays(calc, years)
+    start, end, salary, _, rate_k, rate_s, business = period_arrays(calc, periods)
+    ref_pos = np.array([(p.ref_year or p.start_year) - min_year for p in periods], dtype=np.int64)
+    # okresy wykraczające poza rok emerytury przycinamy; rok odniesienia musi leżeć na osi lat
+    ref_pos = np.clip(ref_pos, 0, max(len(years) - 1, 0))
+
+    retirement_age = planned_retirement_year - birth_year
+    life_months = calc._life_expectancy(retirement_age, gender)
+    deterministic = calc.calculate(gender, planned_retirement_year, birth_year, periods, engine="numpy")
+
+    if len(years) == 0:
+        capital = np.zeros(n_paths, dtype=np.float64)
+    else:
+        chunks = [min(CHUNK_PATHS, n_paths - i) for i in range(0, n_paths, CHUNK_PATHS)]
+        root = np.random.SeedSequence(seed)
+        seed = root.entropy  # bez podanego ziarna i tak raportujemy to, z którego da się odtworzyć wynik
+        seeds = root.spawn(len(chunks))
+        shared = (years, avg, idx_k, idx_s, calc.current_year + 1, max(calc.params),
+                  start, end, salary, ref_pos, rate_k, rate_s, business, wage_sigma, index_sigma)
+        jobs = [(s, n) + shared for s, n in zip(seeds, chunks)]
+        if workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+                parts = list(pool.map(_simulate_chunk, jobs))
+        else:
+            parts = [_simulate_chunk(job) for job in jobs]
+        capital = np.concatenate(parts)
+
+    monthly = round2(capital / life_months) if life_months > 0 else np.zeros_like(capital)
+    check_year = int(years[-1]) if len(years) else calc.current_year
+    min_p = float(calc.min_pension(check_year))
+    if deterministic["total_work_years"] >= (25 if gender == "M" else 20):
+        monthly = np.maximum(monthly, round(min_p, 2))
+
+    def _bands(values) -> Dict[str, Decimal]:
+        return {f"P{q}": _q2(Decimal(repr(float(np.percentile(values, q))))) for q in percentiles}
+
+    return {
+        "monthly_pension": _bands(monthly),
+        "total_contributions_valorized": _bands(capital),
+        "deterministic_monthly_pension": deterministic["monthly_pension"],
+        "n_paths": n_paths,
+        "seed": seed,
+        "wage_sigma": wage_sigma,
+        "index_sigma": index_sigma,
+        "life_expectancy_months": life_months,
+        "retirement_age": retirement_age,
+    }
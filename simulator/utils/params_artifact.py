@@ -0,0 +1,77 @@
+"""
+Skompilowana tabela parametrów rocznych – binarny artefakt zamiast arkusza.
+
+Arkusz "Parametry-III 2025.xlsx" wymaga w czasie działania pandas + czytnika
+Excela i parsowania opisowych nagłówków kolumn. Komenda compile_params
+zamienia go raz (przy budowaniu/wdrożeniu) na mały plik z upakowanymi
+rekordami, który get_param_set czyta samym modułem struct:
+
+  nagłówek  <8sHI12s20sI>  magic, wersja formatu, liczba lat, wersja parametrów
+                           (params_version), SHA-1 arkusza źródłowego, CRC32 rekordów
+  rekordy   <idddd>        rok, avg_wage, val_idx_konto, val_idx_subkonto, min_pension
+
+SHA-1 arkusza pozwala wykryć nieaktualny artefakt: jeżeli arkusz leży obok
+i ma inną treść, get_param_set wraca do arkusza. Artefakt bez arkusza
+(np. arkusz nie jest wdrażany) jest używany zawsze.
+"""
+from __future__ import annotations
+from typing import Dict, Mapping, Optional, Tuple
+
+import hashlib
+import os
+import struct
+import zlib
+
+ARTIFACT_SUFFIX = ".params"
+MAGIC = b"ZUSPARAM"
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("<8sHI12s20sI")
+_RECORD = struct.Struct("<idddd")
+_FIELDS = ("avg_wage", "val_idx_konto", "val_idx_subkonto", "min_pension")
+_NO_SOURCE = b"\0" * 20  # artefakt ze wbudowanych parametrów – bez arkusza źródłowego
+
+
+class ParamsArtifactError(Exception):
+    """Plik artefaktu jest uszkodzony albo ma nieobsługiwany format."""
+
+
+def artifact_path(source_path: str) -> str:
+    """Ścieżka artefaktu dla arkusza: ta sama nazwa, rozszerzenie ARTIFACT_SUFFIX."""
+    return os.path.splitext(source_path)[0] + ARTIFACT_SUFFIX
+
+
+def file_digest(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).digest()
+
+
+def write_artifact(path: str, params: Mapping[int, Mapping[str, float]], version: str,
+                   source_digest: Optional[bytes] = None) -> int:
+    """Zapisuje artefakt atomowo (plik tymczasowy + os.replace); zwraca rozmiar w bajtach."""
+    body = b"".join(_RECORD.pack(int(year), *(float(params[year][f]) for f in _FIELDS))
+                    for year in sorted(params))
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, len(params), version.encode("ascii"),
+                          source_digest or _NO_SOURCE, zlib.crc32(body))
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(header + body)
+    os.replace(tmp, path)
+    return len(header) + len(body)
+
+
+def read_artifact(path: str) -> Tuple[Dict[int, Dict[str, float]], str, Optional[bytes]]:
+    """(parametry, wersja parametrów, SHA-1 arkusza źródłowego albo None)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < _HEADER.size:
+        raise ParamsArtifactError(f"{path}: plik za krótki")
+    magic, fmt, count, version, digest, crc = _HEADER.unpack_from(data)
+    if magic != MAGIC or fmt != FORMAT_VERSION:
+        raise ParamsArtifactError(f"{path}: nieobsługiwany format (magic={magic!r}, wersja={fmt})")
+    body = memoryview(data)[_HEADER.size:]
+    if len(body) != count * _RECORD.size or zlib.crc32(body) != crc:
+        raise ParamsArtifactError(f"{path}: uszkodzone rekordy")
+
+    params = {year: dict(zip(_FIELDS, values)) for year, *values in _RECORD.iter_unpack(body)}
+    return params, version.decode("ascii"), (None if digest == _NO_SOURCE else digest)
@@ -6,15 +6,18 @@ from __future__ import annotations
 from dataclasses import dataclass
 from decimal import Decimal, ROUND_HALF_UP, getcontext
 from datetime import date
-from typing import Dict, List, Tuple, Optional
+from bisect import bisect_right
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Tuple, Optional
 
+import hashlib
 import math
 import os
+import threading
+import time
 
-try:
-    import pandas as pd
-except Exception:
-    pd = None  # jeżeli nie ma pandas, użyjemy fallbacku PARAMS_EMBEDDED
+from simulator.utils import instrumentation, params_artifact
+from simulator.utils.year_table import compile_year_table
 
 getcontext().prec = 28
 
@@ -27,10 +30,14 @@ def load_params_from_excel(path: str) -> Dict[int, Dict[str, float]]:
     Czyta arkusz 'parametry roczne' i zwraca słownik:
     { rok: { 'avg_wage': float, 'val_idx_konto': float, 'val_idx_subkonto': float, 'min_pension': float } }
     """
-    if pd is None or not os.path.exists(path):
+    if not os.path.exists(path):
         return {}
+    # pandas tylko tutaj – ścieżka z artefaktem (compile_params) go nie importuje
+    try:
+        import pandas as pd
+    except Exception:
+        return {}  # jeżeli nie ma pandas, użyjemy fallbacku PARAMS_EMBEDDED
 
-    xls = pd.ExcelFile(path)
     # w pliku nagłówki są w 2. wierszu (0-index:1); wiersze danych od 3. (0-index:2)
     df = pd.read_excel(path, sheet_name="parametry roczne", header=None)
     headers = df.iloc[1].tolist()
@@ -84,10 +91,111 @@ PARAMS_EMBEDDED: Dict[int, Dict[str, float]] = {
     2030: {"avg_wage": 11497.64, "val_idx_konto": 1.0472, "val_idx_subkonto": 1.0567, "min_pension": 2284.50},
 }
 
-def get_params() -> Dict[int, Dict[str, float]]:
-    path = os.path.join(os.path.dirname(__file__), "..", "..", "Parametry-III 2025.xlsx")
-    params = load_params_from_excel(path)
-    return params if params else PARAMS_EMBEDDED
+PARAMS_XLSX_PATH = os.path.normpath(
+    os.path.join(os.path.dirname(__file__), "..", "..", "Parametry-III 2025.xlsx")
+)
+# skompilowany arkusz (manage.py compile_params) – wczytywany przed arkuszem
+PARAMS_ARTIFACT_PATH = params_artifact.artifact_path(PARAMS_XLSX_PATH)
+
+
+# --------------------------
+# REJESTR PARAMETRÓW (cache na poziomie procesu)
+# --------------------------
+
+@dataclass(frozen=True)
+class ParamSet:
+    """
+    Niemutowalny, współdzielony między wątkami zestaw parametrów rocznych.
+    'version' to skrót zawartości – zmienia się tylko, gdy zmienią się liczby.
+    """
+    source: str               # ścieżka do arkusza/artefaktu albo "embedded"
+    mtime: Optional[float]    # mtime pliku w chwili wczytania (None dla fallbacku)
+    version: str
+    params: Mapping[int, Mapping[str, float]]
+
+
+def params_version(params: Mapping[int, Mapping[str, float]]) -> str:
+    """Deterministyczny skrót tabeli parametrów (niezależny od kolejności kluczy)."""
+    items = sorted((int(y), sorted(rec.items())) for y, rec in params.items())
+    return hashlib.sha1(repr(items).encode("utf-8")).hexdigest()[:12]
+
+
+def _freeze(params: Mapping[int, Mapping[str, float]]) -> Mapping[int, Mapping[str, float]]:
+    return MappingProxyType({int(y): MappingProxyType(dict(rec)) for y, rec in params.items()})
+
+
+_registry_lock = threading.Lock()
+_registry: Dict[Tuple[str, Optional[float]], ParamSet] = {}
+
+
+def _file_mtime(path: str) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+def _load_params(path: str, artifact: Optional[str]) -> Tuple[Dict[int, Dict[str, float]], str, Optional[str]]:
+    """
+    (parametry, źródło, wersja albo None): najpierw skompilowany artefakt – o ile
+    arkusza nie ma obok albo ma tę samą treść co przy kompilacji – potem arkusz.
+    """
+    if artifact is not None:
+        try:
+            params, version, digest = params_artifact.read_artifact(artifact)
+        except (OSError, params_artifact.ParamsArtifactError):
+            params = None
+        if params and (not os.path.exists(path) or digest == params_artifact.file_digest(path)):
+            return params, artifact, version
+    return load_params_from_excel(path), path, None
+
+
+def get_param_set(path: Optional[str] = None, reload: bool = False) -> ParamSet:
+    """
+    Zwraca zestaw parametrów z rejestru. Klucz = (ścieżka, mtime arkusza, mtime
+    artefaktu), więc podmiana arkusza albo przekompilowanie na dysku są wykrywane
+    bez restartu workerów; 'reload=True' wymusza ponowne wczytanie nawet przy tych
+    samych mtime.
+    """
+    path = os.path.abspath(path or PARAMS_XLSX_PATH)
+    artifact = params_artifact.artifact_path(path)
+    key = (path, _file_mtime(path), _file_mtime(artifact))
+
+    if not reload:
+        cached = _registry.get(key)
+        if cached is not None:
+            return cached
+
+    with _registry_lock:
+        if not reload:
+            cached = _registry.get(key)
+            if cached is not None:
+                return cached
+
+        started = time.perf_counter()
+        loaded, source, version = _load_params(path, artifact if key[2] is not None else None)
+        instrumentation.current().stage("params_load", time.perf_counter() - started)
+        if loaded:
+            param_set = ParamSet(source=source, mtime=key[1], version=version or params_version(loaded),
+                                 params=_freeze(loaded))
+        else:
+            param_set = ParamSet(source="embedded", mtime=None, version=params_version(PARAMS_EMBEDDED),
+                                 params=_freeze(PARAMS_EMBEDDED))
+
+        # stare wersje tego samego pliku nie są już potrzebne
+        for stale in [k for k in _registry if k[0] == path]:
+            del _registry[stale]
+        _registry[key] = param_set
+        return param_set
+
+
+def reload_params(path: Optional[str] = None) -> ParamSet:
+    """Wymusza ponowne wczytanie arkusza (np. po podmianie parametrów w marcu)."""
+    return get_param_set(path, reload=True)
+
+
+def get_params() -> Mapping[int, Mapping[str, float]]:
+    return get_param_set().params
 
 
 # --------------------------
@@ -130,6 +238,9 @@ LIFE_EXPECTANCY = {
     70: {"K": 169, "M": 133},
 }
 
+# Dostępne silniki PensionCalculator.calculate
+ENGINES = ("decimal", "numpy")
+
 def _q2(x: Decimal) -> Decimal:
     return x.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
 
@@ -146,42 +257,118 @@ class PeriodInput:
     contract_name: str
     ref_year: Optional[int] = None  # rok odniesienia do indeksacji (domyślnie start_year)
 
+def normalize_periods(periods: List[PeriodInput]) -> Tuple[Tuple, ...]:
+    """
+    Okresy w postaci kanonicznej, niezależnej od kolejności i zapisu:
+    (start, koniec, KONTRAKT, pensja do grosza jako str, rok odniesienia).
+    """
+    return tuple(sorted(
+        (
+            p.start_year,
+            p.end_year,
+            (p.contract_name or "").upper(),
+            str(Decimal(p.salary_gross_monthly).quantize(Decimal("0.01"))),
+            p.ref_year or p.start_year,
+        )
+        for p in periods
+    ))
+
+class PeriodIndex:
+    """
+    Okresy znormalizowane raz do odcinków „lata [od, do) -> aktywne okresy” (sweep-line
+    po zdarzeniach start / koniec+1), zamiast skanować całą listę w każdym roku.
+    Koszt zależy od liczby okresów, nie od ich długości – okres do roku 3 000 000
+    to wciąż dwa zdarzenia. Nakładające się okresy sumują się (jak dotąd) i są
+    jawnie raportowane w 'overlaps' jako odcinki (od, do, indeksy okresów).
+    """
+
+    def __init__(self, periods: List[PeriodInput]):
+        starts: Dict[int, List[int]] = {}
+        stops: Dict[int, List[int]] = {}
+        for i, p in enumerate(periods):
+            if p.end_year < p.start_year:
+                continue
+            starts.setdefault(p.start_year, []).append(i)
+            stops.setdefault(p.end_year + 1, []).append(i)
+
+        self._bounds: List[int] = []                    # początki odcinków (rosnąco)
+        self._segments: List[Tuple[PeriodInput, ...]] = []
+        self.overlaps: List[Tuple[int, int, Tuple[int, ...]]] = []  # (od, do – wyłącznie, indeksy okresów)
+
+        events = sorted(set(starts) | set(stops))
+        active: List[int] = []
+        for year, next_year in zip(events, events[1:] + [None]):
+            gone = set(stops.get(year, ()))
+            active = sorted([i for i in active if i not in gone] + starts.get(year, []))
+            self._bounds.append(year)
+            self._segments.append(tuple(periods[i] for i in active))
+            if len(active) > 1:
+                self.overlaps.append((year, next_year, tuple(active)))
+
+    def active(self, year: int) -> Tuple[PeriodInput, ...]:
+        k = bisect_right(self._bounds, year) - 1
+        return self._segments[k] if k >= 0 else ()
+
+    def overlapping_years(self, until: int) -> List[int]:
+        """Lata (< until), w których nakłada się kilka okresów."""
+        return [year for start, stop, _ in self.overlaps for year in range(start, min(stop, until))]
+
+@dataclass(frozen=True)
+class YearState:
+    """Stan akumulacji na koniec roku 'year' – wystarcza, by wznowić liczenie od year + 1."""
+    year: int
+    konto_balance: Decimal
+    sub_balance: Decimal
+    open_konto: Decimal      # saldo otwarcia roku 'year' (baza waloryzacji w year + 1)
+    open_sub: Decimal
+    total_work_years: int
+    konto_add: Decimal       # składki zapisane w roku 'year'
+    sub_add: Decimal
+
 # --------------------------
 # KALKULATOR
 # --------------------------
 
 class PensionCalculator:
-    def __init__(self, params: Optional[Dict[int, Dict[str, float]]] = None):
-        self.params = params or get_params()
+    def __init__(self, params: Optional[Mapping[int, Mapping[str, float]]] = None,
+                 extrapolation: str = "hold", growth_rate: Optional[float] = None,
+                 hooks: Optional[instrumentation.CalculatorHooks] = None):
+        """
+        extrapolation: reguła dla przeciętnej płacy po końcu tabeli –
+        'hold' | 'growth' | 'linear' (patrz year_table); growth_rate dla 'growth'
+        (domyślnie średnia z końca tabeli).
+        hooks: odbiorca czasów etapów i liczników (domyślnie instrumentation.current()).
+        """
+        self.hooks = hooks or instrumentation.current()
+        if params:
+            self.params = params
+            self.params_version = params_version(params)
+        else:
+            # współdzielony, wczytany raz na proces zestaw z rejestru
+            param_set = get_param_set()
+            self.params = param_set.params
+            self.params_version = param_set.version
         self.current_year = date.today().year
+        # gęsta tablica lat 1970–2100 – kompilowana raz na wersję parametrów i regułę
+        self.year_table = compile_year_table(self.params, self.params_version, extrapolation, growth_rate,
+                                             MIN_PENSION_FALLBACK)
 
     # --- POMOCNICZE ---
 
     def avg_wage(self, year: int) -> Decimal:
-        rec = self.params.get(year)
-        if not rec:
-            # prosty extrap/hold – możesz ulepszyć
-            near = max(y for y in self.params.keys() if y <= year)
-            rec = self.params[near]
-        return Decimal(str(rec["avg_wage"]))
+        return self.year_table.avg_wage[self.year_table.pos(year)]
 
     def val_idx_konto(self, year: int) -> Decimal:
-        rec = self.params.get(year)
-        if rec and rec["val_idx_konto"]:
-            return Decimal(str(rec["val_idx_konto"]))
-        return Decimal("1.0")
+        t = self.year_table
+        return t.val_idx_konto[year - t.first_year] if t.contains(year) else Decimal("1.0")
 
     def val_idx_subkonto(self, year: int) -> Decimal:
-        rec = self.params.get(year)
-        if rec and rec["val_idx_subkonto"]:
-            return Decimal(str(rec["val_idx_subkonto"]))
-        return Decimal("1.0")
+        t = self.year_table
+        return t.val_idx_subkonto[year - t.first_year] if t.contains(year) else Decimal("1.0")
 
     def min_pension(self, year: int) -> Decimal:
-        rec = self.params.get(year)
-        if rec and rec["min_pension"]:
-            return Decimal(str(rec["min_pension"]))
-        return MIN_PENSION_FALLBACK
+        t = self.year_table
+        return t.min_pension[year - t.first_year] if t.contains(year) else MIN_PENSION_FALLBACK
 
     def reverse_index_salary(self, base_salary: Decimal, ref_year: int, target_year: int) -> Decimal:
         """
@@ -242,69 +429,149 @@ class PensionCalculator:
 
     # --- GŁÓWNE OBLICZENIE ---
 
-    def calculate(self, gender: str, planned_retirement_year: int, birth_year: int, periods: List[PeriodInput]) -> Dict:
+    def calculate(self, gender: str, planned_retirement_year: int, birth_year: int, periods: List[PeriodInput],
+                  engine: str = "decimal") -> Dict:
         """
         Zwraca słownik z wynikami (kapitał, miesięczna emerytura itd.)
         Uwaga: gender: 'M' | 'K'
+        engine: 'decimal' (referencyjny) | 'numpy' (wektorowy, patrz vectorized.NUMPY_TOLERANCE)
         """
-        gender = (gender or "M").upper()
+        if engine not in ENGINES:
+            raise ValueError(f"Nieznany silnik obliczeń: {engine!r}")
+        hooks = self.hooks
+        if hooks.enabled:
+            started = time.perf_counter()
+            hooks.count("calculations")
+            hooks.count("periods", len(periods))
+        if engine == "numpy":
+            from simulator.utils import vectorized
+            if vectorized.available():
+                result = vectorized.calculate_numpy(self, gender, planned_retirement_year, birth_year, periods)
+                if hooks.enabled:
+                    hooks.stage("calculate", time.perf_counter() - started)
+                return result
+            # bez numpy – liczymy referencyjnie
 
-        # Rozciągnij okresy do lat, policz składki + waloryzację
-        konto_balance = Decimal("0")
-        sub_balance   = Decimal("0")
-
-        # trzymamy „opening balance” na początek każdego roku:
-        open_konto: Dict[int, Decimal] = {}
-        open_sub: Dict[int, Decimal] = {}
+        gender = (gender or "M").upper()
 
         # wyznacz zakres lat, który nas interesuje (do roku emerytury)
         min_year = min(p.start_year for p in periods)
         max_year = planned_retirement_year  # włącznie dodamy składki do roku poprzedzającego emeryturę
 
-        total_work_years = 0
-        contrib_breakdown: List[Tuple[int, Decimal, Decimal]] = []  # (rok, konto_add, sub_add)
+        # okresy aktywne w danym roku – bez skanowania całej listy co rok
+        if hooks.enabled:
+            t0 = time.perf_counter()
+        index = PeriodIndex(periods)
+        if hooks.enabled:
+            hooks.stage("period_index", time.perf_counter() - t0)
 
-        last_year_processed = None
-        for year in range(min_year, max_year):
-            # zachowaj opening (początek roku = saldo z końca poprzedniego)
-            open_konto[year] = konto_balance
-            open_sub[year]   = sub_balance
+        contrib_breakdown: List[Tuple[int, Decimal, Decimal]] = []  # (rok, konto_add, sub_add)
 
-            # 1) Waloryzacja „w połowie roku” obliczana od stanu z POCZĄTKU POPRZEDNIEGO ROKU:
-            if (year - 1) in open_konto:
-                konto_balance = self.apply_midyear_valorization(year, open_konto[year - 1], konto_balance, "konto")
-            if (year - 1) in open_sub:
-                sub_balance   = self.apply_midyear_valorization(year, open_sub[year - 1],   sub_balance,   "subkonto")
+        state = None
+        for state in self.iter_years(index, min_year, max_year):
+            contrib_breakdown.append((state.year, state.konto_add, state.sub_add))
 
-            # 2) Składki za dany rok – zbierz z okresów
-            konto_add_year = Decimal("0")
-            sub_add_year   = Decimal("0")
+        result = self._result(gender, planned_retirement_year, birth_year, state)
+        result["contributions_breakdown"] = contrib_breakdown
+        # lata, w których kilka okresów nakłada się (składki się sumują)
+        result["overlapping_years"] = index.overlapping_years(max_year)
+        if hooks.enabled:
+            hooks.stage("calculate", time.perf_counter() - started)
+        return result
 
-            for p in periods:
-                if p.start_year <= year <= p.end_year:
+    def iter_years(self, index: PeriodIndex, start_year: int, end_year: int,
+                   state: Optional[YearState] = None):
+        """
+        Rozciąga okresy na lata [start_year, end_year) – składki + waloryzacja –
+        i zwraca YearState na koniec każdego roku. Podanie 'state' (koniec roku
+        start_year - 1) wznawia liczenie bez odtwarzania wcześniejszej historii.
+        """
+        if state is not None:
+            konto_balance, sub_balance = state.konto_balance, state.sub_balance
+            # „opening balance” poprzedniego roku – baza waloryzacji w bieżącym
+            prev_open_konto, prev_open_sub = state.open_konto, state.open_sub
+            total_work_years = state.total_work_years
+        else:
+            konto_balance = sub_balance = Decimal("0")
+            prev_open_konto = prev_open_sub = None
+            total_work_years = 0
+
+        # czasy etapów sumowane po latach i zgłaszane raz, na końcu (także przy przerwaniu)
+        timing = self.hooks.enabled
+        clock = time.perf_counter
+        valorization_s = reverse_index_s = contributions_s = 0.0
+        years = 0
+        try:
+            for year in range(start_year, end_year):
+                years += 1
+                # zachowaj opening (początek roku = saldo z końca poprzedniego)
+                open_konto, open_sub = konto_balance, sub_balance
+
+                # 1) Waloryzacja „w połowie roku” obliczana od stanu z POCZĄTKU POPRZEDNIEGO ROKU:
+                if timing:
+                    t0 = clock()
+                if prev_open_konto is not None:
+                    konto_balance = self.apply_midyear_valorization(year, prev_open_konto, konto_balance, "konto")
+                if prev_open_sub is not None:
+                    sub_balance   = self.apply_midyear_valorization(year, prev_open_sub,   sub_balance,   "subkonto")
+                if timing:
+                    valorization_s += clock() - t0
+
+                # 2) Składki za dany rok – zbierz z okresów
+                konto_add_year = Decimal("0")
+                sub_add_year   = Decimal("0")
+
+                for p in index.active(year):
                     ref_y = p.ref_year or p.start_year
+                    if timing:
+                        t0 = clock()
                     adj_monthly = self.reverse_index_salary(Decimal(p.salary_gross_monthly), ref_y, year)
+                    if timing:
+                        t1 = clock()
+                        reverse_index_s += t1 - t0
                     base, rate_k, rate_s = self.annual_base_and_rates(year, adj_monthly, p.contract_name)
 
                     konto_add = _q2(base * rate_k)
                     sub_add   = _q2(base * rate_s)
+                    if timing:
+                        contributions_s += clock() - t1
 
                     konto_add_year += konto_add
                     sub_add_year   += sub_add
                     total_work_years += 1  # liczymy „rok pracy” jako udział w danym roku
 
-            # 3) Dodajemy roczne składki do sald
-            konto_balance += konto_add_year
-            sub_balance   += sub_add_year
-
-            contrib_breakdown.append((year, konto_add_year, sub_add_year))
-            last_year_processed = year
+                # 3) Dodajemy roczne składki do sald
+                konto_balance += konto_add_year
+                sub_balance   += sub_add_year
+
+                prev_open_konto, prev_open_sub = open_konto, open_sub
+                yield YearState(year, konto_balance, sub_balance, open_konto, open_sub,
+                                total_work_years, konto_add_year, sub_add_year)
+        finally:
+            if timing:
+                self.hooks.stage("valorization", valorization_s)
+                self.hooks.stage("reverse_index", reverse_index_s)
+                self.hooks.stage("contributions", contributions_s)
+                self.hooks.count("years", years)
+
+    def _result(self, gender: str, planned_retirement_year: int, birth_year: int,
+                state: Optional[YearState]) -> Dict:
+        """Emerytura z salda na koniec ostatniego przeliczonego roku (None = brak lat składkowych)."""
+        konto_balance = state.konto_balance if state else Decimal("0")
+        sub_balance = state.sub_balance if state else Decimal("0")
+        total_work_years = state.total_work_years if state else 0
+        last_year_processed = state.year if state else None
 
         # Wiek emerytalny z planu:
         retirement_age = planned_retirement_year - birth_year
 
         # Średnie dalsze trwanie życia (miesiące)
-        life_months = self._life_expectancy(retirement_age, gender)
+        if self.hooks.enabled:
+            t0 = time.perf_counter()
+            life_months = self._life_expectancy(retirement_age, gender)
+            self.hooks.stage("life_expectancy", time.perf_counter() - t0)
+        else:
+            life_months = self._life_expectancy(retirement_age, gender)
 
         # Kapitał łączny:
         total_capital = konto_balance + sub_balance
@@ -328,9 +595,84 @@ class PensionCalculator:
             "life_expectancy_months": life_months,
             "total_work_years": total_work_years,
             "retirement_age": retirement_age,
-            "contributions_breakdown": contrib_breakdown,
         }
 
+    # --- PRZEGLĄD WIEKU EMERYTALNEGO ---
+
+    def sweep_retirement_ages(self, gender: str, birth_year: int, periods: List[PeriodInput],
+                              ages: Tuple[int, ...] = tuple(range(60, 71))) -> List[Dict]:
+        """
+        Emerytura dla każdego wieku przejścia z 'ages' w jednym przejściu po latach:
+        salda biegną raz, a dla kolejnych lat emerytury robimy tylko „zdjęcie” stanu.
+        """
+        gender = (gender or "M").upper()
+        ages = sorted(set(ages))
+        if not ages:
+            return []
+
+        index = PeriodIndex(periods)
+        min_year = min((p.start_year for p in periods), default=birth_year + ages[-1])
+        states: Dict[int, YearState] = {}
+        for state in self.iter_years(index, min_year, birth_year + ages[-1]):
+            states[state.year] = state
+
+        out = []
+        for age in ages:
+            retirement_year = birth_year + age
+            result = self._result(gender, retirement_year, birth_year, states.get(retirement_year - 1))
+            result["retirement_year"] = retirement_year
+            out.append(result)
+        return out
+
+    # --- OBLICZENIA WSADOWE ---
+
+    def calculate_batch(self, profiles) -> Dict:
+        """
+        Liczy cały kolumnowy wsad profili (vectorized.ProfileBatch) naraz.
+        Zwraca kolumny wyników (tablice NumPy) oraz 'profiles_per_second'.
+        """
+        from simulator.utils import vectorized
+        if not vectorized.available():
+            raise RuntimeError("calculate_batch wymaga pakietu numpy")
+        return vectorized.calculate_batch(self, profiles)
+
+    # --- PROJEKCJA STOCHASTYCZNA ---
+
+    def monte_carlo(self, gender: str, planned_retirement_year: int, birth_year: int, periods: List[PeriodInput],
+                    n_paths: int = 5000, seed: Optional[int] = None, workers: int = 1, **kwargs) -> Dict:
+        """
+        Pasma P5/P50/P95 miesięcznej emerytury z losowych ścieżek płac i wskaźników
+        waloryzacji wokół tabeli parametrów (patrz monte_carlo.simulate).
+        """
+        from simulator.utils import monte_carlo, vectorized
+        if not vectorized.available():
+            raise RuntimeError("Tryb Monte Carlo wymaga pakietu numpy")
+        return monte_carlo.simulate(self, gender, planned_retirement_year, birth_year, periods,
+                                    n_paths=n_paths, seed=seed, workers=workers, **kwargs)
+
+    # --- TABLICE WALORYZACJI ---
+
+    def valorization_table(self, first_year: Optional[int] = None):
+        """
+        Współdzielona tablica czynników waloryzacji (vectorized.ValorizationTable) dla tych
+        parametrów, obejmująca składki od first_year (domyślnie od początku tablicy lat).
+        """
+        from simulator.utils import vectorized
+        if not vectorized.available():
+            raise RuntimeError("Tablice waloryzacji wymagają pakietu numpy")
+        if first_year is None:
+            return vectorized.valorization_table(self)
+        return vectorized.valorization_table(self, first_year)
+
+    def capital_at(self, contributions_breakdown: List[Tuple[int, Decimal, Decimal]], at_year: int) -> Decimal:
+        """
+        Kapitał (konto + subkonto) na rok 'at_year' z gotowego contributions_breakdown
+        (wynik calculate) – bez odtwarzania historii sald, jedno mnożenie na składkę.
+        """
+        first_year = min((b[0] for b in contributions_breakdown), default=None)
+        konto, sub = self.valorization_table(first_year).capital_at(contributions_breakdown, at_year)
+        return _q2(Decimal(repr(float(konto[0] + sub[0]))))
+
     # --- pomocnicze: tabela życia ---
 
     def _life_expectancy(self, retirement_age: int, gender: str) -> int:
@@ -0,0 +1,110 @@
+"""
+Cache wyników PensionCalculator.calculate dla identycznych danych wejściowych.
+
+Klucz to skrót kanonicznej postaci (płeć, rok urodzenia, rok emerytury,
+znormalizowane okresy, wersja parametrów + reguła ekstrapolacji, silnik).
+Przechowywanie idzie przez framework cache Django (alias CALCULATION_CACHE_ALIAS,
+domyślnie "calculations"), więc działa z LocMemCache (LRU z limitem MAX_ENTRIES)
+albo z cache plikowym. Liczniki trafień/chybień są per proces.
+
+cached_recalculate robi to samo dla przeliczeń przyrostowych (endpoint osi
+czasu, warianty doradcy): w cache jest wynik razem z punktem kontrolnym, więc
+trafienie nie liczy nic, a zwrócony punkt kontrolny pasuje do tych okresów.
+"""
+from __future__ import annotations
+from typing import Dict, List, Optional, Tuple
+
+import hashlib
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import InvalidCacheBackendError
+
+from simulator.utils.incremental import Checkpoint, recalculate
+from simulator.utils.pension_calculator import PensionCalculator, PeriodInput, normalize_periods
+
+KEY_PREFIX = "pension:v1:"
+
+_stats_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def _cache():
+    alias = getattr(settings, "CALCULATION_CACHE_ALIAS", "calculations")
+    try:
+        return caches[alias]
+    except InvalidCacheBackendError:
+        return caches["default"]
+
+
+def cache_key(calc: PensionCalculator, gender: str, planned_retirement_year: int, birth_year: int,
+              periods: List[PeriodInput], engine: str = "decimal") -> str:
+    table = calc.year_table
+    canonical = repr((
+        (gender or "M").upper(),
+        int(birth_year),
+        int(planned_retirement_year),
+        normalize_periods(periods),
+        calc.params_version,
+        table.extrapolation,
+        table.growth_rate,
+        engine,
+    ))
+    return KEY_PREFIX + hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _get_or_compute(calc: PensionCalculator, key: str, compute):
+    cache = _cache()
+    value = cache.get(key)
+    if value is not None:
+        with _stats_lock:
+            _stats["hits"] += 1
+        calc.hooks.count("cache_hits")
+        return value, True
+
+    with _stats_lock:
+        _stats["misses"] += 1
+    calc.hooks.count("cache_misses")
+    value = compute()
+    cache.set(key, value)
+    return value, False
+
+
+def cached_calculate(calc: PensionCalculator, gender: str, planned_retirement_year: int, birth_year: int,
+                     periods: List[PeriodInput], engine: str = "decimal") -> Dict:
+    """calculate() z pamięcią wyników – identyczne wejście nie jest liczone drugi raz."""
+    key = cache_key(calc, gender, planned_retirement_year, birth_year, periods, engine)
+    result, _ = _get_or_compute(
+        calc, key, lambda: calc.calculate(gender, planned_retirement_year, birth_year, periods, engine=engine))
+    return result
+
+
+def cached_recalculate(calc: PensionCalculator, gender: str, planned_retirement_year: int, birth_year: int,
+                       periods: List[PeriodInput],
+                       checkpoint: Optional[Checkpoint] = None) -> Tuple[Dict, Checkpoint, Optional[int]]:
+    """incremental.recalculate() z pamięcią wyników; przy trafieniu 'recomputed_from' to None."""
+    key = cache_key(calc, gender, planned_retirement_year, birth_year, periods, "incremental")
+    recomputed_from = None
+
+    def compute():
+        nonlocal recomputed_from
+        result, new_checkpoint, recomputed_from = recalculate(calc, gender, planned_retirement_year, birth_year,
+                                                              periods, checkpoint)
+        return result, new_checkpoint
+
+    (result, new_checkpoint), _ = _get_or_compute(calc, key, compute)
+    return result, new_checkpoint, recomputed_from
+
+
+def stats() -> Dict[str, float]:
+    with _stats_lock:
+        hits, misses = _stats["hits"], _stats["misses"]
+    total = hits + misses
+    return {"hits": hits, "misses": misses, "hit_ratio": (hits / total) if total else 0.0}
+
+
+def reset_stats() -> None:
+    with _stats_lock:
+        _stats["hits"] = 0
+        _stats["misses"] = 0
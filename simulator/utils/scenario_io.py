@@ -0,0 +1,132 @@
+"""
+Strumieniowy zapis i odczyt scenariuszy (profile + okresy pracy) w CSV lub Parquet.
+
+Scenariusz to katalog z dwoma plikami o stałych kolumnach:
+
+  * profiles.<fmt>      – PROFILE_COLUMNS, jeden wiersz na profil (klucz: username),
+  * work_periods.<fmt>  – PERIOD_COLUMNS, jeden wiersz na okres pracy.
+
+Zarówno zapis, jak i odczyt idą porcjami (listy słowników), więc pamięć
+zależy od wielkości porcji, a nie od liczby wierszy. Parquet wymaga
+pyarrow – bez niego zgłaszamy ScenarioFormatError, CSV działa zawsze.
+"""
+from __future__ import annotations
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List
+
+import csv
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except Exception:
+    pa = None
+    pq = None
+
+FORMATS = ("csv", "parquet")
+
+PROFILES_FILE = "profiles"
+PERIODS_FILE = "work_periods"
+
+PROFILE_COLUMNS = ("username", "age", "gender", "salary_gross", "work_start_year", "planned_retirement_year")
+PERIOD_COLUMNS = ("username", "contract_type", "start_year", "end_year", "salary_gross_monthly")
+
+_INT_COLUMNS = {"age", "work_start_year", "planned_retirement_year", "start_year", "end_year"}
+_DECIMAL_COLUMNS = {"salary_gross", "salary_gross_monthly"}
+
+
+class ScenarioFormatError(Exception):
+    pass
+
+
+def scenario_path(directory: str, name: str, fmt: str) -> str:
+    return os.path.join(directory, f"{name}.{fmt}")
+
+
+def _require(fmt: str) -> None:
+    if fmt not in FORMATS:
+        raise ScenarioFormatError(f"Nieznany format: {fmt!r} (dostępne: {', '.join(FORMATS)})")
+    if fmt == "parquet" and pa is None:
+        raise ScenarioFormatError("Format parquet wymaga pakietu pyarrow (pip install pyarrow)")
+
+
+def _arrow_schema(columns):
+    fields = []
+    for col in columns:
+        if col in _INT_COLUMNS:
+            fields.append(pa.field(col, pa.int32()))
+        elif col in _DECIMAL_COLUMNS:
+            fields.append(pa.field(col, pa.decimal128(12, 2)))
+        else:
+            fields.append(pa.field(col, pa.string()))
+    return pa.schema(fields)
+
+
+def _coerce(row: Dict, columns) -> Dict:
+    """Wiersz z pliku -> typy Pythona (CSV daje same napisy, Parquet już typy)."""
+    out = {}
+    for col in columns:
+        value = row.get(col)
+        if value is None or value == "":
+            raise ScenarioFormatError(f"Brak wartości w kolumnie {col!r}: {row}")
+        if col in _INT_COLUMNS:
+            value = int(value)
+        elif col in _DECIMAL_COLUMNS:
+            value = Decimal(str(value))
+        else:
+            value = str(value)
+        out[col] = value
+    return out
+
+
+def write_rows(path: str, fmt: str, columns, chunks: Iterable[List[Dict]]) -> int:
+    """Zapisuje kolejne porcje wierszy; zwraca liczbę zapisanych wierszy."""
+    _require(fmt)
+    written = 0
+    if fmt == "csv":
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+            for chunk in chunks:
+                writer.writerows(chunk)
+                written += len(chunk)
+        return written
+
+    schema = _arrow_schema(columns)
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in chunks:
+            if chunk:
+                writer.write_batch(pa.RecordBatch.from_pylist(chunk, schema=schema))
+                written += len(chunk)
+    return written
+
+
+def read_rows(path: str, fmt: str, columns, batch_size: int) -> Iterator[List[Dict]]:
+    """Czyta plik porcjami po 'batch_size' wierszy (już z typami Pythona)."""
+    _require(fmt)
+    if not os.path.exists(path):
+        raise ScenarioFormatError(f"Brak pliku: {path}")
+
+    if fmt == "csv":
+        with open(path, encoding="utf-8", newline="") as f:
+            reader = csv.DictReader(f)
+            missing = set(columns) - set(reader.fieldnames or ())
+            if missing:
+                raise ScenarioFormatError(f"{path}: brak kolumn {sorted(missing)}")
+            chunk = []
+            for row in reader:
+                chunk.append(_coerce(row, columns))
+                if len(chunk) >= batch_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+        return
+
+    parquet = pq.ParquetFile(path)
+    missing = set(columns) - set(parquet.schema_arrow.names)
+    if missing:
+        raise ScenarioFormatError(f"{path}: brak kolumn {sorted(missing)}")
+    for batch in parquet.iter_batches(batch_size=batch_size, columns=list(columns)):
+        yield [_coerce(row, columns) for row in batch.to_pylist()]
@@ -0,0 +1,435 @@
+"""
+Wektorowy (NumPy) silnik kalkulatora emerytalnego.
+
+Liczy to samo co PensionCalculator.calculate (silnik "decimal"), ale na
+tablicach float64: parametry roczne są rozwijane raz do tablic po latach,
+składki liczone macierzowo (okresy × lata), a waloryzacja „w połowie roku”
+to jedna pętla po latach na wektorach.
+
+Tolerancja względem silnika referencyjnego (Decimal): każda składka jest
+zaokrąglana do grosza (ROUND_HALF_UP) tak jak w Decimal – także dokładnie
+w połowie grosza (patrz round2) – więc contributions_breakdown jest
+identyczne, a salda różnią się tylko błędem float64 waloryzacji: co
+najwyżej NUMPY_TOLERANCE na każdej kwocie wynikowej (sprawdzane w testach).
+"""
+from __future__ import annotations
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import threading
+import time
+
+try:
+    import numpy as np
+except Exception:
+    np = None  # bez numpy zostaje silnik "decimal"
+
+from simulator.utils.pension_calculator import (
+    PeriodInput,
+    _B2B_KONTO,
+    _B2B_SUB,
+    _BUS_BASE_FACTOR,
+    _EMP_KONTO,
+    _EMP_SUB,
+    _q2,
+)
+from simulator.utils.year_table import FIRST_YEAR, LAST_YEAR
+
+# Maksymalna dopuszczalna różnica (zł) między silnikiem "numpy" a "decimal"
+NUMPY_TOLERANCE = Decimal("0.02")
+
+
+# kontrakt -> (stawka konto, stawka subkonto, podstawa od średniej płacy?)
+_CONTRACT_RATES = {
+    "EMPLOYMENT": (float(_EMP_KONTO), float(_EMP_SUB), False),
+    "B2B": (float(_B2B_KONTO), float(_B2B_SUB), False),
+    "BUSINESS": (float(_EMP_KONTO), float(_EMP_SUB), True),
+}
+
+
+def available() -> bool:
+    return np is not None
+
+
+def round2(x):
+    """
+    Zaokrąglenie do grosza ROUND_HALF_UP (numpy domyślnie zaokrągla „do parzystej”).
+    Kwota w groszach jest najpierw zaokrąglana do 6 miejsc: składka dokładnie w połowie
+    grosza (np. 5655,675) ma w float64 postać 5655,67499999…, a bez tego spadałaby w dół.
+    """
+    return np.sign(x) * np.floor(np.round(np.abs(x) * 100.0, 6) + 0.5) / 100.0
+
+
+# --------------------------
+# TABLICE ROCZNE
+# --------------------------
+
+def year_arrays(calc, years: Sequence[int]):
+    """Zwraca (avg_wage, val_idx_konto, val_idx_subkonto) jako tablice po latach (z gęstej tablicy lat)."""
+    return calc.year_table.arrays(years)
+
+
+def period_arrays(calc, periods: Sequence[PeriodInput]):
+    """Rozkłada okresy na kolumny: start, end, pensja, średnia płaca roku ref., stawki."""
+    n = len(periods)
+    start = np.empty(n, dtype=np.int64)
+    end = np.empty(n, dtype=np.int64)
+    salary = np.empty(n, dtype=np.float64)
+    ref_avg = np.empty(n, dtype=np.float64)
+    rate_k = np.zeros(n, dtype=np.float64)
+    rate_s = np.zeros(n, dtype=np.float64)
+    business = np.zeros(n, dtype=bool)
+    ref = np.empty(n, dtype=np.int64)
+    for i, p in enumerate(periods):
+        start[i] = p.start_year
+        end[i] = p.end_year
+        salary[i] = float(p.salary_gross_monthly)
+        ref[i] = p.ref_year or p.start_year
+        spec = _CONTRACT_RATES.get((p.contract_name or "").upper())
+        if spec:
+            rate_k[i], rate_s[i], business[i] = spec
+    ref_avg = calc.year_table.arrays(ref)[0]
+    return start, end, salary, ref_avg, rate_k, rate_s, business
+
+
+def contribution_matrix(years, avg, start, end, salary, ref_avg, rate_k, rate_s, business):
+    """
+    Składki (konto, subkonto) w układzie okresy × lata oraz maska aktywności.
+    Indeksacja odwrotna: salary_y = salary_ref * avg[y] / avg[ref], zaokrąglone do grosza.
+    """
+    active = (years[None, :] >= start[:, None]) & (years[None, :] <= end[:, None])
+    safe_ref = np.where(ref_avg > 0, ref_avg, 1.0)
+    adj = np.where(
+        (ref_avg > 0)[:, None],
+        round2(salary[:, None] * avg[None, :] / safe_ref[:, None]),
+        salary[:, None],
+    )
+    base = np.where(business[:, None], avg[None, :] * float(_BUS_BASE_FACTOR), adj) * 12.0
+    konto = np.where(active, round2(base * rate_k[:, None]), 0.0)
+    sub = np.where(active, round2(base * rate_s[:, None]), 0.0)
+    return konto, sub, active
+
+
+# --------------------------
+# WALORYZACJA „W POŁOWIE ROKU”
+# --------------------------
+
+def accumulate(add_k, add_s, idx_k, idx_s, stop=None):
+    """
+    Akumulacja sald na tablicach lata × N (N profili / ścieżek).
+    Rok t: saldo += (idx[t] - 1) * saldo_otwarcia[t-1], potem += składki[t].
+    idx_* może mieć kształt (lata,) albo (lata, N).
+    stop: opcjonalnie (N,) – indeks ostatniego roku liczonego dla danej kolumny
+    (-1 = żaden); domyślnie wszystkie lata.
+    Zwraca salda końcowe (N,) konto i subkonto.
+    """
+    n_years, n = add_k.shape
+    bal_k = np.zeros(n, dtype=np.float64)
+    bal_s = np.zeros(n, dtype=np.float64)
+    prev_open_k = np.zeros(n, dtype=np.float64)
+    prev_open_s = np.zeros(n, dtype=np.float64)
+    if stop is not None:
+        out_k = np.zeros(n, dtype=np.float64)
+        out_s = np.zeros(n, dtype=np.float64)
+    for t in range(n_years):
+        open_k, open_s = bal_k, bal_s
+        bal_k = bal_k + (idx_k[t] - 1.0) * prev_open_k + add_k[t]
+        bal_s = bal_s + (idx_s[t] - 1.0) * prev_open_s + add_s[t]
+        prev_open_k, prev_open_s = open_k, open_s
+        if stop is not None:
+            done = stop == t
+            out_k[done] = bal_k[done]
+            out_s[done] = bal_s[done]
+    if stop is not None:
+        return out_k, out_s
+    return bal_k, bal_s
+
+
+def accumulate_history(add_k, add_s, idx_k, idx_s):
+    """Jak accumulate, ale zwraca salda na koniec każdego roku: tablice lata × N."""
+    n_years, n = add_k.shape
+    hist_k = np.zeros((n_years, n), dtype=np.float64)
+    hist_s = np.zeros((n_years, n), dtype=np.float64)
+    bal_k = np.zeros(n, dtype=np.float64)
+    bal_s = np.zeros(n, dtype=np.float64)
+    prev_open_k = np.zeros(n, dtype=np.float64)
+    prev_open_s = np.zeros(n, dtype=np.float64)
+    for t in range(n_years):
+        open_k, open_s = bal_k, bal_s
+        bal_k = bal_k + (idx_k[t] - 1.0) * prev_open_k + add_k[t]
+        bal_s = bal_s + (idx_s[t] - 1.0) * prev_open_s + add_s[t]
+        prev_open_k, prev_open_s = open_k, open_s
+        hist_k[t] = bal_k
+        hist_s[t] = bal_s
+    return hist_k, hist_s
+
+
+# --------------------------
+# TABLICE SKUMULOWANYCH CZYNNIKÓW WALORYZACJI
+# --------------------------
+
+class ValorizationTable:
+    """
+    Czynniki F[y, R]: ile jest warta w roku R (saldo po zamknięciu roku R-1)
+    1 zł składki zapisanej w roku y. Waloryzacja „w połowie roku” liczy się od
+    salda otwarcia roku poprzedniego, więc czynnik nie jest zwykłym iloczynem
+    indeksów – tablicę budujemy raz, puszczając jednostkowe wpłaty z każdego
+    roku przez akumulację. Potem wartość składki = jedno mnożenie.
+
+    Lata spoza parametrów mają wskaźnik 1.0, jak w calculate(): po last_year
+    saldo już się nie zmienia, a składka z roku po last_year jest warta 1.0.
+    Składki sprzed first_year wymagają tablicy zbudowanej od wcześniejszego roku
+    (valorization_table(calc, first_year=...)).
+    """
+
+    def __init__(self, calc, first_year: int = FIRST_YEAR, last_year: int = LAST_YEAR):
+        self.first_year = first_year
+        self.last_year = last_year
+        _, idx_k, idx_s = year_arrays(calc, range(first_year, last_year + 1))
+        unit = np.eye(len(idx_k), dtype=np.float64)
+        hist_k, hist_s = accumulate_history(unit, unit, idx_k, idx_s)
+        # [rok wpłaty, rok zamknięcia] – przed rokiem wpłaty czynnik jest 0
+        self.konto = hist_k.T.copy()
+        self.subkonto = hist_s.T.copy()
+        self.konto.setflags(write=False)
+        self.subkonto.setflags(write=False)
+
+    def _lookup(self, table, contribution_years, at_years):
+        y = np.asarray(contribution_years, dtype=np.int64)[:, None]
+        closed = np.asarray(at_years, dtype=np.int64)[None, :] - 1
+        if y.size and y.min() < self.first_year:
+            raise ValueError(f"Rok {y.min()} przed początkiem tablicy waloryzacji ({self.first_year})")
+        last = self.last_year - self.first_year
+        # zamknięcie po last_year – wartość z last_year (dalej wskaźniki 1.0)
+        f = table[np.clip(y - self.first_year, 0, last), np.clip(closed - self.first_year, 0, last)]
+        f = np.where(y <= self.last_year, f, (closed >= y).astype(np.float64))
+        # zamknięcie przed rokiem wpłaty (także przed first_year) – składki jeszcze nie ma
+        return np.where(closed >= y, f, 0.0)
+
+    def factors(self, contribution_years, at_years):
+        """Czynniki (konto, subkonto) o kształcie (len(contribution_years), len(at_years))."""
+        return (self._lookup(self.konto, contribution_years, at_years),
+                self._lookup(self.subkonto, contribution_years, at_years))
+
+    def value_at(self, konto_amount: float, sub_amount: float, year: int, at_year: int) -> float:
+        """Zwaloryzowana na rok at_year wartość składki z roku 'year'."""
+        fk, fs = self.factors([year], [at_year])
+        return konto_amount * float(fk[0, 0]) + sub_amount * float(fs[0, 0])
+
+    def capital_at(self, breakdown, at_years):
+        """
+        Kapitał (konto, subkonto) na każdy z lat 'at_years' dla listy
+        contributions_breakdown [(rok, konto_add, sub_add), ...].
+        """
+        at = np.atleast_1d(np.asarray(at_years, dtype=np.int64))
+        if not breakdown:
+            return np.zeros(len(at)), np.zeros(len(at))
+        years = np.array([b[0] for b in breakdown], dtype=np.int64)
+        add_k = np.array([float(b[1]) for b in breakdown], dtype=np.float64)
+        add_s = np.array([float(b[2]) for b in breakdown], dtype=np.float64)
+        fk, fs = self.factors(years, at)
+        return add_k @ fk, add_s @ fs
+
+
+_tables_lock = threading.Lock()
+_tables: Dict[str, "ValorizationTable"] = {}
+
+
+# najwcześniejszy rok składki, od którego budujemy tablicę (jak MIN_BIRTH_YEAR w API)
+EARLIEST_YEAR = 1900
+
+
+def valorization_table(calc, first_year: int = FIRST_YEAR) -> ValorizationTable:
+    """
+    Tablica czynników dla zestawu parametrów kalkulatora – budowana raz na wersję
+    parametrów; składki sprzed jej początku (first_year) powodują jednorazową
+    przebudowę od wcześniejszego roku.
+    """
+    if first_year < EARLIEST_YEAR:
+        raise ValueError(f"Rok składki {first_year} przed {EARLIEST_YEAR}")
+    table = _tables.get(calc.params_version)
+    if table is None or table.first_year > first_year:
+        with _tables_lock:
+            table = _tables.get(calc.params_version)
+            if table is None or table.first_year > first_year:
+                start = min(first_year, FIRST_YEAR if table is None else table.first_year)
+                table = ValorizationTable(calc, first_year=start)
+                _tables[calc.params_version] = table
+    return table
+
+
+# --------------------------
+# GŁÓWNE OBLICZENIE
+# --------------------------
+
+def _dec(x: float) -> Decimal:
+    return _q2(Decimal(repr(float(x))))
+
+
+def calculate_numpy(calc, gender: str, planned_retirement_year: int, birth_year: int,
+                    periods: List[PeriodInput]) -> Dict:
+    """Odpowiednik PensionCalculator.calculate na tablicach NumPy (ten sam słownik wyników)."""
+    gender = (gender or "M").upper()
+
+    min_year = min(p.start_year for p in periods)
+    years = np.arange(min_year, max(min_year, planned_retirement_year), dtype=np.int64)
+
+    avg, idx_k, idx_s = year_arrays(calc, years.tolist())
+    konto, sub, active = contribution_matrix(years, avg, *period_arrays(calc, periods))
+    konto_year = konto.sum(axis=0)
+    sub_year = sub.sum(axis=0)
+
+    bal_k, bal_s = accumulate(konto_year[:, None], sub_year[:, None], idx_k, idx_s)
+    konto_balance = _dec(bal_k[0])
+    sub_balance = _dec(bal_s[0])
+    total_work_years = int(active.sum())
+
+    retirement_age = planned_retirement_year - birth_year
+    life_months = calc._life_expectancy(retirement_age, gender)
+    total_capital = konto_balance + sub_balance
+    monthly = Decimal("0.00") if life_months <= 0 else _q2(total_capital / Decimal(life_months))
+
+    check_year = int(years[-1]) if len(years) else calc.current_year
+    min_p = calc.min_pension(check_year)
+    if monthly < min_p and total_work_years >= (25 if gender == "M" else 20):
+        monthly = _q2(min_p)
+
+    breakdown = [
+        (int(y), _dec(k), _dec(s))
+        for y, k, s in zip(years.tolist(), konto_year.tolist(), sub_year.tolist())
+    ]
+
+    return {
+        "monthly_pension": monthly,
+        "total_contributions_valorized": _q2(total_capital),
+        "konto_balance": konto_balance,
+        "subkonto_balance": sub_balance,
+        "life_expectancy_months": life_months,
+        "total_work_years": total_work_years,
+        "retirement_age": retirement_age,
+        "contributions_breakdown": breakdown,
+        "overlapping_years": [int(y) for y in years[active.sum(axis=0) > 1].tolist()],
+    }
+
+
+# --------------------------
+# OBLICZENIA WSADOWE (kohorty)
+# --------------------------
+
+@dataclass
+class ProfileBatch:
+    """
+    Kolumnowy wsad profili: kolumny profili (N,) + spłaszczone wiersze
+    PeriodInput (P,) z indeksem właściciela 'owner' wskazującym profil.
+    """
+    gender: Sequence[str]
+    birth_year: Sequence[int]
+    retirement_year: Sequence[int]
+    owner: Sequence[int] = field(default_factory=list)
+    start_year: Sequence[int] = field(default_factory=list)
+    end_year: Sequence[int] = field(default_factory=list)
+    salary_gross_monthly: Sequence[float] = field(default_factory=list)
+    contract_name: Sequence[str] = field(default_factory=list)
+    ref_year: Optional[Sequence[int]] = None  # 0/None = start_year
+
+    def __len__(self) -> int:
+        return len(self.gender)
+
+    @classmethod
+    def from_profiles(cls, profiles: Iterable[Tuple[str, int, int, Sequence[PeriodInput]]]) -> "ProfileBatch":
+        """Buduje wsad z krotek (gender, birth_year, retirement_year, periods)."""
+        batch = cls(gender=[], birth_year=[], retirement_year=[], ref_year=[])
+        for i, (gender, birth_year, retirement_year, periods) in enumerate(profiles):
+            batch.gender.append(gender)
+            batch.birth_year.append(birth_year)
+            batch.retirement_year.append(retirement_year)
+            for p in periods:
+                batch.owner.append(i)
+                batch.start_year.append(p.start_year)
+                batch.end_year.append(p.end_year)
+                batch.salary_gross_monthly.append(float(p.salary_gross_monthly))
+                batch.contract_name.append(p.contract_name)
+                batch.ref_year.append(p.ref_year or p.start_year)
+        return batch
+
+
+def _map_unique(values, fn, dtype=float):
+    """Wylicza fn raz na unikalną wartość i rozkłada wynik z powrotem na wiersze."""
+    uniq, inv = np.unique(values, return_inverse=True)
+    return np.array([fn(v) for v in uniq.tolist()], dtype=dtype)[inv]
+
+
+def calculate_batch(calc, batch: ProfileBatch) -> Dict[str, "np.ndarray"]:
+    """
+    Liczy emerytury dla całego wsadu naraz na tablicy lata × profile.
+    Zwraca kolumny wyników (N,) oraz 'profiles_per_second'.
+    """
+    t0 = time.perf_counter()
+    n = len(batch)
+    gender = np.array([(g or "M").upper() for g in batch.gender], dtype="<U1")
+    birth = np.asarray(batch.birth_year, dtype=np.int64)
+    retire = np.asarray(batch.retirement_year, dtype=np.int64)
+
+    owner = np.asarray(batch.owner, dtype=np.int64)
+    start = np.asarray(batch.start_year, dtype=np.int64)
+    end = np.asarray(batch.end_year, dtype=np.int64)
+    salary = np.asarray(batch.salary_gross_monthly, dtype=np.float64)
+    ref = np.asarray(batch.ref_year if batch.ref_year is not None else np.zeros(len(owner)), dtype=np.int64)
+    ref = np.where(ref > 0, ref, start)
+
+    y0 = int(start.min()) if len(start) else calc.current_year
+    y1 = max(y0, int(retire.max()) if n else y0)
+    years = np.arange(y0, y1, dtype=np.int64)
+    avg, idx_k, idx_s = year_arrays(calc, years.tolist())
+
+    konto_year = np.zeros((len(years), n), dtype=np.float64)
+    sub_year = np.zeros((len(years), n), dtype=np.float64)
+    work_years = np.zeros(n, dtype=np.int64)
+    if len(owner):
+        names = np.array([(c or "").upper() for c in batch.contract_name])
+        rates = _map_unique(names, lambda c: _CONTRACT_RATES.get(c, (0.0, 0.0, False)), dtype=object)
+        rate_k = np.array([r[0] for r in rates], dtype=np.float64)
+        rate_s = np.array([r[1] for r in rates], dtype=np.float64)
+        business = np.array([r[2] for r in rates], dtype=bool)
+        ref_avg = calc.year_table.arrays(ref)[0]
+
+        # lata >= roku emerytury właściciela nie wchodzą do obliczeń
+        end_eff = np.minimum(end, retire[owner] - 1)
+        konto, sub, active = contribution_matrix(years, avg, start, end_eff, salary, ref_avg, rate_k, rate_s, business)
+        np.add.at(konto_year.T, owner, konto)
+        np.add.at(sub_year.T, owner, sub)
+        work_years = np.bincount(owner, weights=active.sum(axis=1), minlength=n).astype(np.int64)
+
+    # ostatni rok liczony dla profilu = rok emerytury - 1 (lata przed pierwszym okresem są zerowe)
+    has_periods = np.bincount(owner, minlength=n) > 0
+    first_start = np.full(n, y1, dtype=np.int64)
+    if len(owner):
+        np.minimum.at(first_start, owner, start)
+    stop = np.where(has_periods & (first_start < retire), retire - 1 - y0, -1)
+    bal_k, bal_s = accumulate(konto_year, sub_year, idx_k, idx_s, stop=stop)
+    bal_k, bal_s = round2(bal_k), round2(bal_s)
+    total = round2(bal_k + bal_s)
+
+    retirement_age = retire - birth
+    life = np.array([calc._life_expectancy(int(a), g) for a, g in zip(retirement_age.tolist(), gender.tolist())],
+                    dtype=np.int64)
+    monthly = np.where(life > 0, round2(total / np.where(life > 0, life, 1)), 0.0)
+
+    check_year = np.where(stop >= 0, retire - 1, calc.current_year)
+    min_p = round2(_map_unique(check_year, lambda y: float(calc.min_pension(y))))
+    needed = np.where(gender == "M", 25, 20)
+    monthly = np.where((monthly < min_p) & (work_years >= needed), min_p, monthly)
+
+    elapsed = time.perf_counter() - t0
+    return {
+        "monthly_pension": monthly,
+        "total_contributions_valorized": total,
+        "konto_balance": bal_k,
+        "subkonto_balance": bal_s,
+        "life_expectancy_months": life,
+        "total_work_years": work_years,
+        "retirement_age": retirement_age,
+        "elapsed_seconds": elapsed,
+        "profiles_per_second": (n / elapsed) if elapsed > 0 else float("inf"),
+    }
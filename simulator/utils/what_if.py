@@ -0,0 +1,135 @@
+"""
+Symulacje „co jeśli” dla doradcy.
+
+Zamiast ogólnych porad liczymy kilka tanich wariantów okresów użytkownika
+i podajemy różnicę miesięcznej emerytury w złotych:
+
+  * "later_retirement"      – emerytura RETIRE_LATER_YEARS lata później (okresy
+                              trwające do emerytury przedłużamy),
+  * "mandate_to_employment" – lata na umowie zlecenie jako umowa o pracę,
+  * "fill_gaps"             – przerwy między okresami (i do emerytury) jako
+                              umowa o pracę z płacą poprzedniego okresu.
+
+Wszystkie warianty startują z punktu kontrolnego wariantu bazowego
+(incremental.recalculate), więc liczone są tylko lata od pierwszej zmiany;
+wynik bazowy i warianty idą przez result_cache, więc powtórzone pytanie przy
+tej samej osi czasu nie liczy nic.
+Warianty liczymy po kolei w ramach budżetu czasu – te, które się nie
+zmieściły, trafiają do 'skipped'. Wariant bazowy jest liczony zawsze
+(bez niego nie ma różnic); czas całej odpowiedzi ogranicza wywołujący
+(doradca: asyncio.wait_for na calc_executor.run).
+"""
+from __future__ import annotations
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Tuple
+
+import time
+
+from simulator.utils.incremental import Checkpoint
+from simulator.utils.result_cache import cached_recalculate
+from simulator.utils.pension_calculator import PensionCalculator, PeriodInput
+
+RETIRE_LATER_YEARS = 2
+DEFAULT_BUDGET_MS = 50.0
+
+Variant = Optional[Tuple[List[PeriodInput], int]]
+
+
+def later_retirement(periods: List[PeriodInput], planned_retirement_year: int) -> Variant:
+    last_year = planned_retirement_year - 1
+    new_last = last_year + RETIRE_LATER_YEARS
+    return [
+        PeriodInput(p.start_year, new_last, p.salary_gross_monthly, p.contract_name, p.ref_year)
+        if p.end_year >= last_year else p
+        for p in periods
+    ], planned_retirement_year + RETIRE_LATER_YEARS
+
+
+def mandate_to_employment(periods: List[PeriodInput], planned_retirement_year: int) -> Variant:
+    if not any((p.contract_name or "").upper() == "MANDATE" for p in periods):
+        return None
+    return [
+        PeriodInput(p.start_year, p.end_year, p.salary_gross_monthly, "EMPLOYMENT", p.ref_year)
+        if (p.contract_name or "").upper() == "MANDATE" else p
+        for p in periods
+    ], planned_retirement_year
+
+
+def fill_gaps(periods: List[PeriodInput], planned_retirement_year: int) -> Variant:
+    if not periods:
+        return None
+    ordered = sorted(periods, key=lambda p: (p.start_year, p.end_year))
+    fills = []
+    covered_to = ordered[0].start_year - 1
+    previous = ordered[0]
+    for p in ordered + [None]:
+        gap_end = (p.start_year if p is not None else planned_retirement_year) - 1
+        if gap_end > covered_to:
+            # ta sama płaca realna co w poprzednim okresie (ten sam rok odniesienia)
+            fills.append(PeriodInput(covered_to + 1, gap_end, previous.salary_gross_monthly, "EMPLOYMENT",
+                                     previous.ref_year or previous.start_year))
+        if p is not None and p.end_year > covered_to:
+            covered_to = p.end_year
+            previous = p
+    fills = [f for f in fills if f.start_year < planned_retirement_year]
+    return (list(periods) + fills, planned_retirement_year) if fills else None
+
+
+SCENARIOS: Tuple[Tuple[str, str, Callable[[List[PeriodInput], int], Variant]], ...] = (
+    ("later_retirement", f"Przejście na emeryturę {RETIRE_LATER_YEARS} lata później", later_retirement),
+    ("mandate_to_employment", "Umowa o pracę zamiast umowy zlecenia", mandate_to_employment),
+    ("fill_gaps", "Praca w latach przerw", fill_gaps),
+)
+
+
+def run(calc: PensionCalculator, gender: str, planned_retirement_year: int, birth_year: int,
+        periods: List[PeriodInput], checkpoint: Optional[Checkpoint] = None,
+        budget_ms: float = DEFAULT_BUDGET_MS) -> Tuple[Dict, Checkpoint]:
+    """
+    Wariant bazowy + warianty SCENARIOS (w kolejności, dopóki starcza budżetu).
+    Zwraca (wynik, punkt kontrolny wariantu bazowego – do ponownego użycia).
+    """
+    started = time.perf_counter()
+    base, base_checkpoint, _ = cached_recalculate(calc, gender, planned_retirement_year, birth_year, periods, checkpoint)
+    baseline = base["monthly_pension"]
+
+    scenarios, skipped = [], []
+    for key, title, build in SCENARIOS:
+        if (time.perf_counter() - started) * 1000.0 > budget_ms:
+            skipped.append(key)
+            continue
+        variant = build(periods, planned_retirement_year)
+        if variant is None:
+            continue
+        variant_periods, variant_year = variant
+        result, _, _ = cached_recalculate(calc, gender, variant_year, birth_year, variant_periods, base_checkpoint)
+        scenarios.append({
+            "scenario": key,
+            "title": title,
+            "retirement_year": variant_year,
+            "monthly_pension": result["monthly_pension"],
+            "delta": result["monthly_pension"] - baseline,
+        })
+
+    return {
+        "baseline": baseline,
+        "retirement_year": planned_retirement_year,
+        "scenarios": sorted(scenarios, key=lambda s: s["delta"], reverse=True),
+        "skipped": skipped,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000.0, 3),
+    }, base_checkpoint
+
+
+def describe(what_if: Dict) -> List[str]:
+    """Wiersze odpowiedzi doradcy z konkretnymi kwotami."""
+    lines = [f"Twoja prognoza: {_pln(what_if['baseline'])} miesięcznie."]
+    for s in what_if["scenarios"]:
+        if s["delta"] > 0:
+            lines.append(f"{s['title']}: {_pln(s['monthly_pension'])} miesięcznie (+{_pln(s['delta'])}).")
+        elif s["delta"] == 0:
+            lines.append(f"{s['title']}: bez zmiany prognozy.")
+    return lines
+
+
+def _pln(x: Decimal) -> str:
+    return f"{x:,.0f} zł".replace(",", " ")
@@ -0,0 +1,154 @@
+"""
+Gęsta tablica parametrów rocznych (1970–2100) indeksowana bezpośrednio rokiem.
+
+Słownik parametrów z Excela ma „dziury” i kończy się na ostatnim roku
+prognozy. Tutaj wypełniamy go raz: lata brakujące w środku i przed początkiem
+tabeli – ostatnią/pierwszą znaną wartością, lata po końcu tabeli – wg
+wybranej reguły ekstrapolacji przeciętnego wynagrodzenia:
+
+  * "hold"   – trzymaj ostatnią wartość (zachowanie dotychczasowe),
+  * "growth" – stała stopa wzrostu (podana albo średnia geometryczna z końca tabeli),
+  * "linear" – trend liniowy dopasowany do ostatnich lat tabeli.
+
+Wskaźniki waloryzacji poza tabelą wynoszą 1.0, a minimalna emerytura –
+MIN_PENSION_FALLBACK, tak jak w dotychczasowych metodach kalkulatora.
+"""
+from __future__ import annotations
+from decimal import Decimal
+from typing import Dict, List, Mapping, Optional, Tuple
+
+import threading
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+FIRST_YEAR = 1970
+LAST_YEAR = 2100
+
+EXTRAPOLATIONS = ("hold", "growth", "linear")
+
+# ile ostatnich lat tabeli bierzemy do wyznaczenia stopy wzrostu / trendu
+TREND_WINDOW = 5
+
+
+def _extrapolate(known: List[Tuple[int, float]], years_ahead: int, rule: str,
+                 growth_rate: Optional[float]) -> List[float]:
+    """Wartości avg_wage na 'years_ahead' lat po ostatnim znanym roku."""
+    last_year, last = known[-1]
+    window = known[-TREND_WINDOW:]
+
+    if rule == "growth":
+        if growth_rate is None:
+            (y0, v0), (y1, v1) = window[0], window[-1]
+            growth_rate = (v1 / v0) ** (1.0 / (y1 - y0)) - 1.0 if y1 > y0 and v0 > 0 else 0.0
+        return [last * (1.0 + growth_rate) ** k for k in range(1, years_ahead + 1)]
+
+    if rule == "linear":
+        n = len(window)
+        if n < 2:
+            return [last] * years_ahead
+        mx = sum(y for y, _ in window) / n
+        my = sum(v for _, v in window) / n
+        sxx = sum((y - mx) ** 2 for y, _ in window)
+        slope = sum((y - mx) * (v - my) for y, v in window) / sxx if sxx else 0.0
+        # kontynuujemy od ostatniej znanej wartości z nachyleniem trendu
+        return [max(0.0, last + slope * k) for k in range(1, years_ahead + 1)]
+
+    return [last] * years_ahead
+
+
+class YearTable:
+    """Parametry roczne jako gęste krotki Decimal (+ tablice numpy) od FIRST_YEAR do LAST_YEAR."""
+
+    def __init__(self, params: Mapping[int, Mapping[str, float]], extrapolation: str = "hold",
+                 growth_rate: Optional[float] = None, fallback_min_pension: Decimal = Decimal("0"),
+                 first_year: int = FIRST_YEAR, last_year: int = LAST_YEAR):
+        if extrapolation not in EXTRAPOLATIONS:
+            raise ValueError(f"Nieznana reguła ekstrapolacji: {extrapolation!r}")
+        self.first_year = first_year
+        self.last_year = last_year
+        self.extrapolation = extrapolation
+        self.growth_rate = growth_rate
+
+        known = sorted((int(y), float(rec["avg_wage"])) for y, rec in params.items() if rec.get("avg_wage"))
+
+        # avg_wage: przed tabelą – pierwsza wartość, luki – ostatnia wcześniejsza, po końcu – reguła
+        avg_wage: List[Decimal] = []
+        if known:
+            last_known = known[-1][0]
+            tail = _extrapolate(known, max(0, last_year - last_known), extrapolation, growth_rate)
+            current = known[0][1]
+            for y, v in known:
+                if y <= first_year:
+                    current = v
+            for y in range(first_year, last_year + 1):
+                rec = params.get(y)
+                if rec and rec.get("avg_wage"):
+                    current = rec["avg_wage"]
+                    avg_wage.append(Decimal(str(current)))
+                elif y > last_known:
+                    avg_wage.append(Decimal(str(round(tail[y - last_known - 1], 2))))
+                else:
+                    avg_wage.append(Decimal(str(current)))
+        else:
+            avg_wage = [Decimal("0")] * (last_year - first_year + 1)
+
+        def _dense(key: str, default: Decimal) -> Tuple[Decimal, ...]:
+            out = []
+            for y in range(first_year, last_year + 1):
+                rec = params.get(y)
+                out.append(Decimal(str(rec[key])) if rec and rec.get(key) else default)
+            return tuple(out)
+
+        self.avg_wage: Tuple[Decimal, ...] = tuple(avg_wage)
+        self.val_idx_konto = _dense("val_idx_konto", Decimal("1.0"))
+        self.val_idx_subkonto = _dense("val_idx_subkonto", Decimal("1.0"))
+        self.min_pension = _dense("min_pension", fallback_min_pension)
+
+        if np is not None:
+            self.avg_wage_np = np.array([float(v) for v in self.avg_wage], dtype=np.float64)
+            self.val_idx_konto_np = np.array([float(v) for v in self.val_idx_konto], dtype=np.float64)
+            self.val_idx_subkonto_np = np.array([float(v) for v in self.val_idx_subkonto], dtype=np.float64)
+            for arr in (self.avg_wage_np, self.val_idx_konto_np, self.val_idx_subkonto_np):
+                arr.setflags(write=False)
+
+    def pos(self, year: int) -> int:
+        """Indeks roku w tablicy (lata spoza zakresu – skrajna wartość)."""
+        if year < self.first_year:
+            return 0
+        if year > self.last_year:
+            return self.last_year - self.first_year
+        return year - self.first_year
+
+    def contains(self, year: int) -> bool:
+        return self.first_year <= year <= self.last_year
+
+    def arrays(self, years) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray"]:
+        """(avg_wage, val_idx_konto, val_idx_subkonto) dla tablicy lat – samo indeksowanie."""
+        years = np.asarray(years, dtype=np.int64)
+        pos = np.clip(years - self.first_year, 0, self.last_year - self.first_year)
+        inside = (years >= self.first_year) & (years <= self.last_year)
+        idx_k = np.where(inside, self.val_idx_konto_np[pos], 1.0)
+        idx_s = np.where(inside, self.val_idx_subkonto_np[pos], 1.0)
+        return self.avg_wage_np[pos], idx_k, idx_s
+
+
+_tables_lock = threading.Lock()
+_tables: Dict[Tuple, YearTable] = {}
+
+
+def compile_year_table(params: Mapping[int, Mapping[str, float]], version: str, extrapolation: str = "hold",
+                       growth_rate: Optional[float] = None,
+                       fallback_min_pension: Decimal = Decimal("0")) -> YearTable:
+    """YearTable dla danej wersji parametrów i reguły – kompilowana raz i współdzielona."""
+    key = (version, extrapolation, growth_rate, fallback_min_pension)
+    table = _tables.get(key)
+    if table is None:
+        with _tables_lock:
+            table = _tables.get(key)
+            if table is None:
+                table = YearTable(params, extrapolation, growth_rate, fallback_min_pension)
+                _tables[key] = table
+    return table
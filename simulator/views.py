@@ -1,29 +1,30 @@
-from django.shortcuts import render, redirect
-from django.urls import reverse
-from datetime import date
+import asyncio
+import hmac
 import json
-from .models import ContractType
-from simulator.models import WorkPeriod
+import math
+import re
+import time
+from datetime import date
 from decimal import Decimal
-from simulator.utils.pension_calculator import PeriodInput
 
-from django.http import JsonResponse
-from django.views.decorators.http import require_POST
-from django.views.decorators.csrf import csrf_exempt
-import json
-from django.shortcuts import render, redirect
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.shortcuts import redirect, render
 from django.urls import reverse
-from datetime import date
-import json
-from .models import ContractType
-from simulator.models import WorkPeriod
-from decimal import Decimal
-from simulator.utils.pension_calculator import PeriodInput
-from django.views.generic import TemplateView
-from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-from django.http import JsonResponse, HttpRequest
-import re
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from django.views.generic import TemplateView
+
+from simulator.models import ContractType, UserProfile, WorkPeriod
+from simulator.utils import calc_executor, contract_catalog, jobs, what_if
+from simulator.utils.calc_executor import ExecutorBusy
+from simulator.utils.instrumentation import METRICS
+from simulator.utils.jobs import JobQueueFull
+from simulator.utils.pension_calculator import PensionCalculator, PeriodInput
+from simulator.utils.result_cache import cached_recalculate
 
 
 def _fmt_pln(x: float) -> str:
@@ -39,6 +40,10 @@ def conversation_session(request):
     """Wygodny odczyt danych z sesji."""
     return request.session.get("profile_conversation") or {}
 
+async def aconversation_session(request):
+    """conversation_session dla widoków async."""
+    return await request.session.aget("profile_conversation") or {}
+
 def _base_context(user):
     """
     Fallback – gdy nie ma danych w sesji/DB.
@@ -61,6 +66,11 @@ def _base_context(user):
 # Doradca – regułki i API
 # ---------------------------------------------------
 
+# budżet czasu na warianty „co jeśli” w jednej odpowiedzi doradcy
+ADVISOR_WHAT_IF_BUDGET_MS = 50.0
+# budżet obejmuje tylko warianty – wariant bazowy (i czekanie w puli) ogranicza limit całej odpowiedzi
+ADVISOR_WHAT_IF_TIMEOUT_S = 1.0
+
 def _advise_increase_benefit(ctx):
     tips = []
     if ctx.get("retirement_age"):
@@ -110,6 +120,7 @@ INTENTS = {
     "wyzsza_emerytura": {
         "patterns": [r"więcej na emeryturze", r"wyższ[ae]j? emerytur", r"zwiększyć emerytur", r"chcę wyższ"],
         "fn": _advise_increase_benefit,
+        "what_if": True,
     },
     "oszczedzanie": {
         "patterns": [r"dodatkowe sposoby oszczędzania", r"jak oszczędzać", r"oszczędzanie", r"ike|ikze|ppk"],
@@ -118,16 +129,31 @@ INTENTS = {
     "zmiana_planu": {
         "patterns": [r"warto (coś|cos) zmienić", r"zmieni[ćc] plan", r"co zmienić"],
         "fn": _advise_plan_review,
+        "what_if": True,
     },
 }
 
+def _compile_intents(intents) -> "re.Pattern":
+    """
+    Wszystkie wzorce INTENTS w jednym wyrażeniu: alternatywy w kolejności intencji,
+    każda to lookahead „gdziekolwiek w tekście pasuje któryś wzorzec” + pusta grupa
+    nazwana kluczem intencji. Dopasowanie od początku tekstu wybiera pierwszą
+    pasującą intencję – ten sam priorytet co pętla po INTENTS z re.search.
+    """
+    alternatives = []
+    for key, spec in intents.items():
+        patterns = spec.get("patterns", [])
+        if patterns:
+            alternatives.append(f"(?=.*?(?:{'|'.join(patterns)}))(?P<{key}>)")
+    return re.compile("(?s)(?:" + "|".join(alternatives) + ")")
+
+
+_INTENT_RE = _compile_intents(INTENTS)
+
+
 def _match_intent(text: str):
-    t = text.lower()
-    for key, spec in INTENTS.items():
-        for pat in spec.get("patterns", []):
-            if re.search(pat, t):
-                return key
-    return None
+    m = _INTENT_RE.match(text.lower())
+    return m.lastgroup if m else None
 
 @method_decorator(csrf_exempt, name="dispatch")
 class AdvisorChatView(TemplateView):
@@ -151,8 +177,55 @@ class AdvisorChatView(TemplateView):
         }
         return ctx
 
+async def _advisor_inputs(request, user):
+    """
+    (płeć, rok emerytury, rok urodzenia, okresy, punkt kontrolny) do wariantów doradcy:
+    najpierw oś czasu z sesji (punkt kontrolny recalculate_api), potem profil w bazie.
+    """
+    key = _timeline_key(request)
+    entry = await cache.aget(key) if key else None
+    if entry:
+        checkpoint = entry["checkpoint"]
+        periods = [PeriodInput(s, e, Decimal(sal), c, ref) for s, e, c, sal, ref in checkpoint.periods]
+        return entry["gender"], entry["retirement_year"], entry["birth_year"], periods, checkpoint
+
+    profile = await UserProfile.objects.filter(user=user).afirst() if user.is_authenticated else None
+    if profile is not None:
+        return (profile.gender, profile.planned_retirement_year, profile.birth_year,
+                await abuild_periods(profile), None)
+    return None
+
+async def _advisor_what_if(request, user):
+    """Warianty „co jeśli” dla okresów użytkownika (None – brak danych, pełna pula obliczeń albo przekroczony czas)."""
+    inputs = await _advisor_inputs(request, user)
+    if inputs is None or not inputs[3]:
+        return None
+    gender, retirement_year, birth_year, periods, checkpoint = inputs
+    try:
+        # kalkulator (wczytanie parametrów) też budujemy w puli, nie w pętli zdarzeń
+        result, _ = await asyncio.wait_for(calc_executor.run(lambda: what_if.run(
+            PensionCalculator(), gender, retirement_year, birth_year, periods, checkpoint,
+            budget_ms=ADVISOR_WHAT_IF_BUDGET_MS)), ADVISOR_WHAT_IF_TIMEOUT_S)
+    except (ExecutorBusy, asyncio.TimeoutError):
+        # doradca odpowiada wtedy samymi ogólnymi wskazówkami; przerwane obliczenie
+        # kończy się w puli i zwalnia miejsce dopiero wtedy (calc_executor.run)
+        return None
+    return result
+
+def _what_if_json(result) -> dict:
+    return {
+        "baseline": float(result["baseline"]),
+        "retirement_year": result["retirement_year"],
+        "scenarios": [
+            {**s, "monthly_pension": float(s["monthly_pension"]), "delta": float(s["delta"])}
+            for s in result["scenarios"]
+        ],
+        "skipped": result["skipped"],
+        "elapsed_ms": result["elapsed_ms"],
+    }
+
 @csrf_exempt
-def advisor_chat_api(request: HttpRequest):
+async def advisor_chat_api(request: HttpRequest):
     if request.method != "POST":
         return JsonResponse({"error": "POST only"}, status=405)
     try:
@@ -161,7 +234,8 @@ def advisor_chat_api(request: HttpRequest):
         payload = {}
 
     user_text = (payload.get("message") or "").strip()
-    base = _base_context(request.user)
+    user = await request.auser()
+    base = _base_context(user)
 
     if not user_text:
         return JsonResponse({"reply": "Napisz wiadomość, a postaram się pomóc."})
@@ -184,6 +258,16 @@ def advisor_chat_api(request: HttpRequest):
     spec = INTENTS[intent]
     if "fn" in spec:
         tips = spec["fn"](base)
+        scenarios = await _advisor_what_if(request, user) if spec.get("what_if") else None
+        if scenarios:
+            return JsonResponse({
+                "reply": (
+                    "Policzyłem warianty dla Twojej osi czasu:\n\n• " + "\n• ".join(what_if.describe(scenarios))
+                    + "\n\nOgólnie:\n\n• " + "\n• ".join(tips)
+                ),
+                "what_if": _what_if_json(scenarios),
+                "suggestions": ["Jak oszczędzać?", "Czy warto coś zmienić w moim planie?"]
+            })
         return JsonResponse({
             "reply": "Oto co możesz zrobić:\n\n• " + "\n• ".join(tips),
             "suggestions": ["Jak oszczędzać?", "Czy warto coś zmienić w moim planie?"]
@@ -194,8 +278,304 @@ def advisor_chat_api(request: HttpRequest):
             "suggestions": ["Chcę więcej na emeryturze", "Jak oszczędzać?"]
         })
 
+# ---------------------------------------------------
+# API kalkulatora
+# ---------------------------------------------------
+
+# etykieta z selecta na osi czasu ('Umowa o pracę') -> kod kontraktu ('EMPLOYMENT')
+_CONTRACT_BY_LABEL = {label: name for name, label in ContractType.CONTRACT_TYPES}
+
+# granice danych z żądań (endpointy są publiczne) – wiek i rok urodzenia przycinamy,
+# liczba aktywności i płaca poza zakresem to błąd 400
+MIN_AGE, MAX_AGE = 0, 100
+MIN_BIRTH_YEAR = 1900
+MAX_ACTIVITIES = 100
+MAX_SALARY = Decimal("10000000")
+
+def _json_payload(request) -> dict:
+    """Treść żądania jako obiekt JSON; ValueError (-> 400) dla niepoprawnego JSON-a albo innego kształtu."""
+    try:
+        payload = json.loads(request.body.decode("utf-8"))
+    except Exception:
+        raise ValueError("Nieprawidłowy JSON")
+    if not isinstance(payload, dict):
+        raise ValueError("Oczekiwano obiektu JSON")
+    return payload
+
+def _bounded_int(value, lo, hi, field):
+    """Liczba całkowita przycięta do [lo, hi]; None dla braku wartości, ValueError dla nie-liczby."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f"{field}: oczekiwano liczby całkowitej")
+    try:
+        number = int(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"{field}: oczekiwano liczby całkowitej")
+    return min(max(number, lo), hi)
+
+def _salary(value) -> Decimal:
+    if isinstance(value, bool):
+        raise ValueError("salary: oczekiwano kwoty")
+    try:
+        salary = Decimal(str(value or 0))
+    except (ArithmeticError, ValueError):
+        raise ValueError("salary: oczekiwano kwoty")
+    if not salary.is_finite() or not 0 <= salary <= MAX_SALARY:
+        raise ValueError(f"salary: kwota z zakresu 0–{MAX_SALARY}")
+    return salary
+
+def _periods_from_activities(activities, birth_year) -> list:
+    """
+    Aktywności z osi czasu (startAge/endAge/contractType/salary) -> PeriodInput. Przerwy
+    i aktywności bez wieku pomijamy; zły kształt albo nie-liczby -> ValueError.
+    """
+    if activities is None:
+        return []
+    if not isinstance(activities, list) or len(activities) > MAX_ACTIVITIES:
+        raise ValueError(f"activities: lista najwyżej {MAX_ACTIVITIES} aktywności")
+    periods = []
+    for a in activities:
+        if not isinstance(a, dict):
+            raise ValueError("activities: każda aktywność musi być obiektem")
+        if a.get("type", "work") != "work":
+            continue
+        start_age = _bounded_int(a.get("startAge"), MIN_AGE, MAX_AGE, "startAge")
+        end_age = _bounded_int(a.get("endAge"), MIN_AGE, MAX_AGE, "endAge")
+        if start_age is None or end_age is None:
+            continue
+        contract = a.get("contractType") or ""
+        if not isinstance(contract, str):
+            raise ValueError("contractType: oczekiwano tekstu")
+        contract = _CONTRACT_BY_LABEL.get(contract.strip(), contract.strip().upper())
+        periods.append(
+            PeriodInput(
+                start_year=birth_year + start_age,
+                end_year=birth_year + end_age,
+                salary_gross_monthly=_salary(a.get("salary")),
+                contract_name=contract,
+                ref_year=birth_year + start_age,
+            )
+        )
+    return periods
+
+async def _profile_from_payload(request, payload):
+    """(gender, birth_year) z żądania, z uzupełnieniem danymi rozmowy z sesji; ValueError dla nie-liczb."""
+    sess = await aconversation_session(request)
+    gender = payload.get("gender")
+    gender = gender.upper() if isinstance(gender, str) else ""
+    if gender not in ("M", "K"):
+        gender = 'K' if sess.get("gender") == "Kobieta" else 'M'
+    this_year = date.today().year
+    birth_year = _bounded_int(payload.get("birth_year"), MIN_BIRTH_YEAR, this_year, "birth_year")
+    if not birth_year:
+        birth_year = _to_int(sess.get("dob_year"))
+        birth_year = min(max(birth_year, MIN_BIRTH_YEAR), this_year) if birth_year else this_year - 30
+    return gender, birth_year
+
+def _retirement_age(payload, gender) -> int:
+    return (_bounded_int(payload.get("retirement_age"), MIN_AGE, MAX_AGE, "retirement_age")
+            or (60 if gender == 'K' else 65))
+
+@require_POST
+async def retirement_sweep_api(request):
+    """Miesięczna emerytura dla każdego wieku przejścia 60–70 (jedno przejście po latach)."""
+    try:
+        payload = _json_payload(request)
+        gender, birth_year = await _profile_from_payload(request, payload)
+        periods = _periods_from_activities(payload.get("activities"), birth_year)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    try:
+        sweep = await calc_executor.run(
+            lambda: PensionCalculator().sweep_retirement_ages(gender, birth_year, periods))
+    except ExecutorBusy:
+        return _busy_response()
+    return JsonResponse({
+        "gender": gender,
+        "birth_year": birth_year,
+        "ages": [
+            {
+                "age": r["retirement_age"],
+                "year": r["retirement_year"],
+                "monthly_pension": float(r["monthly_pension"]),
+                "capital": float(r["total_contributions_valorized"]),
+                "life_expectancy_months": r["life_expectancy_months"],
+            }
+            for r in sweep
+        ],
+    })
+
+# punkt kontrolny przeliczeń osi czasu – per sesja, w cache (patrz utils.incremental)
+TIMELINE_CHECKPOINT_TTL = 60 * 30
+
+def _timeline_key(request):
+    return f"timeline:{request.session.session_key}" if request.session.session_key else None
+
+def _busy_response():
+    return JsonResponse({"error": "Serwer jest zajęty obliczeniami, spróbuj ponownie za chwilę"}, status=503,
+                        headers={"Retry-After": "1"})
+
+def _result_json(result) -> dict:
+    return {
+        "monthly_pension": float(result["monthly_pension"]),
+        "total_contributions_valorized": float(result["total_contributions_valorized"]),
+        "konto_balance": float(result["konto_balance"]),
+        "subkonto_balance": float(result["subkonto_balance"]),
+        "life_expectancy_months": result["life_expectancy_months"],
+        "total_work_years": result["total_work_years"],
+        "retirement_age": result["retirement_age"],
+        "overlapping_years": result["overlapping_years"],
+        "contributions_breakdown": [
+            [year, float(konto), float(sub)] for year, konto, sub in result["contributions_breakdown"]
+        ],
+    }
+
+@require_POST
+async def recalculate_api(request):
+    """
+    Przeliczenie emerytury dla aktywności z osi czasu. Liczone przyrostowo:
+    lata przed pierwszą zmienioną pozycją bierzemy z punktu kontrolnego sesji.
+    """
+    started = time.perf_counter()
+    try:
+        payload = _json_payload(request)
+        gender, birth_year = await _profile_from_payload(request, payload)
+        retirement_age = _retirement_age(payload, gender)
+        periods = _periods_from_activities(payload.get("activities"), birth_year)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    if not request.session.session_key:
+        await request.session.asave()
+    key = _timeline_key(request)
+
+    entry = await cache.aget(key) or {}
+    try:
+        result, checkpoint, recomputed_from = await calc_executor.run(lambda: cached_recalculate(
+            PensionCalculator(), gender, birth_year + retirement_age, birth_year, periods, entry.get("checkpoint")))
+    except ExecutorBusy:
+        return _busy_response()
+    # obok punktu kontrolnego dane profilu – doradca liczy z nich warianty „co jeśli”
+    await cache.aset(key, {
+        "checkpoint": checkpoint,
+        "gender": gender,
+        "birth_year": birth_year,
+        "retirement_year": birth_year + retirement_age,
+    }, TIMELINE_CHECKPOINT_TTL)
+
+    data = _result_json(result)
+    data["recomputed_from"] = recomputed_from
+    data["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return JsonResponse(data)
+
+# ---------------------------------------------------
+# Zadania w tle (utils.jobs): zlecenie + odpytywanie
+# ---------------------------------------------------
+
+# najdłuższe czekanie na wynik w jednym odpytaniu (?wait=s)
+JOB_MAX_WAIT = 30.0
+
+def _periods_rows(periods) -> list:
+    """PeriodInput -> krotki (start, koniec, płaca jako tekst, umowa) do przesłania do procesu roboczego."""
+    return [(p.start_year, p.end_year, str(p.salary_gross_monthly), p.contract_name) for p in periods]
+
+def _job_int(payload, field, default):
+    """Liczba całkowita z danych zadania; brak -> default, nie-liczba -> ValueError (bez cichego zastępowania)."""
+    value = payload.get(field)
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        raise ValueError(f"{field}: oczekiwano liczby całkowitej")
+    try:
+        return int(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"{field}: oczekiwano liczby całkowitej")
+
+async def _job_spec(request, kind, payload) -> dict:
+    """Dane zadania z żądania (aktywności jak w recalculate_api); ValueError przy błędnych danych."""
+    if kind == "monte_carlo":
+        gender, birth_year = await _profile_from_payload(request, payload)
+        retirement_age = _retirement_age(payload, gender)
+        periods = _periods_from_activities(payload.get("activities"), birth_year)
+        if not periods:
+            raise ValueError("Brak okresów pracy")
+        n_paths = _job_int(payload, "n_paths", 5000)
+        if not 1 <= n_paths <= jobs.MAX_PATHS:
+            raise ValueError(f"n_paths musi być z zakresu 1–{jobs.MAX_PATHS}")
+        seed = _job_int(payload, "seed", None)
+        if seed is not None and seed < 0:
+            raise ValueError("seed: liczba całkowita nieujemna")
+        return {"gender": gender, "birth_year": birth_year, "retirement_year": birth_year + retirement_age,
+                "periods": _periods_rows(periods), "n_paths": n_paths, "seed": seed}
+
+    if kind == "cohort":
+        profiles = payload.get("profiles")
+        if not isinstance(profiles, list) or not 1 <= len(profiles) <= jobs.MAX_COHORT:
+            raise ValueError(f"profiles: lista 1–{jobs.MAX_COHORT} profili")
+        rows = []
+        for i, p in enumerate(profiles):
+            if not isinstance(p, dict):
+                raise ValueError(f"profiles[{i}]: oczekiwano obiektu")
+            gender = p.get("gender") or "M"
+            gender = gender.upper() if isinstance(gender, str) else ""
+            birth_year = _bounded_int(p.get("birth_year"), MIN_BIRTH_YEAR, date.today().year, "birth_year")
+            if gender not in ("M", "K") or not birth_year:
+                raise ValueError(f"profiles[{i}]: wymagane gender (M/K) i birth_year")
+            retirement_age = _retirement_age(p, gender)
+            periods = _periods_from_activities(p.get("activities"), birth_year)
+            if not periods:
+                raise ValueError(f"profiles[{i}]: brak okresów pracy")
+            rows.append((gender, birth_year + retirement_age, birth_year, _periods_rows(periods)))
+        return {"profiles": rows}
+
+    raise ValueError(f"Nieznany rodzaj zadania: {kind}")
+
+async def _job_service():
+    # pierwsze użycie uruchamia i rozgrzewa pulę procesów – poza pętlą zdarzeń
+    if jobs.started():
+        return jobs.get_service()
+    return await sync_to_async(jobs.get_service, thread_sensitive=False)()
+
+@require_POST
+async def job_submit_api(request):
+    """Zlecenie obliczenia w tle: 202 + job_id i adres do odpytywania; 503 przy pełnej kolejce."""
+    try:
+        payload = _json_payload(request)
+        spec = await _job_spec(request, payload.get("kind"), payload)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    service = await _job_service()
+    try:
+        job = service.submit(payload["kind"], spec)
+    except JobQueueFull:
+        return _busy_response()
+    status_url = reverse("simulator:job_status_api", args=[job.id])
+    return JsonResponse({**job.to_json(), "status_url": status_url}, status=202, headers={"Location": status_url})
+
+@require_GET
+async def job_status_api(request, job_id):
+    """Stan zadania; z ?wait=s czeka na wynik do s sekund (long polling). 404 – brak albo wygasło."""
+    job = (await _job_service()).get(job_id)
+    if job is None:
+        return JsonResponse({"error": "Zadanie nie istnieje albo jego wynik wygasł"}, status=404)
+
+    try:
+        wait = float(request.GET.get("wait", 0))
+    except ValueError:
+        wait = math.nan
+    if not math.isfinite(wait):
+        return JsonResponse({"error": "wait: oczekiwano liczby sekund"}, status=400)
+    wait = min(max(wait, 0.0), JOB_MAX_WAIT)
+    if wait and not job.future.done():
+        # asyncio.wait nie anuluje zadania po upływie czasu
+        await asyncio.wait([asyncio.wrap_future(job.future)], timeout=wait)
+    return JsonResponse(job.to_json())
+
 @require_POST
-def update_profile(request):
+async def update_profile(request):
     """Aktualizacja profilu użytkownika w sesji"""
     try:
         data = json.loads(request.body)
@@ -211,7 +591,7 @@ def update_profile(request):
             return JsonResponse({'success': False, 'error': 'Nieprawidłowa płeć'})
         
         # Pobierz dane z sesji
-        profile_data = request.session.get('profile_conversation', {})
+        profile_data = await request.session.aget('profile_conversation', {})
         
         # Zaktualizuj dane
         current_year = date.today().year
@@ -221,8 +601,7 @@ def update_profile(request):
         profile_data['gender'] = 'Mężczyzna' if gender == 'M' else 'Kobieta'
         
         # Zapisz do sesji
-        request.session['profile_conversation'] = profile_data
-        request.session.modified = True
+        await request.session.aset('profile_conversation', profile_data)
         
         return JsonResponse({'success': True})
         
@@ -294,7 +673,8 @@ def dashboard(request):
         'planned_retirement_age': planned_retirement_age,
         'birth_year': birth_year,
         'gender': gender,
-        'activities': []
+        'activities': [],
+        'recalculate_url': reverse('simulator:recalculate_api'),
     }
 
     profile_data = {
@@ -313,22 +693,8 @@ def dashboard(request):
         'retirement_age': planned_retirement_age
     }
 
-    # ---- ContractType jak było ----
-    contract_types = ContractType.objects.all()
-    if not contract_types.exists():
-        default_types = [
-            {'name': 'EMPLOYMENT', 'display_name': 'Umowa o pracę', 'zus_percentage': 19.52},
-            {'name': 'MANDATE', 'display_name': 'Umowa zlecenie', 'zus_percentage': 19.52},
-            {'name': 'TASK', 'display_name': 'Umowa o dzieło', 'zus_percentage': 0.00},
-            {'name': 'BUSINESS', 'display_name': 'Własna działalność gospodarcza', 'zus_percentage': 19.52},
-            {'name': 'B2B', 'display_name': 'Umowa B2B', 'zus_percentage': 9.76},
-        ]
-        for ct in default_types:
-            ContractType.objects.get_or_create(
-                name=ct['name'],
-                defaults={'display_name': ct['display_name'], 'zus_percentage': ct['zus_percentage']}
-            )
-        contract_types = ContractType.objects.all()
+    # ---- ContractType z katalogu w pamięci (domyślne typy zakłada post_migrate) ----
+    contract_types = contract_catalog.contract_types()
 
     pension_amount = target_pension or 0
     pyramid_info = get_pyramid_level(pension_amount)
@@ -367,19 +733,34 @@ def conversation_profile(request):
     return render(request, "simulator/conversation_form.html")
 
 def build_periods(user_profile) -> list:
-    periods = []
-    qs = WorkPeriod.objects.filter(user_profile=user_profile).order_by("start_year")
-    for wp in qs:
-        periods.append(
-            PeriodInput(
-                start_year=wp.start_year,
-                end_year=wp.end_year,
-                salary_gross_monthly=Decimal(wp.salary_gross_monthly),
-                contract_name=wp.contract_type.name,  # 'EMPLOYMENT', 'MANDATE', 'TASK', 'BUSINESS', 'B2B'
-                ref_year=wp.start_year,               # indeksacja odwrotna względem początku okresu
-            )
+    """Okresy pracy jako PeriodInput – jedno zapytanie z JOIN-em na typ umowy, bez obiektów modelu."""
+    qs = (
+        WorkPeriod.objects.filter(user_profile=user_profile)
+        .order_by("start_year")
+        .values_list("start_year", "end_year", "salary_gross_monthly", "contract_type__name")
+    )
+    return [
+        PeriodInput(
+            start_year=start_year,
+            end_year=end_year,
+            salary_gross_monthly=Decimal(salary),
+            contract_name=contract_name,  # 'EMPLOYMENT', 'MANDATE', 'TASK', 'BUSINESS', 'B2B'
+            ref_year=start_year,          # indeksacja odwrotna względem początku okresu
         )
-    return periods
+        for start_year, end_year, salary, contract_name in qs
+    ]
+
+async def abuild_periods(user_profile) -> list:
+    """build_periods dla widoków async."""
+    qs = (
+        WorkPeriod.objects.filter(user_profile=user_profile)
+        .order_by("start_year")
+        .values_list("start_year", "end_year", "salary_gross_monthly", "contract_type__name")
+    )
+    return [
+        PeriodInput(start_year, end_year, Decimal(salary), contract_name, start_year)
+        async for start_year, end_year, salary, contract_name in qs
+    ]
 
 def get_pyramid_level(pension_amount):
     """Zwraca numer poziomu piramidy (0-5) oraz szczegóły dla danej emerytury"""
@@ -446,3 +827,18 @@ def get_pyramid_level(pension_amount):
             return level_data
     
     return levels[-1]  # fallback do najwyższego poziomu
+
+
+def _metrics_allowed(request) -> bool:
+    """Z METRICS_TOKEN – tylko nagłówek Bearer z tokenem; bez tokenu – adres z METRICS_ALLOWED_IPS."""
+    token = getattr(settings, "METRICS_TOKEN", None)
+    if token:
+        scheme, _, given = request.META.get("HTTP_AUTHORIZATION", "").partition(" ")
+        return scheme.lower() == "bearer" and hmac.compare_digest(given.strip().encode(), token.encode())
+    return request.META.get("REMOTE_ADDR") in getattr(settings, "METRICS_ALLOWED_IPS", ["127.0.0.1", "::1"])
+
+def metrics(request):
+    """Metryki procesu w formacie tekstowym Prometheus (dostęp – patrz _metrics_allowed)."""
+    if not _metrics_allowed(request):
+        return HttpResponse(status=403)
+    return HttpResponse(METRICS.render_prometheus(), content_type="text/plain; version=0.0.4; charset=utf-8")